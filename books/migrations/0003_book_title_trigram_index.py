@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEX_NAME = "books_book_title_trgm_idx"
+
+
+def create_title_index(apps, schema_editor) -> None:
+    # `title__icontains` compares UPPER(title) on PostgreSQL, which a
+    # trigram index of the same expression serves. Other databases scan
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON books_book "
+        f"USING gin (UPPER(title::text) gin_trgm_ops)"
+    )
+
+
+def drop_title_index(apps, schema_editor) -> None:
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_alter_book_image"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_title_index, drop_title_index),
+    ]
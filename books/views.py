@@ -16,6 +16,7 @@ class BookViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
     filterset_class = BookFilter
     ordering_fields = ["title", "author"]
+    throttle_scopes = {"list": "catalog", "retrieve": "catalog"}
 
     @extend_schema(
         parameters=[
@@ -0,0 +1,414 @@
+import random
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate, islice
+from typing import Callable, Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections, models, router, transaction
+
+from books.models import Book
+from borrowings.models import Borrowing
+from payments.models import Payment
+from payments.stripe_helpers import FINE_MULTIPLIER
+
+User = get_user_model()
+
+# Every generated user can log in with this password
+DATASET_PASSWORD = "1qazcde3"
+
+FIRST_NAMES = [
+    "Olena", "Andrii", "Maria", "Taras", "Iryna", "Dmytro", "Sofia",
+    "Oleksandr", "Anna", "Mykola", "Kateryna", "Serhii", "Yulia", "Ivan",
+    "Nataliia", "Bohdan", "Daria", "Pavlo", "Viktoriia", "Roman",
+]
+LAST_NAMES = [
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Kravchenko",
+    "Oliinyk", "Shevchuk", "Koval", "Polishchuk", "Bondar", "Tkachuk",
+    "Moroz", "Marchenko", "Lysenko", "Rudenko", "Savchenko", "Petrenko",
+    "Klymenko", "Pavlenko", "Levchenko",
+]
+TITLE_ADJECTIVES = [
+    "Silent", "Hidden", "Last", "Golden", "Forgotten", "Broken", "Endless",
+    "Distant", "Secret", "Burning", "Quiet", "Lost", "Wild", "Frozen",
+    "Crimson", "Hollow", "Ancient", "Bright", "Restless", "Northern",
+]
+TITLE_NOUNS = [
+    "River", "Garden", "Kingdom", "Letter", "Winter", "House", "Road",
+    "Empire", "Sea", "Forest", "City", "Mirror", "Voyage", "Harbor",
+    "Mountain", "Promise", "Island", "Shadow", "Bridge", "Orchard",
+]
+
+# Share of users who are staff
+STAFF_SHARE = 0.001
+# Borrowings are returned late, are never returned, or else are returned
+# in time
+LATE_SHARE = 0.12
+LOST_SHARE = 0.02
+MAX_BORROWING_DAYS = 30
+MAX_LATE_DAYS = 30
+PAYMENT_STATUSES = {
+    Payment.Status.PAID: 0.92,
+    Payment.Status.EXPIRED: 0.05,
+    Payment.Status.PENDING: 0.03,
+}
+FINE_STATUSES = {
+    Payment.Status.PAID: 0.80,
+    Payment.Status.PENDING: 0.15,
+    Payment.Status.EXPIRED: 0.05,
+}
+
+
+def get_popularity_weights(count: int, skew: float) -> list[float]:
+    """
+    Cumulative weights of a Zipf distribution over `count` items, where
+    the item of rank r is picked in proportion to 1 / r ** skew.
+    """
+    return list(
+        accumulate(1 / rank ** skew for rank in range(1, count + 1))
+    )
+
+
+def iter_batches(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class DatasetGenerator:
+    """
+    Generate a synthetic dataset of users, books, borrowings and their
+    payments.
+
+    Popularity of books and activity of users follow Zipf distributions,
+    borrowings are spread over the `years` before the end date and are
+    returned in time, late or never, and payments and fines follow their
+    status distributions. Primary keys are assigned here, after the
+    largest existing ones, so rows are written in batches without
+    reading them back: with `COPY` on PostgreSQL, with `executemany`
+    elsewhere.
+
+    On an empty database the same seed and end date generate the same
+    rows. Emails and book titles contain the primary keys to stay
+    unique, so on a populated database, or in a second run, they differ.
+    """
+
+    def __init__(
+            self,
+            seed: int = 42,
+            end_date: date = None,
+            years: int = 3,
+            skew: float = 1.0,
+            batch_size: int = 50_000,
+            log: Callable[[str], None] = None,
+    ) -> None:
+        self.random = random.Random(seed)
+        self.end_date = end_date or date.today()
+        self.days = years * 365
+        self.skew = skew
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        # Statuses and their cumulative weights, picked for every payment
+        self.payment_statuses = self.get_choices(PAYMENT_STATUSES)
+        self.fine_statuses = self.get_choices(FINE_STATUSES)
+
+    @staticmethod
+    def get_choices(weights: dict) -> tuple[list, list[float]]:
+        return list(weights), list(accumulate(weights.values()))
+
+    def generate(self, users: int, books: int, borrowings: int) -> dict:
+        """Generate the rows and return how many of each were written."""
+        user_ids = self.generate_users(users)
+        book_ids, fees = self.generate_books(books)
+        counts = {
+            "users": users,
+            "books": books,
+            **self.generate_borrowings(borrowings, user_ids, book_ids, fees),
+        }
+        self.finish()
+        return counts
+
+    def generate_users(self, count: int) -> range:
+        start = self.get_next_id(User)
+        ids = range(start, start + count)
+        password = make_password(DATASET_PASSWORD)
+        joined = datetime.combine(
+            self.end_date - timedelta(days=self.days),
+            datetime.min.time(),
+            timezone.utc,
+        )
+
+        def rows():
+            for user_id in ids:
+                first_name = self.random.choice(FIRST_NAMES)
+                last_name = self.random.choice(LAST_NAMES)
+                is_staff = self.random.random() < STAFF_SHARE
+                yield (
+                    user_id,
+                    password,
+                    False,
+                    first_name,
+                    last_name,
+                    f"{first_name}.{last_name}.{user_id}@example.com".lower(),
+                    is_staff,
+                    True,
+                    joined,
+                )
+
+        self.write(
+            User,
+            [
+                "id",
+                "password",
+                "is_superuser",
+                "first_name",
+                "last_name",
+                "email",
+                "is_staff",
+                "is_active",
+                "date_joined",
+            ],
+            rows(),
+        )
+        return ids
+
+    def generate_books(self, count: int) -> tuple[range, array]:
+        start = self.get_next_id(Book)
+        ids = range(start, start + count)
+        # Daily fees in cents, by position in `ids`
+        fees = array("l")
+
+        def rows():
+            for book_id in ids:
+                fee = self.random.randrange(50, 500, 5)
+                fees.append(fee)
+                yield (
+                    book_id,
+                    f"The {self.random.choice(TITLE_ADJECTIVES)} "
+                    f"{self.random.choice(TITLE_NOUNS)}, "
+                    f"Book {book_id}",
+                    f"{self.random.choice(FIRST_NAMES)} "
+                    f"{self.random.choice(LAST_NAMES)}",
+                    self.random.choice(Book.CoverType.values),
+                    self.random.randint(0, 20),
+                    Decimal(fee) / 100,
+                )
+
+        self.write(
+            Book,
+            ["id", "title", "author", "cover", "inventory", "daily_fee"],
+            rows(),
+        )
+        return ids, fees
+
+    def generate_borrowings(
+            self, count: int, user_ids: range, book_ids: range, fees: array
+    ) -> dict:
+        if not count:
+            return {"borrowings": 0, "payments": 0}
+        borrowing_start = self.get_next_id(Borrowing)
+        payment_id = self.get_next_id(Payment)
+        payment_count = 0
+
+        # The most popular books and most active users are spread over
+        # the ids rather than being the first ones
+        books = list(range(len(book_ids)))
+        self.random.shuffle(books)
+        users = list(user_ids)
+        self.random.shuffle(users)
+        book_weights = get_popularity_weights(len(books), self.skew)
+        user_weights = get_popularity_weights(len(users), self.skew)
+
+        borrowing_fields = [
+            "id",
+            "borrow_date",
+            "expected_return_date",
+            "actual_return_date",
+            "book_id",
+            "user_id",
+        ]
+        payment_fields = [
+            "id",
+            "status",
+            "type",
+            "borrowing_id",
+            "session_url",
+            "session_id",
+            "money_to_pay",
+            "created_at",
+        ]
+        batches = iter_batches(
+            range(borrowing_start, borrowing_start + count), self.batch_size
+        )
+        for borrowing_ids in batches:
+            chosen_books = self.random.choices(
+                books, cum_weights=book_weights, k=len(borrowing_ids)
+            )
+            chosen_users = self.random.choices(
+                users, cum_weights=user_weights, k=len(borrowing_ids)
+            )
+            borrowing_rows = []
+            payment_rows = []
+            for borrowing_id, book, user_id in zip(
+                borrowing_ids, chosen_books, chosen_users
+            ):
+                borrowing = self.make_borrowing(
+                    borrowing_id, book_ids[book], user_id
+                )
+                borrowing_rows.append(borrowing)
+                for payment in self.make_payments(borrowing, fees[book]):
+                    payment_rows.append((payment_id, *payment))
+                    payment_id += 1
+            self.write(Borrowing, borrowing_fields, borrowing_rows)
+            self.write(Payment, payment_fields, payment_rows)
+            payment_count += len(payment_rows)
+        return {"borrowings": count, "payments": payment_count}
+
+    def make_borrowing(self, borrowing_id: int, book_id: int, user_id: int):
+        borrow_date = self.end_date - timedelta(
+            days=self.random.randrange(self.days)
+        )
+        days = self.random.randint(1, MAX_BORROWING_DAYS)
+        expected_return_date = borrow_date + timedelta(days=days)
+        outcome = self.random.random()
+        if outcome < LATE_SHARE:
+            actual_return_date = expected_return_date + timedelta(
+                days=self.random.randint(1, MAX_LATE_DAYS)
+            )
+        elif outcome < LATE_SHARE + LOST_SHARE:
+            actual_return_date = None
+        else:
+            actual_return_date = borrow_date + timedelta(
+                days=self.random.randint(0, days)
+            )
+        if actual_return_date and actual_return_date > self.end_date:
+            # Not returned yet
+            actual_return_date = None
+        return (
+            borrowing_id,
+            borrow_date,
+            expected_return_date,
+            actual_return_date,
+            book_id,
+            user_id,
+        )
+
+    def make_payments(self, borrowing: tuple, fee: int) -> Iterator[tuple]:
+        """
+        Yield the payment of the borrowing and, if it was returned late,
+        its fine, without their ids.
+        """
+        borrowing_id, borrow_date, expected, actual, _, _ = borrowing
+        yield self.make_payment(
+            borrowing_id,
+            Payment.Type.PAYMENT,
+            self.payment_statuses,
+            Decimal(fee * (expected - borrow_date).days) / 100,
+            borrow_date,
+        )
+        if actual and actual > expected:
+            yield self.make_payment(
+                borrowing_id,
+                Payment.Type.FINE,
+                self.fine_statuses,
+                Decimal(fee * (actual - expected).days * FINE_MULTIPLIER)
+                / 100,
+                actual,
+            )
+
+    def make_payment(
+            self,
+            borrowing_id: int,
+            payment_type: str,
+            statuses: tuple[list, list[float]],
+            money_to_pay: Decimal,
+            day: date,
+    ) -> tuple:
+        population, cum_weights = statuses
+        (status,) = self.random.choices(population, cum_weights=cum_weights)
+        session_id = f"cs_test_{self.random.getrandbits(96):024x}"
+        created_at = datetime.combine(
+            day, datetime.min.time(), timezone.utc
+        ) + timedelta(seconds=self.random.randrange(24 * 60 * 60))
+        return (
+            status,
+            payment_type,
+            borrowing_id,
+            f"https://checkout.stripe.com/c/pay/{session_id}",
+            session_id,
+            money_to_pay,
+            created_at,
+        )
+
+    def get_next_id(self, model: type[models.Model]) -> int:
+        largest = model.objects.aggregate(largest=models.Max("id"))["largest"]
+        return (largest or 0) + 1
+
+    def write(
+            self,
+            model: type[models.Model],
+            field_names: list[str],
+            rows: Iterable[tuple],
+    ) -> None:
+        """Write the rows in batches of `batch_size` in transactions."""
+        fields = [model._meta.get_field(name) for name in field_names]
+        # The connection itself rather than the `connection` proxy, which
+        # would be looked up for every value
+        database = router.db_for_write(model)
+        connection = connections[database]
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ", ".join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        written = 0
+        started = time.perf_counter()
+        for batch in iter_batches(rows, self.batch_size):
+            with (
+                transaction.atomic(using=database),
+                connection.cursor() as cursor,
+            ):
+                if connection.vendor == "postgresql":
+                    with cursor.cursor.copy(
+                        f"COPY {table} ({columns}) FROM STDIN"
+                    ) as copy:
+                        for row in batch:
+                            copy.write_row(row)
+                else:
+                    cursor.executemany(
+                        f"INSERT INTO {table} ({columns}) VALUES "
+                        f"({', '.join(['%s'] * len(fields))})",
+                        [
+                            [
+                                field.get_db_prep_save(value, connection)
+                                for field, value in zip(fields, row)
+                            ]
+                            for row in batch
+                        ],
+                    )
+            written += len(batch)
+        if written:
+            elapsed = time.perf_counter() - started
+            self.log(
+                f"{model._meta.verbose_name_plural}: {written} rows in "
+                f"{elapsed:.1f}s ({written / elapsed:.0f} rows/s)"
+            )
+
+    def finish(self) -> None:
+        """Move sequences past the written ids and refresh statistics."""
+        generated = [User, Book, Borrowing, Payment]
+        connection = connections[router.db_for_write(Payment)]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), generated
+            ):
+                cursor.execute(sql)
+            if connection.vendor == "postgresql":
+                tables = ", ".join(
+                    connection.ops.quote_name(model._meta.db_table)
+                    for model in generated
+                )
+                cursor.execute(f"ANALYZE {tables}")
@@ -0,0 +1,191 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from books.models import Book
+from payments.fake_stripe import FakeStripe, FakeStripeServer
+from payments.models import Payment
+from payments.stripe_client import stripe_gateway
+from payments.tasks import check_expired_sessions
+
+User = get_user_model()
+
+BENCHMARK_EMAIL_DOMAIN = "benchmark.local"
+
+
+class Command(BaseCommand):
+    """
+    Command to benchmark borrowing creation and the Stripe expiry poller
+    against a local fake Stripe server.
+    """
+    help = (
+        "Create borrowings through the API with Stripe replaced by a local "
+        "fake server and report throughput and latency. "
+        "Telegram notifications are disabled during the run."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--borrowings", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--latency-ms",
+            type=int,
+            default=0,
+            help="Delay added to every fake Stripe call.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Share of fake Stripe calls failing with a 500 error.",
+        )
+        parser.add_argument(
+            "--expire-ratio",
+            type=float,
+            default=0.5,
+            help="Share of sessions expired before running the poller.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the created users, book and borrowings.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        server = FakeStripeServer(
+            stripe_state=FakeStripe(
+                latency=options["latency_ms"] / 1000,
+                error_rate=options["error_rate"],
+            )
+        )
+        server.start()
+        try:
+            with override_settings(
+                STRIPE_API_BASE=server.url,
+                STRIPE_API_KEY=settings.STRIPE_API_KEY or "sk_test_fake",
+            ), patch("borrowings.views.send_telegram_message"), patch(
+                "payments.stripe_helpers.create_deferred_checkout_session"
+            ) as deferred_session:
+                stripe_gateway.reset()
+                self.run_benchmark(server.stripe, options)
+                self.stdout.write(
+                    "  deferred checkout sessions: "
+                    f"{deferred_session.delay.call_count}"
+                )
+        finally:
+            stripe_gateway.reset()
+            server.stop()
+            if not options["keep"]:
+                self.cleanup()
+
+    def run_benchmark(self, fake_stripe: FakeStripe, options: dict) -> None:
+        users, book = self.create_fixtures(options["borrowings"])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(
+                executor.map(lambda user: self.borrow(user, book), users)
+            )
+        elapsed = time.perf_counter() - started
+
+        created = sum(status_code == 201 for status_code, _ in results)
+        self.report(
+            "Borrowing creation",
+            [latency for _, latency in results],
+            elapsed,
+        )
+        self.stdout.write(f"  created: {created}/{len(results)}")
+
+        session_ids = list(
+            Payment.objects.filter(
+                borrowing__book=book, status=Payment.Status.PENDING
+            ).values_list("session_id", flat=True)
+        )
+        for session_id in session_ids[
+            :int(len(session_ids) * options["expire_ratio"])
+        ]:
+            fake_stripe.expire_session(session_id)
+
+        started = time.perf_counter()
+        check_expired_sessions()
+        elapsed = time.perf_counter() - started
+        expired = Payment.objects.filter(
+            borrowing__book=book, status=Payment.Status.EXPIRED
+        ).count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Expiry poller: {len(session_ids)} pending payments "
+                f"checked in {elapsed:.2f}s, {expired} expired"
+            )
+        )
+
+    def create_fixtures(self, count: int) -> tuple[list[User], Book]:
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(
+                email=f"user{number}@{BENCHMARK_EMAIL_DOMAIN}",
+                first_name="Benchmark",
+                last_name=f"User {number}",
+                password=password,
+            )
+            for number in range(count)
+        )
+        book = Book.objects.create(
+            title=f"Benchmark book {BENCHMARK_EMAIL_DOMAIN}",
+            author="Benchmark",
+            cover=Book.CoverType.SOFT,
+            inventory=count,
+            daily_fee=1,
+        )
+        return users, book
+
+    def borrow(self, user: User, book: Book) -> tuple[int, float]:
+        client = APIClient()
+        client.force_authenticate(user)
+        today = timezone.now().date()
+
+        started = time.perf_counter()
+        response = client.post(
+            reverse("borrowings:borrowings-list"),
+            {
+                "book": book.id,
+                "borrow_date": today,
+                "expected_return_date": today + timedelta(days=7),
+            },
+        )
+        return response.status_code, time.perf_counter() - started
+
+    def report(
+            self, name: str, latencies: list[float], elapsed: float
+    ) -> None:
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {len(latencies)} requests in {elapsed:.2f}s "
+                f"({len(latencies) / elapsed:.1f} req/s)"
+            )
+        )
+        self.stdout.write(
+            f"  p50: {percentiles[49] * 1000:.1f}ms, "
+            f"p95: {percentiles[94] * 1000:.1f}ms, "
+            f"p99: {percentiles[98] * 1000:.1f}ms"
+        )
+
+    def cleanup(self) -> None:
+        User.objects.filter(
+            email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}"
+        ).delete()
+        Book.objects.filter(
+            title=f"Benchmark book {BENCHMARK_EMAIL_DOMAIN}"
+        ).delete()
@@ -0,0 +1,115 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from books.models import Book
+
+DIRECT_ALIAS = "benchmark_direct"
+POOL_ALIAS = "benchmark_pool"
+
+
+class Command(BaseCommand):
+    """
+    Command to benchmark short-lived database connections, as used by
+    requests, with and without a connection pool.
+    """
+    help = (
+        "Read a page of books per simulated request, opening and closing "
+        "the connection around it like a request does, once with a new "
+        "PostgreSQL connection per request and once with a connection "
+        "pool, and report throughput, latency and connection setup time."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=settings.DATABASE_POOL["max_size"],
+        )
+
+    def handle(self, *args, **options) -> None:
+        default = connections["default"].settings_dict
+        if connections["default"].vendor != "postgresql":
+            raise CommandError("Connection pools need PostgreSQL")
+
+        direct_options = {
+            key: value
+            for key, value in default["OPTIONS"].items()
+            if key != "pool"
+        }
+        pool = {
+            **settings.DATABASE_POOL,
+            "min_size": min(
+                settings.DATABASE_POOL["min_size"], options["pool_size"]
+            ),
+            "max_size": options["pool_size"],
+        }
+        connections.settings[DIRECT_ALIAS] = {
+            **default,
+            "OPTIONS": direct_options,
+        }
+        connections.settings[POOL_ALIAS] = {
+            **default,
+            "OPTIONS": {**direct_options, "pool": pool},
+        }
+        try:
+            self.run_benchmark(
+                "New connection per request", DIRECT_ALIAS, options
+            )
+            self.run_benchmark("Pooled connections", POOL_ALIAS, options)
+            stats = connections[POOL_ALIAS].pool.get_stats()
+            self.stdout.write(
+                f"  connections opened by the pool: "
+                f"{stats.get('connections_num', 0)}, "
+                f"requests queued: {stats.get('requests_queued', 0)}"
+            )
+        finally:
+            connections[POOL_ALIAS].close_pool()
+            for alias in (DIRECT_ALIAS, POOL_ALIAS):
+                del connections.settings[alias]
+
+    def run_benchmark(self, name: str, alias: str, options: dict) -> None:
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+
+        def request(_) -> tuple[float, float]:
+            connection = connections[alias]
+            started = time.perf_counter()
+            connection.ensure_connection()
+            connected = time.perf_counter()
+            list(Book.objects.using(alias).order_by("id")[:page_size])
+            # Like at the end of a request: the connection is closed, or
+            # returned to the pool
+            connection.close()
+            finished = time.perf_counter()
+            return connected - started, finished - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(executor.map(request, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        self.report(name, [latency for _, latency in results], elapsed)
+        setup = statistics.mean(setup for setup, _ in results)
+        self.stdout.write(f"  connection setup: {setup * 1000:.2f}ms")
+
+    def report(
+            self, name: str, latencies: list[float], elapsed: float
+    ) -> None:
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {len(latencies)} requests in {elapsed:.2f}s "
+                f"({len(latencies) / elapsed:.1f} req/s)"
+            )
+        )
+        self.stdout.write(
+            f"  p50: {percentiles[49] * 1000:.1f}ms, "
+            f"p95: {percentiles[94] * 1000:.1f}ms, "
+            f"p99: {percentiles[98] * 1000:.1f}ms"
+        )
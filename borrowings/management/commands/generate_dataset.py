@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from borrowings.datasets import DATASET_PASSWORD, DatasetGenerator
+
+
+class Command(BaseCommand):
+    """
+    Command to generate a synthetic dataset for load and scale tests.
+    """
+    help = (
+        "Generate users, books, borrowings and their payments and fines "
+        "with realistic distributions. The same --seed and --end-date "
+        "generate the same dataset. Rows are added to the existing ones."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--books", type=int, default=10_000)
+        parser.add_argument("--borrowings", type=int, default=200_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--end-date",
+            type=date.fromisoformat,
+            default=None,
+            help="Last day of borrowings (YYYY-MM-DD), today by default.",
+        )
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=3,
+            help="Years of borrowings before the end date.",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.0,
+            help="Zipf exponent of book popularity and user activity.",
+        )
+        parser.add_argument("--batch-size", type=int, default=50_000)
+
+    def handle(self, *args, **options) -> None:
+        generator = DatasetGenerator(
+            seed=options["seed"],
+            end_date=options["end_date"],
+            years=options["years"],
+            skew=options["skew"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        )
+        counts = generator.generate(
+            users=options["users"],
+            books=options["books"],
+            borrowings=options["borrowings"],
+        )
+        generated = ", ".join(
+            f"{count} {name}" for name, count in counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {generated}. "
+                f"Users log in with the password {DATASET_PASSWORD}"
+            )
+        )
@@ -4,7 +4,9 @@ from celery import shared_task
 from django.utils import timezone
 
 from borrowings.models import Borrowing
-from notifications.tasks import send_telegram_message
+from library_service.task_metrics import count_task_event
+from notifications.reminders import send_due_reminders
+from notifications.tasks import BORROWING_OVERDUE, send_telegram_message
 
 
 @shared_task
@@ -19,6 +21,9 @@ def send_overdue_borrowings() -> None:
 
     For each overdue borrowing, a message is sent via
     the `send_telegram_message` function with details of the borrowing.
+    These messages are combined into a digest by the delivery worker.
+    Messages are identified by the borrowing and the day, so running
+    the task again on the same day does not send them twice.
     If there are no overdue borrowings, a message indicating
     this is sent instead.
 
@@ -36,6 +41,7 @@ def send_overdue_borrowings() -> None:
     )
     if overdue_borrowings.exists():
         for borrowing in overdue_borrowings:
+            count_task_event("overdue_borrowings")
             message = (
                 f"Overdue Borrowing (ID: {borrowing.id}):\n"
                 f"User: {borrowing.user}\n"
@@ -43,6 +49,23 @@ def send_overdue_borrowings() -> None:
                 f"Borrow Date: {borrowing.borrow_date}\n"
                 f"Expected Return Date: {borrowing.expected_return_date}\n"
             )
-            send_telegram_message(message)
+            send_telegram_message(
+                message,
+                BORROWING_OVERDUE,
+                event_id=f"borrowing_overdue:{borrowing.id}:{today}",
+            )
     else:
-        send_telegram_message("No borrowings overdue today!")
+        send_telegram_message(
+            "No borrowings overdue today!", event_id=f"no_overdue:{today}"
+        )
+
+
+@shared_task
+def send_borrowing_reminders() -> None:
+    """
+    Celery task to send borrowers the reminders which are due.
+
+    Only the time buckets up to now are read (see
+    `notifications.reminders`), so the task does not scan borrowings.
+    """
+    send_due_reminders()
@@ -90,7 +90,7 @@ class BorrowingViewSetTest(TestCase):
         self.assertEqual(response.data["id"], self.borrowing.id)
 
     @patch("borrowings.views.send_telegram_message")
-    @patch("borrowings.views.create_stripe_session")
+    @patch("borrowings.views.acreate_stripe_session")
     def test_create_borrowing(
             self,
             mock_create_stripe_session: MagicMock,
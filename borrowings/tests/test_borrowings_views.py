@@ -89,7 +89,7 @@ class BorrowingViewSetTest(TestCase):
         self.assertEqual(response.data, serializer.data)
 
     @patch("borrowings.views.send_telegram_message")
-    @patch("borrowings.views.create_stripe_session")
+    @patch("borrowings.views.acreate_stripe_session")
     def test_create_borrowing(
         self,
         mock_create_stripe_session: MagicMock,
@@ -162,7 +162,7 @@ class BorrowingViewSetReturnTest(TestCase):
         self.client.force_authenticate(user=self.user)
 
     @patch("borrowings.views.send_telegram_message")
-    @patch("borrowings.views.create_stripe_session")
+    @patch("borrowings.views.acreate_stripe_session")
     def test_return_borrowing(
         self,
         create_stripe_session: MagicMock,
@@ -229,7 +229,7 @@ class BorrowingViewSetCreateTest(TestCase):
         self.list_url = reverse("borrowings:borrowings-list")
 
     @patch("borrowings.views.send_telegram_message")
-    @patch("borrowings.views.create_stripe_session")
+    @patch("borrowings.views.acreate_stripe_session")
     def test_create_borrowing_sends_telegram_notification(
         self,
         create_stripe_session: MagicMock,
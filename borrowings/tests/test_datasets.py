@@ -0,0 +1,92 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+
+from books.models import Book
+from borrowings.datasets import DATASET_PASSWORD, DatasetGenerator
+from borrowings.models import Borrowing
+from payments.models import Payment
+
+User = get_user_model()
+
+END_DATE = date(2024, 10, 31)
+
+
+def generate(**options) -> dict:
+    return DatasetGenerator(
+        end_date=END_DATE, batch_size=100, **options
+    ).generate(users=50, books=30, borrowings=500)
+
+
+def clear() -> None:
+    for model in (Payment, Borrowing, Book, User):
+        model.objects.all().delete()
+
+
+def snapshot() -> dict:
+    return {
+        "users": list(User.objects.values_list("id", "email", "is_staff")),
+        "books": list(Book.objects.values_list()),
+        "borrowings": list(Borrowing.objects.values_list()),
+        "payments": list(Payment.objects.values_list()),
+    }
+
+
+class DatasetGeneratorTests(TestCase):
+    def setUp(self) -> None:
+        clear()
+
+    def test_rows_are_generated(self) -> None:
+        counts = generate()
+
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Book.objects.count(), 30)
+        self.assertEqual(Borrowing.objects.count(), 500)
+        self.assertEqual(Payment.objects.count(), counts["payments"])
+        self.assertTrue(
+            User.objects.first().check_password(DATASET_PASSWORD)
+        )
+
+    def test_payments_follow_borrowings(self) -> None:
+        generate()
+
+        self.assertEqual(
+            Payment.objects.filter(type=Payment.Type.PAYMENT).count(), 500
+        )
+        late = Borrowing.objects.filter(
+            actual_return_date__gt=F("expected_return_date")
+        )
+        self.assertTrue(late.exists())
+        self.assertEqual(
+            Payment.objects.filter(type=Payment.Type.FINE).count(),
+            late.count(),
+        )
+        self.assertFalse(
+            Borrowing.objects.filter(borrow_date__gt=END_DATE).exists()
+        )
+        self.assertFalse(
+            Borrowing.objects.filter(actual_return_date__gt=END_DATE).exists()
+        )
+        self.assertFalse(Payment.objects.filter(money_to_pay__lte=0).exists())
+
+    def test_same_seed_generates_same_dataset(self) -> None:
+        generate(seed=7)
+        first = snapshot()
+        clear()
+
+        generate(seed=7)
+
+        self.assertEqual(snapshot(), first)
+
+    def test_rows_are_added_after_existing_ones(self) -> None:
+        generate(seed=7)
+        generate(seed=8)
+
+        self.assertEqual(User.objects.count(), 100)
+        self.assertEqual(Borrowing.objects.count(), 1000)
+        # New rows get ids of their own
+        self.assertEqual(
+            Borrowing.objects.filter(book_id__gt=30).count(), 500
+        )
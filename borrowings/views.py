@@ -1,12 +1,12 @@
+from adrf.viewsets import GenericViewSet
+from asgiref.sync import sync_to_async
 from rest_framework.serializers import Serializer
-from rest_framework import status
+from rest_framework import mixins, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.serializers import ModelSerializer
-from rest_framework.viewsets import ModelViewSet
 from django.db.models import QuerySet
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
@@ -24,11 +24,18 @@ from borrowings.serializers import (
     BorrowingReturnSerializer,
 )
 from borrowings.filters import BorrowingFilter
-from notifications.tasks import send_telegram_message
-from payments.stripe_helpers import create_stripe_session
-
-
-class BorrowingViewSet(ModelViewSet):
+from notifications.tasks import BORROWING_CREATED, send_telegram_message
+from payments.stripe_helpers import acreate_stripe_session
+
+
+class BorrowingViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
     """
     ViewSet for managing book borrowings.
 
@@ -38,8 +45,13 @@ class BorrowingViewSet(ModelViewSet):
     Supports filtering by `is_active` and `user_id` parameters.
     """
 
+    # Creating and returning a borrowing call Stripe, so these actions
+    # are async and the worker serves other requests in the meantime.
+    # Other actions run in a thread
+
     permission_classes = [IsAdminOrIfAuthenticatedPostAndReadOnly]
     filterset_class = BorrowingFilter
+    throttle_scopes = {"create": "borrowing_create"}
 
     @extend_schema(
         summary="List borrowings",
@@ -82,9 +94,32 @@ class BorrowingViewSet(ModelViewSet):
         request=BorrowingSerializer,
         responses={201: BorrowingSerializer},
     )
-    def create(self, request: Request, *args, **kwargs):
-        """Create a new borrowing."""
-        return super().create(request, *args, **kwargs)
+    async def create(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Create a new borrowing for the authenticated user, open a Stripe
+        session for its payment and notify Telegram about it.
+        """
+        serializer = self.get_serializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        borrowing = await sync_to_async(serializer.save)(user=request.user)
+        await acreate_stripe_session(borrowing, request)
+        message = (
+            f"New borrowing created (ID: {borrowing.id}):\n"
+            f"User: {borrowing.user.email}\n"
+            f"Book: {borrowing.book.title}\n"
+            f"Due Date: {borrowing.expected_return_date}"
+        )
+        await sync_to_async(send_telegram_message)(
+            message,
+            BORROWING_CREATED,
+            event_id=f"borrowing_created:{borrowing.id}",
+        )
+        data = await sync_to_async(lambda: serializer.data)()
+        return Response(
+            data,
+            status=status.HTTP_201_CREATED,
+            headers=self.get_success_headers(data),
+        )
 
     def get_queryset(self) -> QuerySet:
         """
@@ -109,22 +144,6 @@ class BorrowingViewSet(ModelViewSet):
 
         return BorrowingSerializer
 
-    def perform_create(self, serializer: ModelSerializer) -> None:
-        """
-        Saves a new borrowing, setting the user to
-        the currently authenticated user.
-        Sends a notification to Telegram about the new borrowing.
-        """
-        borrowing = serializer.save(user=self.request.user)
-        message = (
-            f"New borrowing created (ID: {borrowing.id}):\n"
-            f"User: {borrowing.user.email}\n"
-            f"Book: {borrowing.book.title}\n"
-            f"Due Date: {borrowing.expected_return_date}"
-        )
-        create_stripe_session(borrowing, self.request)
-        send_telegram_message(message)
-
     @extend_schema(
         summary="Return borrowing",
         description="Mark a borrowing as returned. "
@@ -142,7 +161,9 @@ class BorrowingViewSet(ModelViewSet):
         },
     )
     @action(detail=True, methods=["POST"], permission_classes=[IsAdminUser])
-    def return_borrowing(self, request: Request, pk: str = None) -> Response:
+    async def return_borrowing(
+            self, request: Request, pk: str = None
+    ) -> Response:
         """
         Action to mark a borrowing as returned.
 
@@ -159,12 +180,12 @@ class BorrowingViewSet(ModelViewSet):
         5. Return a success response if the book was successfully returned.
         6. Return an error response if the book has already been returned.
         """
-        borrowing = self.get_object()
+        borrowing = await sync_to_async(self.get_object)()
         serializer = self.get_serializer(instance=borrowing, data=request.data)
-        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
         try:
-            serializer.return_borrowing()
-            create_stripe_session(borrowing, request)
+            await sync_to_async(serializer.return_borrowing)()
+            await acreate_stripe_session(borrowing, request)
             return Response({"message": "The book was successfully returned"})
         except ValidationError:
             return Response(
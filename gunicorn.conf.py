@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for serving the API over ASGI with uvicorn workers:
+
+    gunicorn -c gunicorn.conf.py library_service.asgi:application
+
+Every worker runs an event loop, so async views keep many Stripe calls
+in flight at once, while sync views run in threads of the worker.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# A worker per core: waiting on Stripe does not occupy a worker
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Slow clients and Stripe retries must fit in the timeout
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Restart workers now and then, so leaks can not grow unbounded
+max_requests = 10_000
+max_requests_jitter = 1000
+
+accesslog = "-"
+
+
+def child_exit(server, worker) -> None:
+    # Drop live gauges of the worker from the shared metrics directory
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,22 @@
+"""
+ASGI config for library_service project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_service.settings")
+
+application = get_asgi_application()
+
+# Serve the admin's static files in development, like runserver does
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
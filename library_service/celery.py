@@ -16,6 +16,9 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Export runtime, queue wait, retries and failures of tasks
+import library_service.task_metrics  # noqa: E402,F401
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
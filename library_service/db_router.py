@@ -0,0 +1,219 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import HttpRequest, HttpResponse
+from django.utils.functional import SimpleLazyObject, empty
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Lag of a replica in seconds. It is 0 while the replica has replayed
+# everything it received, so an idle primary does not look like lag
+REPLICATION_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+        THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+REPLICATION_LAG = Gauge(
+    "db_replication_lag_seconds",
+    "Replication lag of the read replicas at their last check.",
+    ["database"],
+)
+
+read_routing: ContextVar["ReadRouting | None"] = ContextVar(
+    "read_routing", default=None
+)
+
+# Alias: (monotonic time of the last check, whether the replica is used)
+replica_status: dict[str, tuple[float, bool]] = {}
+
+
+def get_sticky_key(user_id: int) -> str:
+    return f"db:primary:{user_id}"
+
+
+def get_replication_lag(alias: str) -> float:
+    """Return the replication lag of the database in seconds."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(REPLICATION_LAG_QUERY)
+        (lag,) = cursor.fetchone()
+    # Nothing was replayed yet
+    return float("inf") if lag is None else float(lag)
+
+
+def is_replica_available(alias: str) -> bool:
+    """
+    Return whether the replica is reachable and close enough to the
+    primary. The answer is reused for "LAG_CHECK_SECONDS".
+    """
+    options = settings.DATABASE_REPLICATION
+    now = time.monotonic()
+    checked_at, available = replica_status.get(alias, (-float("inf"), False))
+    if now - checked_at < options["LAG_CHECK_SECONDS"]:
+        return available
+
+    try:
+        lag = get_replication_lag(alias)
+    except DatabaseError as error:
+        logger.warning(f"Replica {alias} is unavailable: {error}")
+        available = False
+    else:
+        REPLICATION_LAG.labels(alias).set(lag)
+        available = lag <= options["MAX_LAG_SECONDS"]
+        if not available:
+            logger.warning(f"Replica {alias} lags by {lag:.1f}s")
+    replica_status[alias] = (now, available)
+    return available
+
+
+def get_request_user(request: HttpRequest):
+    """
+    Return the user of the request, or None while it is not known yet.
+
+    DRF replaces `request.user` once it authenticated the request. The
+    lazy user of `AuthenticationMiddleware` is not loaded here, as that
+    would query the database while a query is being routed.
+    """
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject):
+        if user._wrapped is empty:
+            return None
+        return user._wrapped
+    return user
+
+
+class ReadRouting:
+    """Where the reads of a request go."""
+
+    def __init__(self, request: HttpRequest) -> None:
+        self.request = request
+        self.use_replicas = request.method in SAFE_METHODS
+        self.wrote = False
+        self.database = None
+
+    def get_database(self) -> str | None:
+        if not self.use_replicas or self.wrote:
+            return None
+        if self.database is None:
+            user = get_request_user(self.request)
+            if user is None:
+                return None
+            self.database = self.choose_database(user)
+        return self.database
+
+    def choose_database(self, user) -> str:
+        if user.is_authenticated and cache.get(get_sticky_key(user.pk)):
+            return DEFAULT_DB_ALIAS
+        replicas = [
+            alias
+            for alias in settings.DATABASE_REPLICATION["REPLICAS"]
+            if is_replica_available(alias)
+        ]
+        # All reads of a request go to the same database, so e.g. the
+        # count and the page of a list agree
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def get_sticky_user_id(self) -> int | None:
+        """Return the user whose reads stay on the primary for a while."""
+        if not self.wrote:
+            return None
+        user = get_request_user(self.request)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
+
+
+class ReadRoutingMiddleware:
+    """
+    Route the reads of safe-method requests to the read replicas.
+
+    After a request of a user wrote to the primary, reads of the user
+    stay on the primary for "STICKY_SECONDS", so the user sees their
+    own writes while the replicas catch up.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = ReadRouting(request)
+        token = read_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_routing.reset(token)
+        if user_id := routing.get_sticky_user_id():
+            cache.set(
+                get_sticky_key(user_id),
+                True,
+                settings.DATABASE_REPLICATION["STICKY_SECONDS"],
+            )
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        routing = ReadRouting(request)
+        token = read_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_routing.reset(token)
+        if user_id := routing.get_sticky_user_id():
+            await cache.aset(
+                get_sticky_key(user_id),
+                True,
+                settings.DATABASE_REPLICATION["STICKY_SECONDS"],
+            )
+        return response
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to the database chosen by `ReadRoutingMiddleware`.
+
+    Writes, reads of a request after it wrote (including
+    `select_for_update`) and reads outside of requests, e.g. in Celery
+    tasks, go to the primary.
+    """
+
+    def db_for_read(self, model, **hints) -> str | None:
+        routing = read_routing.get()
+        if routing is None:
+            return None
+        return routing.get_database()
+
+    def db_for_write(self, model, **hints) -> str | None:
+        routing = read_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool | None:
+        databases = {
+            DEFAULT_DB_ALIAS,
+            *settings.DATABASE_REPLICATION["REPLICAS"],
+        }
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,194 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import Histogram
+
+from library_service.db_router import get_request_user
+
+# Services whose calls are timed with `track`
+SERVICES = ("stripe", "telegram")
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of sampled requests by view.",
+    ["view"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries of sampled requests by view.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time sampled requests spent in database queries by view.",
+    ["view"],
+)
+REQUEST_SERVICE_DURATION = Histogram(
+    "http_request_service_duration_seconds",
+    "Time sampled requests spent calling other services by view.",
+    ["view", "service"],
+)
+
+request_timings: ContextVar["RequestTimings | None"] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """
+    Time spent by a request or a task, in total and in its parts, and
+    the calls it made to other services.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.db_queries = 0
+        self.db_duration = 0.0
+        self.services = dict.fromkeys(SERVICES, 0.0)
+        self.calls = dict.fromkeys(SERVICES, 0)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def get_server_timing(self) -> str:
+        metrics = [
+            f'db;dur={self.db_duration * 1000:.1f};'
+            f'desc="{self.db_queries} queries"',
+            *(
+                f"{service};dur={duration * 1000:.1f}"
+                for service, duration in self.services.items()
+                if duration
+            ),
+            f"total;dur={self.duration * 1000:.1f}",
+        ]
+        return ", ".join(metrics)
+
+
+@contextmanager
+def track(service: str):
+    """Add the call in the block to `service` of the request."""
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.services[service] += time.perf_counter() - started
+        timings.calls[service] += 1
+
+
+def time_query(execute, sql, params, many, context):
+    timings = request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_queries += 1
+        timings.db_duration += time.perf_counter() - started
+
+
+def install_query_timer(connection, **kwargs) -> None:
+    # Connections are per thread, and ASGI runs the ORM in threads, so the
+    # timer is installed on every connection rather than per request
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+def get_view_name(request: HttpRequest) -> str:
+    """
+    Return the view of the request as `<view class>.<action>`, e.g.
+    `BorrowingViewSet.create`, or the URL name of other views.
+    """
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None:
+        return match.view_name
+    method = request.method.lower()
+    actions = getattr(match.func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+class RequestMetricsMiddleware:
+    """
+    Time a sample of requests and export the timings by view.
+
+    A "SAMPLE_RATE" share of requests is timed. Staff get the timings
+    of their sampled requests in the `Server-Timing` header. Requests
+    which are not sampled only cost a random number.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was loaded
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        self.record(request, response, timings)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not self.is_sampled():
+            return await self.get_response(request)
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        self.record(request, response, timings)
+        return response
+
+    def is_sampled(self) -> bool:
+        return settings.REQUEST_METRICS["SAMPLE_RATE"] > random.random()
+
+    def record(
+            self,
+            request: HttpRequest,
+            response: HttpResponse,
+            timings: RequestTimings,
+    ) -> None:
+        timings.finish()
+        view = get_view_name(request)
+        REQUEST_DURATION.labels(view).observe(timings.duration)
+        REQUEST_DB_QUERIES.labels(view).observe(timings.db_queries)
+        REQUEST_DB_DURATION.labels(view).observe(timings.db_duration)
+        for service, duration in timings.services.items():
+            REQUEST_SERVICE_DURATION.labels(view, service).observe(duration)
+
+        user = get_request_user(request)
+        if user is not None and user.is_staff:
+            response["Server-Timing"] = timings.get_server_timing()
@@ -0,0 +1,222 @@
+import glob
+import hmac
+import logging
+import os
+from functools import cache
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from redis import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+def get_connection_pools() -> dict:
+    """Return the connection pools of the databases which use one."""
+    return {
+        alias: connections[alias].pool
+        for alias in connections
+        if connections[alias].settings_dict["OPTIONS"].get("pool")
+    }
+
+
+class DatabasePoolCollector:
+    """
+    Export the statistics of the PostgreSQL connection pools.
+
+    Statistics are read from the pools on every scrape. Average wait for
+    a connection is `rate(db_pool_wait_seconds_total)` divided by
+    `rate(db_pool_checkouts_total)`, saturation is the share of
+    `db_pool_max_size` in use.
+    """
+
+    GAUGES = {
+        "size": ("pool_size", "Connections open in the pool."),
+        "available": ("pool_available", "Idle connections in the pool."),
+        "max_size": ("pool_max", "Maximum connections of the pool."),
+        "waiting": (
+            "requests_waiting",
+            "Requests waiting for a connection right now.",
+        ),
+    }
+    COUNTERS = {
+        "checkouts": ("requests_num", "Connections requested from the pool."),
+        "queued": (
+            "requests_queued",
+            "Requests which had to wait for a connection.",
+        ),
+        "timeouts": (
+            "requests_errors",
+            "Requests which timed out waiting for a connection.",
+        ),
+        "connections": ("connections_num", "Connections opened by the pool."),
+        "connection_errors": (
+            "connections_errors",
+            "Failed attempts to open a connection.",
+        ),
+        "bad_returns": (
+            "returns_bad",
+            "Connections returned to the pool in a bad state.",
+        ),
+    }
+    # Reported by the pool in milliseconds
+    DURATIONS = {
+        "wait": ("requests_wait_ms", "Time spent waiting for a connection."),
+        "connection": ("connections_ms", "Time spent opening connections."),
+        "usage": ("usage_ms", "Time connections were used by requests."),
+    }
+
+    def __init__(self, get_pools=get_connection_pools) -> None:
+        self.get_pools = get_pools
+
+    def collect(self):
+        metrics = {
+            **{
+                name: GaugeMetricFamily(
+                    f"db_pool_{name}", description, labels=["database"]
+                )
+                for name, (_, description) in self.GAUGES.items()
+            },
+            **{
+                name: CounterMetricFamily(
+                    f"db_pool_{name}", description, labels=["database"]
+                )
+                for name, (_, description) in self.COUNTERS.items()
+            },
+            **{
+                name: CounterMetricFamily(
+                    f"db_pool_{name}_seconds",
+                    description,
+                    labels=["database"],
+                )
+                for name, (_, description) in self.DURATIONS.items()
+            },
+        }
+        for alias, pool in self.get_pools().items():
+            stats = pool.get_stats()
+            for name, (key, _) in {**self.GAUGES, **self.COUNTERS}.items():
+                metrics[name].add_metric([alias], stats.get(key, 0))
+            for name, (key, _) in self.DURATIONS.items():
+                metrics[name].add_metric([alias], stats.get(key, 0) / 1000)
+        yield from metrics.values()
+
+
+@cache
+def get_broker() -> Redis:
+    timeout = settings.CELERY_METRICS["TIMEOUT"]
+    return Redis.from_url(
+        settings.CELERY_BROKER_URL,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout,
+    )
+
+
+class CeleryQueueCollector:
+    """
+    Export the number of tasks waiting in the Celery queues of the Redis
+    broker. Nothing is exported while the broker is unavailable.
+    """
+
+    def __init__(self, get_redis=get_broker) -> None:
+        self.get_redis = get_redis
+
+    def collect(self):
+        metric = GaugeMetricFamily(
+            "celery_queue_length",
+            "Tasks waiting in the Celery queue.",
+            labels=["queue"],
+        )
+        queues = settings.CELERY_METRICS["QUEUES"]
+        if queues:
+            try:
+                with self.get_redis().pipeline() as pipeline:
+                    for queue in queues:
+                        pipeline.llen(queue)
+                    lengths = pipeline.execute()
+            except RedisError as error:
+                logger.warning(f"Could not read Celery queues: {error}")
+            else:
+                for queue, length in zip(queues, lengths):
+                    metric.add_metric([queue], length)
+        yield metric
+
+
+class MultiDirectoryCollector:
+    """
+    Combine the metrics written by the processes of several multiprocess
+    directories. Every service writes to a directory of its own, since
+    process ids of different containers collide.
+    """
+
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = paths
+
+    def collect(self):
+        files = [
+            file
+            for path in self.paths
+            for file in sorted(glob.glob(os.path.join(path, "*.db")))
+        ]
+        return multiprocess.MultiProcessCollector.merge(files)
+
+
+collectors = [DatabasePoolCollector(), CeleryQueueCollector()]
+for collector in collectors:
+    REGISTRY.register(collector)
+
+
+def get_registry() -> CollectorRegistry:
+    """
+    Return the registry of the metrics to expose.
+
+    With `PROMETHEUS_MULTIPROC_DIR` set, metrics of all processes
+    writing to the directory, i.e. every web worker, are combined with
+    those of `METRICS["MULTIPROC_DIRS"]`, e.g. of the Celery workers.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    registry.register(
+        MultiDirectoryCollector(
+            [
+                os.environ["PROMETHEUS_MULTIPROC_DIR"],
+                *settings.METRICS["MULTIPROC_DIRS"],
+            ]
+        )
+    )
+    for collector in collectors:
+        registry.register(collector)
+    return registry
+
+
+def has_metrics_access(request: HttpRequest) -> bool:
+    """Return whether the request is of staff or has the metrics token."""
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS["TOKEN"]
+    return bool(token) and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Expose the collected metrics in the Prometheus text format to staff
+    and to scrapers with the metrics token.
+    """
+    if not has_metrics_access(request):
+        raise PermissionDenied
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
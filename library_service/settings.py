@@ -63,14 +63,17 @@ INSTALLED_APPS = [
     "books",
     "borrowings",
     "payments",
+    "notifications",
 ]
 
 MIDDLEWARE = [
+    "library_service.instrumentation.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "library_service.db_router.ReadRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -94,6 +97,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "library_service.wsgi.application"
+ASGI_APPLICATION = "library_service.asgi.application"
 
 # Set True and configure if you want to use your custom database
 USE_CUSTOM_DB = False
@@ -108,7 +112,22 @@ CUSTOM_DB = {
     }
 }
 
+# PostgreSQL connections are kept in a pool of "min_size" to "max_size"
+# connections per process. Requests wait up to "timeout" seconds for a
+# free connection. Connections are checked before they are handed out,
+# closed after "max_idle" idle seconds and replaced after
+# "max_lifetime" seconds. Pool metrics are exported at /metrics/
+DATABASE_POOL = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+    "timeout": 10,
+    "max_idle": 5 * 60,
+    "max_lifetime": 60 * 60,
+}
+
 if USE_DOCKER:
+    from psycopg_pool import ConnectionPool
+
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.postgresql",
@@ -117,8 +136,24 @@ if USE_DOCKER:
             "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
             "HOST": os.environ.get("POSTGRES_HOST"),
             "PORT": os.environ.get("POSTGRES_PORT"),
+            "OPTIONS": {
+                "pool": {
+                    **DATABASE_POOL,
+                    "check": ConnectionPool.check_connection,
+                },
+            },
         }
     }
+    # Streaming replicas of the primary, e.g. "replica-1,replica-2"
+    for number, host in enumerate(
+        filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")),
+        start=1,
+    ):
+        DATABASES[f"replica_{number}"] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
 else:
     if USE_CUSTOM_DB:
         DATABASES = {**CUSTOM_DB}
@@ -130,6 +165,33 @@ else:
             }
         }
 
+# Reads of safe-method requests (GET, HEAD, OPTIONS) go to a random one
+# of "REPLICAS" whose replication lag is at most "MAX_LAG_SECONDS", and
+# to the primary if there is none. Lag is checked every
+# "LAG_CHECK_SECONDS" per process. After a request of a user wrote,
+# reads of the user stay on the primary for "STICKY_SECONDS", which
+# should be longer than "MAX_LAG_SECONDS"
+DATABASE_REPLICATION = {
+    "REPLICAS": [alias for alias in DATABASES if alias.startswith("replica_")],
+    "STICKY_SECONDS": 5,
+    "MAX_LAG_SECONDS": 2,
+    "LAG_CHECK_SECONDS": 1,
+}
+
+DATABASE_ROUTERS = ["library_service.db_router.PrimaryReplicaRouter"]
+
+
+# Cache
+# Shared Redis cache in Docker, per-process memory cache locally
+
+if USE_DOCKER:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://redis:6379/1",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -149,6 +211,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Passwords are hashed with Argon2id at the cost of the profile named
+# by the PASSWORD_HASHING_PROFILE environment variable (memory cost in
+# KiB, see `users.hashers.ProfileArgon2PasswordHasher`). The "fast"
+# profile is meant for tests (see `library_service.test_settings`) and
+# fixtures only. Hashes made at another cost or by an older hasher are
+# upgraded when their user logs in
+PASSWORD_HASHING_PROFILES = {
+    "default": {"time_cost": 2, "memory_cost": 19 * 1024, "parallelism": 1},
+    "fast": {"time_cost": 1, "memory_cost": 8, "parallelism": 1},
+}
+PASSWORD_HASHING_PROFILE = os.getenv("PASSWORD_HASHING_PROFILE", "default")
+
+PASSWORD_HASHERS = [
+    "users.hashers.ProfileArgon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -177,8 +258,46 @@ if USE_DOCKER:
 else:
     MEDIA_ROOT = BASE_DIR / "media"
 
+# Files only staff may download, e.g. reports with activation links.
+# Unlike MEDIA_ROOT, nothing in here is served by URL
+if USE_DOCKER:
+    PRIVATE_ROOT = "/files/private"
+else:
+    PRIVATE_ROOT = BASE_DIR / "private"
+
+# Staff payment reports are cached for this many seconds
+# and invalidated whenever a payment changes
+PAYMENT_REPORT_CACHE_TIMEOUT = 15 * 60
+
+# Reconciliation of local payments with Stripe: size of a reconciled
+# window, delay before new sessions are checked, size of DB batches and
+# how far back the first run looks. Drift reports are kept in PRIVATE_ROOT
+PAYMENT_RECONCILIATION = {
+    "REPORT_DIR": os.path.join(PRIVATE_ROOT, "reconciliation"),
+    "WINDOW_MINUTES": 60,
+    "SETTLE_MINUTES": 10,
+    "BATCH_SIZE": 500,
+    "INITIAL_LOOKBACK_DAYS": 30,
+}
+
 AUTH_USER_MODEL = "users.User"
 
+# Users are imported from CSV files (`import_users` command or the
+# admin) in batches of "BATCH_SIZE" rows with passwords hashed by
+# "HASH_WORKERS" threads. Users without a password get a link to
+# "ACTIVATION_URL" in the report of the import, valid for
+# PASSWORD_RESET_TIMEOUT seconds. Reports and uploaded files are kept
+# in PRIVATE_ROOT; staff download reports from the admin
+USER_IMPORT = {
+    "REPORT_DIR": os.path.join(PRIVATE_ROOT, "user_imports"),
+    "BATCH_SIZE": 1000,
+    "HASH_WORKERS": os.cpu_count(),
+    "ACTIVATION_URL": os.getenv(
+        "USER_ACTIVATION_URL", "http://localhost:8000/api/users/activate/"
+    ),
+}
+PASSWORD_RESET_TIMEOUT = 14 * 24 * 60 * 60
+
 REST_FRAMEWORK = {
     # PAGINATION
     "DEFAULT_PAGINATION_CLASS":
@@ -190,24 +309,56 @@ REST_FRAMEWORK = {
     ],
     # JWT
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ],
     # SPECTACULAR
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     # THROTTLING
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "library_service.throttling.AnonThrottle",
+        "library_service.throttling.UserThrottle",
+        "library_service.throttling.ScopedThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "50/day", "user": "250/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "50/day",
+        "user": "250/day",
+        "catalog": "120/min",
+        "borrowing_create": "10/hour",
+    },
+}
+
+# API rates are checked against sliding windows in Redis shared by all
+# workers (see `library_service.throttling`). Calls to Redis time out
+# after "TIMEOUT" seconds; after a failure every process throttles
+# requests on its own for "FALLBACK_SECONDS"
+THROTTLING = {
+    "REDIS_URL": "redis://redis:6379/3" if USE_DOCKER else None,
+    "TIMEOUT": 0.1,
+    "FALLBACK_SECONDS": 5,
+}
+
+# A "SAMPLE_RATE" share of requests is timed: in total, in database
+# queries and in calls to Stripe and Telegram. Timings are exported at
+# /metrics/ by view and sent to staff in a Server-Timing header.
+# 1 times every request, e.g. to profile locally, 0 turns it off
+REQUEST_METRICS = {
+    "SAMPLE_RATE": float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", 0.05)),
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=2),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER":
+        "users.serializers.UserTokenObtainPairSerializer",
 }
 
+# Requests with a token carrying the cached version of its user are
+# authenticated without loading the user (see
+# `users.authentication.ClaimsJWTAuthentication`); versions are cached
+# for "USER_VERSION_CACHE_TIMEOUT" seconds or until the user is saved
+USER_VERSION_CACHE_TIMEOUT = 5 * 60
+
 # Spectacular settings
 
 SPECTACULAR_SETTINGS = {
@@ -231,7 +382,135 @@ SPECTACULAR_SETTINGS = {
 # Telegram Notifications Service
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Point it to a local fake Bot API server for load tests and benchmarks
+TELEGRAM_API_BASE = os.getenv(
+    "TELEGRAM_API_BASE", "https://api.telegram.org"
+)
+
+# Bot updates: long polling timeout (seconds), updates of different
+# chats handled at once and updates waiting to be handled before
+# polling pauses. Login conversations are kept in a session store:
+# `MemorySessionStore` for a single bot process or `RedisSessionStore`
+# (with a "url" option) shared by several, expiring after "ttl" seconds.
+# When "WEBHOOK_URL" and "WEBHOOK_SECRET" are set, Telegram pushes
+# updates to the bot's webhook server instead (long polling is the
+# fallback, also without a secret). Passwords are
+# checked by "AUTH_WORKERS" threads, and failed logins are throttled
+# (see `notifications.login_throttle`), in Redis with the Redis session
+# store and in memory otherwise. Admin commands
+# answer from snapshots kept in the cache for "SNAPSHOT_TIMEOUT" seconds
+# (refreshed every minute by Celery) of at most "SNAPSHOT_MAX_ROWS" rows,
+# shown "PAGE_SIZE" rows per page. Book searches are cached per query
+# for as long as snapshots
+TELEGRAM_BOT = {
+    "WEBHOOK_URL": os.getenv("TELEGRAM_WEBHOOK_URL"),
+    "WEBHOOK_SECRET": os.getenv("TELEGRAM_WEBHOOK_SECRET"),
+    "WEBHOOK_HOST": "0.0.0.0",
+    "WEBHOOK_PORT": 8443,
+    "POLL_TIMEOUT": 30,
+    "CONCURRENCY": 32,
+    "MAX_PENDING_UPDATES": 1000,
+    "SESSIONS": {
+        "BACKEND": "notifications.sessions.MemorySessionStore",
+        "OPTIONS": {
+            "ttl": 15 * 60,
+            "max_size": 10_000,
+        },
+    },
+    "AUTH_WORKERS": 2,
+    "LOGIN_THROTTLE": {
+        "free_attempts": 3,
+        "backoff": 30,
+        "max_backoff": 60 * 60,
+        "global_limit": 30,
+        "global_window": 60,
+    },
+    "SNAPSHOT_TIMEOUT": 10 * 60,
+    "SNAPSHOT_MAX_ROWS": 5000,
+    "PAGE_SIZE": 10,
+}
+
+# Borrowers who linked the bot are reminded of due dates "DAYS" days
+# after the expected return date (negative: before it) at "AT" local
+# time. Reminders are kept in time buckets of "BUCKET_SECONDS" and sent
+# by a Celery task running as often, "BATCH_SIZE" at a time
+BORROWING_REMINDERS = {
+    "DAYS": [-2, 0, 1],
+    "AT": "10:00",
+    "BUCKET_SECONDS": 15 * 60,
+    "BATCH_SIZE": 500,
+}
+
+# Notifications are queued in Redis and sent by the delivery worker
+# (`notifications/run_delivery_worker.py`) within Telegram rate limits:
+# messages per second for the bot and for a single chat. Admin chat ids
+# are cached for "ADMIN_CHATS_TTL" seconds or until an admin changes
+TELEGRAM_DELIVERY = {
+    "REDIS_URL": "redis://redis:6379/2",
+    "QUEUE_KEY": "notifications:telegram",
+    "CONCURRENCY": 30,
+    "GLOBAL_RATE": 30,
+    "CHAT_RATE": 1,
+    "MAX_ATTEMPTS": 5,
+    "MAX_BACKOFF": 30,
+    "METRICS_PORT": 9101,
+    "ADMIN_CHATS_TTL": 60,
+    "ADMIN_CHATS_CHANNEL": "notifications:admin-chats",
+    # Outcomes of deliveries are written to the ledger in batches of
+    # "BATCH_SIZE" at least every "FLUSH_INTERVAL" seconds and kept for
+    # "RETENTION_DAYS" (deleted "PURGE_BATCH_SIZE" rows at a time)
+    "LEDGER": {
+        "BATCH_SIZE": 200,
+        "FLUSH_INTERVAL": 1,
+        "RETENTION_DAYS": 30,
+        "PURGE_BATCH_SIZE": 5000,
+    },
+    # How messages of each event type are sent: "immediate", "batched"
+    # into a digest "window" seconds after the first message or "daily"
+    # at "HH:MM"; a digest is sent early when it reaches "max_size"
+    "POLICIES": {
+        "default": {"mode": "immediate"},
+        "borrowing_created": {
+            "mode": "batched",
+            "window": 5 * 60,
+            "max_size": 20,
+            "title": "New borrowings",
+        },
+        "payment_paid": {
+            "mode": "batched",
+            "window": 5 * 60,
+            "max_size": 20,
+            "title": "Successful payments",
+        },
+        "borrowing_overdue": {
+            "mode": "batched",
+            "window": 60,
+            "max_size": 30,
+            "title": "Overdue borrowings",
+        },
+    },
+}
+
 STRIPE_API_KEY = os.getenv("STRIPE_API_KEY")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# Point it to a local fake Stripe server (see `run_fake_stripe` command)
+# for load tests and benchmarks
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+
+# Stripe client: connection pool, timeouts (seconds), retries
+# of safe calls and circuit breaker thresholds
+STRIPE_CLIENT = {
+    "POOL_MAXSIZE": 10,
+    "CONNECT_TIMEOUT": 3,
+    "READ_TIMEOUT": 10,
+    "MAX_RETRIES": 2,
+    "RETRY_BACKOFF": 0.25,
+    "MAX_BACKOFF": 2,
+    "FAILURE_RATE_THRESHOLD": 0.5,
+    "MINIMUM_CALLS": 10,
+    "WINDOW_SECONDS": 30,
+    "RESET_TIMEOUT": 30,
+}
 
 
 # Celery Configuration Options
@@ -246,6 +525,26 @@ CELERY_TASK_TRACK_STARTED = True
 
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+# Queues whose length is exported at /metrics/, read from the broker
+# with a timeout of "TIMEOUT" seconds. Metrics of tasks are exported
+# there too when the Celery workers write them to one of
+# `METRICS["MULTIPROC_DIRS"]`
+CELERY_METRICS = {
+    "QUEUES": ["celery"] if USE_DOCKER else [],
+    "TIMEOUT": 0.5,
+}
+
+# /metrics/ is served to staff and to scrapers sending "TOKEN" as a
+# bearer token. Metrics of the web workers are combined with those
+# other services write to their own `PROMETHEUS_MULTIPROC_DIR`, listed
+# in "MULTIPROC_DIRS", e.g. of the Celery workers
+METRICS = {
+    "TOKEN": os.getenv("METRICS_TOKEN"),
+    "MULTIPROC_DIRS": list(
+        filter(None, os.getenv("METRICS_MULTIPROC_DIRS", "").split(","))
+    ),
+}
+
 # additional path to find fixtures for tests
 
 FIXTURE_DIRS = [
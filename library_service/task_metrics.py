@@ -0,0 +1,139 @@
+import os
+import time
+from datetime import datetime
+
+from celery import current_task
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_process_shutdown,
+)
+from prometheus_client import Counter, Histogram, multiprocess
+
+from library_service.instrumentation import (
+    SERVICES,
+    RequestTimings,
+    request_timings,
+)
+
+# Header stamped on tasks when they are sent
+PUBLISHED_AT = "published_at"
+
+TASK_RUNTIME = Histogram(
+    "celery_task_runtime_seconds",
+    "Runtime of Celery tasks by task and final state.",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800),
+)
+TASK_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time from sending a task, or its ETA, to its start by queue.",
+    ["task", "queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800),
+)
+TASK_RETRIES = Counter(
+    "celery_task_retries_total",
+    "Retries of Celery tasks.",
+    ["task"],
+)
+TASK_FAILURES = Counter(
+    "celery_task_failures_total",
+    "Failed Celery tasks by exception.",
+    ["task", "exception"],
+)
+TASK_DB_QUERIES = Histogram(
+    "celery_task_db_queries",
+    "Database queries of a run of a Celery task.",
+    ["task"],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000),
+)
+TASK_SERVICE_CALLS = Histogram(
+    "celery_task_service_calls",
+    "Calls to other services of a run of a Celery task.",
+    ["task", "service"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+)
+TASK_EVENTS = Counter(
+    "celery_task_events_total",
+    "Events counted by Celery tasks, e.g. notified borrowings.",
+    ["task", "event"],
+)
+
+# Task id: (timings of the run, token to reset `request_timings`)
+runs: dict[str, tuple[RequestTimings, object]] = {}
+
+
+def count_task_event(event: str, amount: int = 1) -> None:
+    """Count an event of the running task."""
+    task = current_task
+    TASK_EVENTS.labels(task.name if task else "", event).inc(amount)
+
+
+def get_queue_wait(request) -> float | None:
+    """
+    Return how long the task waited in its queue, or None if it was
+    sent without a timestamp. Clocks of the sending and the working
+    host are assumed to agree.
+    """
+    published_at = getattr(request, PUBLISHED_AT, None)
+    if published_at is None:
+        return None
+    if request.eta:
+        eta = request.eta
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        published_at = max(published_at, eta.timestamp())
+    return max(time.time() - published_at, 0.0)
+
+
+@before_task_publish.connect
+def stamp_published_at(headers: dict = None, **kwargs) -> None:
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT, time.time())
+
+
+@task_prerun.connect
+def start_run(task_id: str = None, task=None, **kwargs) -> None:
+    timings = RequestTimings()
+    runs[task_id] = (timings, request_timings.set(timings))
+    queue_wait = get_queue_wait(task.request)
+    if queue_wait is not None:
+        queue = (task.request.delivery_info or {}).get("routing_key", "")
+        TASK_QUEUE_WAIT.labels(task.name, queue).observe(queue_wait)
+
+
+@task_postrun.connect
+def finish_run(
+        task_id: str = None, task=None, state: str = None, **kwargs
+) -> None:
+    run = runs.pop(task_id, None)
+    if run is None:
+        return
+    timings, token = run
+    request_timings.reset(token)
+    timings.finish()
+    TASK_RUNTIME.labels(task.name, state or "").observe(timings.duration)
+    TASK_DB_QUERIES.labels(task.name).observe(timings.db_queries)
+    for service in SERVICES:
+        TASK_SERVICE_CALLS.labels(task.name, service).observe(
+            timings.calls[service]
+        )
+
+
+@task_retry.connect
+def count_retry(sender=None, **kwargs) -> None:
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+@task_failure.connect
+def count_failure(sender=None, exception=None, **kwargs) -> None:
+    TASK_FAILURES.labels(sender.name, type(exception).__name__).inc()
+
+
+@worker_process_shutdown.connect
+def mark_process_dead(**kwargs) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
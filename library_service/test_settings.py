@@ -0,0 +1,22 @@
+"""
+Django settings for running the tests of library_service:
+
+    python manage.py test --settings=library_service.test_settings
+"""
+
+from library_service.settings import *  # noqa: F401, F403
+from library_service.settings import BASE_DIR, DATABASES
+
+# Tests read from a second, separate database in place of a replica, so
+# they can tell which database a query went to
+DATABASES = {
+    **DATABASES,
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db_replica.sqlite3",
+    },
+}
+
+# Hashing at the production cost would slow down every test creating a
+# user
+PASSWORD_HASHING_PROFILE = "fast"
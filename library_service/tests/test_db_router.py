@@ -0,0 +1,155 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+from borrowings.models import Borrowing
+from library_service.db_router import PrimaryReplicaRouter, replica_status
+
+User = get_user_model()
+
+BOOKS_URL = reverse("books:book-list")
+BORROWINGS_URL = reverse("borrowings:borrowings-list")
+
+REPLICATION = {
+    "REPLICAS": ["replica"],
+    "STICKY_SECONDS": 5,
+    "MAX_LAG_SECONDS": 2,
+    "LAG_CHECK_SECONDS": 60,
+}
+
+
+def create_book(database: str, title: str) -> Book:
+    return Book.objects.using(database).create(
+        title=title,
+        author="Author",
+        cover="HARD",
+        inventory=10,
+        daily_fee=1.00,
+    )
+
+
+def get_titles(response) -> list[str]:
+    return [book["title"] for book in response.data["results"]]
+
+
+@override_settings(DATABASE_REPLICATION=REPLICATION)
+class ReadRoutingTests(TestCase):
+    """
+    The "replica" database is not replicated from "default", so the
+    rows a response shows tell which database it read from.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        cache.clear()
+        replica_status.clear()
+        self.client = APIClient()
+        create_book("default", "Primary Book")
+        create_book("replica", "Replica Book")
+
+    def test_anonymous_reads_go_to_replica(self) -> None:
+        response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_titles(response), ["Replica Book"])
+
+    def test_writes_go_to_primary(self) -> None:
+        admin = User.objects.create_superuser(
+            email="admin@example.com",
+            password="1qazcde3",
+            first_name="Admin",
+            last_name="Admin",
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.post(
+            BOOKS_URL,
+            {
+                "title": "New Book",
+                "author": "Author",
+                "cover": "SOFT",
+                "inventory": 1,
+                "daily_fee": "1.00",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Book.objects.filter(title="New Book").exists())
+        self.assertFalse(
+            Book.objects.using("replica").filter(title="New Book").exists()
+        )
+
+    @patch("borrowings.views.send_telegram_message")
+    @patch("borrowings.views.acreate_stripe_session")
+    def test_user_reads_own_writes_from_primary(self, *mocks) -> None:
+        user = User.objects.create_user(
+            email="user@example.com",
+            password="1qazcde3",
+            first_name="User",
+            last_name="User",
+        )
+        book = Book.objects.get(title="Primary Book")
+        self.client.force_authenticate(user)
+
+        response = self.client.get(BORROWINGS_URL)
+        self.assertEqual(response.data["results"], [])
+
+        response = self.client.post(
+            BORROWINGS_URL,
+            {
+                "book": book.id,
+                "borrow_date": date.today(),
+                "expected_return_date": date.today() + timedelta(days=7),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(BORROWINGS_URL)
+        self.assertEqual(len(response.data["results"]), 1)
+        # Others still read from the replica
+        self.assertEqual(
+            get_titles(APIClient().get(BOOKS_URL)), ["Replica Book"]
+        )
+
+        # Once the sticky window is over
+        cache.clear()
+        response = self.client.get(BORROWINGS_URL)
+        self.assertEqual(response.data["results"], [])
+        self.assertFalse(Borrowing.objects.using("replica").exists())
+
+    @patch("library_service.db_router.get_replication_lag", return_value=10)
+    def test_lagging_replica_is_skipped(self, get_replication_lag) -> None:
+        with self.assertLogs("library_service.db_router", "WARNING"):
+            response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(get_titles(response), ["Primary Book"])
+
+        # The lag is checked once per "LAG_CHECK_SECONDS"
+        self.client.get(BOOKS_URL)
+        get_replication_lag.assert_called_once_with("replica")
+
+    @patch(
+        "library_service.db_router.get_replication_lag",
+        side_effect=OperationalError("connection refused"),
+    )
+    def test_unavailable_replica_is_skipped(self, get_replication_lag) -> None:
+        with self.assertLogs("library_service.db_router", "WARNING"):
+            response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(get_titles(response), ["Primary Book"])
+
+    def test_reads_outside_requests_go_to_primary(self) -> None:
+        self.assertIsNone(PrimaryReplicaRouter().db_for_read(Book))
+        self.assertEqual(
+            list(Book.objects.values_list("title", flat=True)),
+            ["Primary Book"],
+        )
@@ -0,0 +1,115 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from books.models import Book
+
+User = get_user_model()
+
+BOOKS_URL = reverse("books:book-list")
+BORROWINGS_URL = reverse("borrowings:borrowings-list")
+METRICS_URL = reverse("metrics")
+
+
+def get_count(metric: str, **labels) -> float:
+    return REGISTRY.get_sample_value(f"{metric}_count", labels) or 0
+
+
+@override_settings(REQUEST_METRICS={"SAMPLE_RATE": 1})
+class RequestMetricsTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.staff = User.objects.create_user(
+            email="staff@example.com",
+            password="1qazcde3",
+            first_name="Staff",
+            last_name="Staff",
+            is_staff=True,
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            cover="HARD",
+            inventory=10,
+            daily_fee=1.00,
+        )
+
+    def test_staff_get_server_timing(self) -> None:
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="[1-9]\d* queries", total;dur=[\d.]+$',
+        )
+
+    def test_other_users_get_no_server_timing(self) -> None:
+        response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_timings_are_exported_by_view_and_action(self) -> None:
+        views = ["BookViewSet.list", "BookViewSet.retrieve", "metrics"]
+        before = {
+            view: get_count("http_request_duration_seconds", view=view)
+            for view in views
+        }
+
+        self.client.get(BOOKS_URL)
+        self.client.get(reverse("books:book-detail", args=[self.book.id]))
+        self.client.get(METRICS_URL)
+
+        for view in views:
+            self.assertEqual(
+                get_count("http_request_duration_seconds", view=view),
+                before[view] + 1,
+            )
+        self.assertEqual(
+            get_count("http_request_db_queries", view="BookViewSet.list"),
+            before["BookViewSet.list"] + 1,
+        )
+
+    @patch("notifications.tasks.enqueue_message")
+    @patch("borrowings.views.acreate_stripe_session")
+    def test_service_calls_are_timed(self, *mocks) -> None:
+        labels = {"view": "BorrowingViewSet.create", "service": "telegram"}
+        before = get_count("http_request_service_duration_seconds", **labels)
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(
+            BORROWINGS_URL,
+            {
+                "book": self.book.id,
+                "borrow_date": date.today(),
+                "expected_return_date": date.today() + timedelta(days=7),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("telegram;dur=", response["Server-Timing"])
+        self.assertEqual(
+            get_count("http_request_service_duration_seconds", **labels),
+            before + 1,
+        )
+
+    @override_settings(REQUEST_METRICS={"SAMPLE_RATE": 0})
+    def test_requests_are_not_timed_without_sampling(self) -> None:
+        labels = {"view": "BookViewSet.list"}
+        before = get_count("http_request_duration_seconds", **labels)
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get(BOOKS_URL)
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(
+            get_count("http_request_duration_seconds", **labels), before
+        )
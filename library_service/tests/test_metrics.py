@@ -0,0 +1,159 @@
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import CollectorRegistry, values
+from redis.exceptions import ConnectionError
+
+from library_service.metrics import (
+    CeleryQueueCollector,
+    DatabasePoolCollector,
+    MultiDirectoryCollector,
+    get_connection_pools,
+)
+
+METRICS = {"TOKEN": "secret", "MULTIPROC_DIRS": []}
+
+
+class FakePool:
+    def get_stats(self) -> dict:
+        return {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 4,
+            "pool_available": 1,
+            "requests_waiting": 2,
+            "requests_num": 120,
+            "requests_queued": 7,
+            "requests_wait_ms": 1500,
+            "connections_num": 4,
+            "connections_ms": 80,
+            "usage_ms": 30000,
+        }
+
+
+class DatabasePoolCollectorTests(SimpleTestCase):
+    def test_pool_statistics_are_exported(self) -> None:
+        registry = CollectorRegistry()
+        registry.register(
+            DatabasePoolCollector(lambda: {"default": FakePool()})
+        )
+
+        def value(name: str) -> float:
+            return registry.get_sample_value(name, {"database": "default"})
+
+        self.assertEqual(value("db_pool_size"), 4)
+        self.assertEqual(value("db_pool_max_size"), 10)
+        self.assertEqual(value("db_pool_waiting"), 2)
+        self.assertEqual(value("db_pool_checkouts_total"), 120)
+        self.assertEqual(value("db_pool_queued_total"), 7)
+        self.assertEqual(value("db_pool_timeouts_total"), 0)
+        self.assertEqual(value("db_pool_wait_seconds_total"), 1.5)
+        self.assertEqual(value("db_pool_connection_seconds_total"), 0.08)
+
+    @override_settings(METRICS=METRICS)
+    def test_databases_without_a_pool_are_skipped(self) -> None:
+        self.assertEqual(get_connection_pools(), {})
+
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b"# TYPE db_pool_checkouts_total counter", response.content
+        )
+
+
+@override_settings(CELERY_METRICS={"QUEUES": ["celery"], "TIMEOUT": 0.5})
+class CeleryQueueCollectorTests(SimpleTestCase):
+    def get_registry(self, redis: MagicMock) -> CollectorRegistry:
+        registry = CollectorRegistry()
+        registry.register(CeleryQueueCollector(lambda: redis))
+        return registry
+
+    def test_queue_lengths_are_exported(self) -> None:
+        redis = MagicMock()
+        pipeline = redis.pipeline.return_value.__enter__.return_value
+        pipeline.execute.return_value = [42]
+
+        registry = self.get_registry(redis)
+
+        self.assertEqual(
+            registry.get_sample_value(
+                "celery_queue_length", {"queue": "celery"}
+            ),
+            42,
+        )
+        pipeline.llen.assert_called_once_with("celery")
+
+    def test_unavailable_broker_is_skipped(self) -> None:
+        redis = MagicMock()
+        redis.pipeline.side_effect = ConnectionError
+
+        registry = self.get_registry(redis)
+
+        with self.assertLogs("library_service.metrics", "WARNING"):
+            value = registry.get_sample_value(
+                "celery_queue_length", {"queue": "celery"}
+            )
+        self.assertIsNone(value)
+
+
+class MultiDirectoryCollectorTests(SimpleTestCase):
+    def write_counter(self, path: str, pid: int) -> None:
+        value_class = values.MultiProcessValue(lambda: pid)
+        with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": path}):
+            value = value_class(
+                "counter", "tasks", "tasks_total", (), (), "Tasks."
+            )
+        value.inc(1)
+
+    def test_directories_are_combined(self) -> None:
+        with (
+            tempfile.TemporaryDirectory() as web,
+            tempfile.TemporaryDirectory() as celery,
+        ):
+            # The same process id in two containers
+            self.write_counter(web, pid=7)
+            self.write_counter(celery, pid=7)
+            registry = CollectorRegistry()
+            registry.register(MultiDirectoryCollector([web, celery]))
+
+            self.assertEqual(registry.get_sample_value("tasks_total"), 2)
+
+
+@override_settings(METRICS=METRICS)
+class MetricsViewTests(TestCase):
+    def test_anonymous_request_is_forbidden(self) -> None:
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_wrong_token_is_forbidden(self) -> None:
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS={**METRICS, "TOKEN": None})
+    def test_missing_token_allows_no_scraper(self) -> None:
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer None"
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_may_read_metrics(self) -> None:
+        staff = get_user_model().objects.create_user(
+            email="staff@example.com", password="1qazcde3", is_staff=True
+        )
+        self.client.force_login(staff)
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,93 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from celery import shared_task
+from django.test import TestCase
+from prometheus_client import REGISTRY
+
+from books.models import Book
+from library_service.instrumentation import track
+from library_service.task_metrics import count_task_event, get_queue_wait
+
+
+@shared_task(bind=True, max_retries=1)
+def instrumented_task(self, fail: bool = False) -> None:
+    list(Book.objects.all())
+    for _ in range(2):
+        with track("stripe"):
+            pass
+    count_task_event("notified", 3)
+    if fail:
+        raise ValueError("Failed")
+    if not self.request.retries:
+        raise self.retry(countdown=0)
+
+
+TASK = instrumented_task.name
+
+
+def get_value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, {"task": TASK, **labels}) or 0
+
+
+class TaskMetricsTests(TestCase):
+    def test_runs_are_measured(self) -> None:
+        runs = get_value("celery_task_runtime_seconds_count", state="SUCCESS")
+        retries = get_value("celery_task_retries_total")
+        calls = get_value("celery_task_service_calls_sum", service="stripe")
+        queries = get_value("celery_task_db_queries_sum")
+        events = get_value("celery_task_events_total", event="notified")
+
+        instrumented_task.apply()
+
+        self.assertEqual(
+            get_value("celery_task_runtime_seconds_count", state="SUCCESS"),
+            runs + 1,
+        )
+        self.assertEqual(get_value("celery_task_retries_total"), retries + 1)
+        # Both attempts are runs of their own
+        self.assertEqual(
+            get_value("celery_task_service_calls_sum", service="stripe"),
+            calls + 4,
+        )
+        self.assertEqual(
+            get_value("celery_task_db_queries_sum"), queries + 2
+        )
+        self.assertEqual(
+            get_value("celery_task_events_total", event="notified"),
+            events + 6,
+        )
+
+    def test_failures_are_counted(self) -> None:
+        failures = get_value(
+            "celery_task_failures_total", exception="ValueError"
+        )
+        runs = get_value("celery_task_runtime_seconds_count", state="FAILURE")
+
+        instrumented_task.apply(kwargs={"fail": True})
+
+        self.assertEqual(
+            get_value("celery_task_failures_total", exception="ValueError"),
+            failures + 1,
+        )
+        self.assertEqual(
+            get_value("celery_task_runtime_seconds_count", state="FAILURE"),
+            runs + 1,
+        )
+
+    def test_queue_wait_starts_at_eta(self) -> None:
+        now = time.time()
+
+        self.assertIsNone(get_queue_wait(SimpleNamespace(eta=None)))
+        self.assertAlmostEqual(
+            get_queue_wait(SimpleNamespace(published_at=now - 5, eta=None)),
+            5,
+            delta=1,
+        )
+        eta = datetime.fromtimestamp(now - 2, timezone.utc).isoformat()
+        self.assertAlmostEqual(
+            get_queue_wait(SimpleNamespace(published_at=now - 60, eta=eta)),
+            2,
+            delta=1,
+        )
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from redis.exceptions import ConnectionError
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from books.models import Book
+from library_service.throttling import SlidingWindowMixin
+
+BOOKS_URL = reverse("books:book-list")
+BORROWINGS_URL = reverse("borrowings:borrowings-list")
+
+RATES = {
+    "anon": "1000/day",
+    "user": "1000/day",
+    "catalog": "2/min",
+    "borrowing_create": "1/hour",
+}
+
+
+def patch_sliding_window(sliding_window):
+    return patch(
+        "library_service.throttling.get_sliding_window",
+        return_value=sliding_window,
+    )
+
+
+@patch.object(SimpleRateThrottle, "THROTTLE_RATES", RATES)
+@override_settings(
+    THROTTLING={"REDIS_URL": None, "TIMEOUT": 0.1, "FALLBACK_SECONDS": 5}
+)
+class ThrottlingTests(TestCase):
+    def setUp(self) -> None:
+        SlidingWindowMixin.cache.clear()
+        SlidingWindowMixin.fallback_until = 0.0
+        self.client = APIClient()
+        self.book = Book.objects.create(
+            title="The Hobbit",
+            author="J.R.R. Tolkien",
+            cover=Book.CoverType.HARD,
+            inventory=5,
+            daily_fee=Decimal("1.50"),
+        )
+
+    def test_rejected_request_waits_for_the_window(self) -> None:
+        sliding_window = MagicMock(return_value=[0, 1500])
+
+        with patch_sliding_window(sliding_window):
+            response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response["Retry-After"], "2")
+
+    def test_each_check_is_one_script_call(self) -> None:
+        sliding_window = MagicMock(return_value=[1, 0])
+
+        with patch_sliding_window(sliding_window):
+            response = self.client.get(BOOKS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        calls = {
+            call.kwargs["keys"][0]: call.kwargs["args"][:2]
+            for call in sliding_window.mock_calls
+        }
+        self.assertEqual(len(calls), sliding_window.call_count)
+        self.assertEqual(calls["throttle_catalog_127.0.0.1"], [60_000, 2])
+        self.assertEqual(calls["throttle_anon_127.0.0.1"], [86_400_000, 1000])
+
+    def test_falls_back_to_local_throttling_without_redis(self) -> None:
+        sliding_window = MagicMock(side_effect=ConnectionError)
+
+        with patch_sliding_window(sliding_window):
+            responses = [self.client.get(BOOKS_URL) for _ in range(3)]
+
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [200, 200, 429],
+        )
+        # Redis is not asked again until the fallback period is over
+        self.assertEqual(sliding_window.call_count, 1)
+
+    def test_scope_depends_on_the_action(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="password123"
+        )
+        self.client.force_authenticate(user)
+
+        for _ in range(3):
+            response = self.client.get(BORROWINGS_URL)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        responses = [self.client.post(BORROWINGS_URL, {}) for _ in range(2)]
+        self.assertNotEqual(responses[0].status_code, 429)
+        self.assertEqual(responses[1].status_code, 429)
@@ -0,0 +1,8 @@
+class FakeClock:
+    """A clock for tests, which moves only when `now` is set."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
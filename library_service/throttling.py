@@ -0,0 +1,133 @@
+import logging
+import time
+from functools import cache
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from redis import Redis
+from redis.commands.core import Script
+from redis.exceptions import RedisError
+from rest_framework.request import Request
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+if TYPE_CHECKING:
+    # Throttle classes are imported while `rest_framework.views` loads
+    from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Keeps the request times of a key in a sorted set. Returns {1, 0} and
+# records the request if fewer than the limit were made in the window,
+# otherwise {0, milliseconds until the oldest of them leaves it}
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now - window)
+if redis.call("ZCARD", KEYS[1]) < limit then
+    redis.call("ZADD", KEYS[1], now, ARGV[3])
+    redis.call("PEXPIRE", KEYS[1], window)
+    return {1, 0}
+end
+local oldest = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+return {0, tonumber(oldest[2]) + window - now}
+"""
+
+
+@cache
+def get_sliding_window() -> Script | None:
+    url = settings.THROTTLING["REDIS_URL"]
+    if not url:
+        return None
+    redis = Redis.from_url(
+        url,
+        socket_connect_timeout=settings.THROTTLING["TIMEOUT"],
+        socket_timeout=settings.THROTTLING["TIMEOUT"],
+    )
+    return redis.register_script(SLIDING_WINDOW_SCRIPT)
+
+
+class SlidingWindowMixin:
+    """
+    Check rates against a sliding window shared by all processes.
+
+    Every check is one atomic script call to the Redis at
+    `THROTTLING["REDIS_URL"]`. Without Redis, or for
+    `THROTTLING["FALLBACK_SECONDS"]` after it failed, requests are
+    counted by the process itself in a bounded memory cache.
+    """
+
+    cache = LocMemCache("throttling", {"OPTIONS": {"MAX_ENTRIES": 10_000}})
+    fallback_until = 0.0
+    wait_seconds = None
+
+    def allow_request(self, request: Request, view: "APIView") -> bool:
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        sliding_window = get_sliding_window()
+        fallback = time.monotonic() < SlidingWindowMixin.fallback_until
+        if sliding_window is None or fallback:
+            return SimpleRateThrottle.allow_request(self, request, view)
+        try:
+            allowed, wait = sliding_window(
+                keys=[self.key],
+                args=[self.duration * 1000, self.num_requests, uuid4().hex],
+            )
+        except RedisError:
+            logger.warning("Redis is unavailable, throttling locally")
+            SlidingWindowMixin.fallback_until = (
+                time.monotonic() + settings.THROTTLING["FALLBACK_SECONDS"]
+            )
+            return SimpleRateThrottle.allow_request(self, request, view)
+
+        self.wait_seconds = wait / 1000
+        return bool(allowed)
+
+    def wait(self) -> float | None:
+        if self.wait_seconds is not None:
+            return self.wait_seconds
+        return super().wait()
+
+
+class AnonThrottle(SlidingWindowMixin, AnonRateThrottle):
+    pass
+
+
+class UserThrottle(SlidingWindowMixin, UserRateThrottle):
+    pass
+
+
+class ScopedThrottle(SlidingWindowMixin, ScopedRateThrottle):
+    """
+    Throttle requests by the scope of the view's action.
+
+    Views map actions to scopes in `throttle_scopes`, other actions use
+    `throttle_scope` if the view has one. Scopes without a rate in
+    `DEFAULT_THROTTLE_RATES` are not throttled.
+    """
+
+    def get_scope(self, view: "APIView") -> str | None:
+        scopes = getattr(view, "throttle_scopes", {})
+        action = getattr(view, "action", None)
+        return scopes.get(action, getattr(view, self.scope_attr, None))
+
+    def allow_request(self, request: Request, view: "APIView") -> bool:
+        self.scope = self.get_scope(view)
+        if not self.scope or self.scope not in self.THROTTLE_RATES:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return SlidingWindowMixin.allow_request(self, request, view)
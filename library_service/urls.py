@@ -24,6 +24,8 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from library_service.metrics import metrics_view
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -34,6 +36,7 @@ urlpatterns = [
         include("borrowings.urls", namespace="borrowings")
     ),
     path("api/payments/", include("payments.urls", namespace="payments")),
+    path("metrics/", metrics_view, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/schema/swagger-ui/",
@@ -0,0 +1,18 @@
+from django.conf import settings
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+
+def get_bot(connection_pool_size: int = 1) -> Bot:
+    """
+    Build a Telegram bot client.
+
+    The pool size limits how many requests the bot can send at once,
+    so it has to match the concurrency of the code using the bot.
+    """
+    return Bot(
+        token=settings.TELEGRAM_BOT_TOKEN,
+        base_url=f"{settings.TELEGRAM_API_BASE}/bot",
+        base_file_url=f"{settings.TELEGRAM_API_BASE}/file/bot",
+        request=HTTPXRequest(connection_pool_size=connection_pool_size),
+    )
@@ -0,0 +1,214 @@
+import math
+
+from django.conf import settings
+from django.utils import timezone
+from telegram import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
+
+from notifications.snapshots import (
+    OVERDUE,
+    PENDING_PAYMENTS,
+    STATS,
+    get_snapshot,
+    normalize_query,
+    search_books,
+)
+from notifications.utils import get_admin_chat_ids
+
+BOOK = "book"
+
+# Callback data of a button is limited to 64 bytes and carries the query
+MAX_QUERY_BYTES = 48
+
+NOT_AN_ADMIN = "Only authenticated admins can use this command. Send /start."
+
+
+def format_overdue(row: dict) -> str:
+    return (
+        f"#{row['id']} {row['book__title']} - {row['user__email']}, "
+        f"due {row['expected_return_date']}"
+    )
+
+
+def format_pending_payment(row: dict) -> str:
+    return (
+        f"#{row['id']} {row['type'].lower()} {row['money_to_pay']} - "
+        f"{row['borrowing__user__email']}, {row['borrowing__book__title']}"
+    )
+
+
+def format_book(row: dict) -> str:
+    return (
+        f"{row['title']} by {row['author']}: "
+        f"{row['inventory']} available"
+    )
+
+
+def format_time(snapshot: dict) -> str:
+    refreshed_at = timezone.localtime(snapshot["refreshed_at"])
+    return refreshed_at.strftime("%H:%M")
+
+
+def build_page(
+        title: str,
+        rows: list,
+        page: int,
+        callback_prefix: str,
+        total: int = None,
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    """
+    Render a page of already formatted rows.
+
+    `total` is the number of all results, if only the first of them are
+    in `rows`. Returns the text of the page and a keyboard to move to
+    the neighbouring pages, if there are any.
+    """
+    total = len(rows) if total is None else total
+    page_size = settings.TELEGRAM_BOT["PAGE_SIZE"]
+    pages = max(math.ceil(len(rows) / page_size), 1)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    lines = rows[start:start + page_size] or ["Nothing found."]
+    text = "\n".join([f"{title} ({total}):", "", *lines])
+
+    buttons = []
+    if page > 1:
+        buttons.append(
+            InlineKeyboardButton(
+                "« Prev", callback_data=f"{callback_prefix}{page - 1}"
+            )
+        )
+    if page < pages:
+        buttons.append(
+            InlineKeyboardButton(
+                "Next »", callback_data=f"{callback_prefix}{page + 1}"
+            )
+        )
+    if pages > 1:
+        text += f"\n\nPage {page} of {pages}"
+    if total > len(rows):
+        text += f"\n\nShowing the first {len(rows)} results."
+    return text, InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+async def render_overdue(
+        page: int, query: str = ""
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    snapshot = await get_snapshot(OVERDUE)
+    return build_page(
+        f"Overdue borrowings as of {format_time(snapshot)}",
+        [format_overdue(row) for row in snapshot["data"]["rows"]],
+        page,
+        f"{OVERDUE}:",
+        snapshot["data"]["count"],
+    )
+
+
+async def render_pending_payments(
+        page: int, query: str = ""
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    snapshot = await get_snapshot(PENDING_PAYMENTS)
+    return build_page(
+        f"Pending payments as of {format_time(snapshot)}",
+        [format_pending_payment(row) for row in snapshot["data"]["rows"]],
+        page,
+        f"{PENDING_PAYMENTS}:",
+        snapshot["data"]["count"],
+    )
+
+
+async def render_books(
+        page: int, query: str = ""
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    query = normalize_query(query)
+    query = query.encode()[:MAX_QUERY_BYTES].decode(errors="ignore")
+    snapshot = await search_books(query)
+    return build_page(
+        f'Books matching "{query}" as of {format_time(snapshot)}',
+        [format_book(row) for row in snapshot["data"]["rows"]],
+        page,
+        f"{BOOK}:{query}:",
+        snapshot["data"]["count"],
+    )
+
+
+async def render_stats(
+        page: int = 1, query: str = ""
+) -> tuple[str, None]:
+    snapshot = await get_snapshot(STATS)
+    stats = snapshot["data"]
+    text = "\n".join(
+        [
+            f"Library stats as of {format_time(snapshot)}:",
+            "",
+            f"Books: {stats['titles']} titles, {stats['copies']} copies "
+            f"available",
+            f"Borrowings: {stats['active']} active, "
+            f"{stats['overdue']} overdue",
+            f"Pending payments: {stats['pending_payments']} "
+            f"({stats['pending_total']})",
+            f"Paid: {stats['paid_total']}",
+        ]
+    )
+    return text, None
+
+
+RENDERERS = {
+    OVERDUE: render_overdue,
+    PENDING_PAYMENTS: render_pending_payments,
+    STATS: render_stats,
+    BOOK: render_books,
+}
+
+
+def is_command(text: str) -> bool:
+    command = text.split(maxsplit=1)[0]
+    return command.startswith("/") and command[1:] in RENDERERS
+
+
+async def is_admin(chat_id: int) -> bool:
+    return chat_id in await get_admin_chat_ids()
+
+
+async def handle_command(message: Message) -> None:
+    """
+    Answer an admin command with the first page of its results.
+
+    Answers are rendered from snapshots refreshed in the background
+    (see `notifications.snapshots`). Book searches query the database
+    once per query and cache the result the same way.
+    """
+    if not await is_admin(message.chat_id):
+        await message.reply_text(NOT_AN_ADMIN)
+        return
+
+    command, _, query = message.text[1:].partition(" ")
+    query = query.strip()
+    if command == BOOK and not query:
+        await message.reply_text("Usage: /book <title>")
+        return
+
+    text, keyboard = await RENDERERS[command](1, query)
+    await message.reply_text(text, reply_markup=keyboard)
+
+
+async def handle_callback_query(callback_query: CallbackQuery) -> None:
+    """Show another page of a command's results."""
+    message = callback_query.message
+    if message is None or not await is_admin(message.chat.id):
+        await callback_query.answer(NOT_AN_ADMIN, show_alert=True)
+        return
+
+    command, _, rest = (callback_query.data or "").partition(":")
+    query, _, page = rest.rpartition(":")
+    if command not in RENDERERS or not page.isdigit():
+        await callback_query.answer()
+        return
+
+    text, keyboard = await RENDERERS[command](int(page), query)
+    await callback_query.answer()
+    await callback_query.edit_message_text(text, reply_markup=keyboard)
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable
+
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from telegram import Bot
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+)
+
+from notifications.digests import Coalescer
+from notifications.ledger import DeliveryLedger
+from notifications.models import Delivery
+from notifications.utils import (
+    admin_chats,
+    get_admin_chat_ids,
+    remove_chat_id,
+)
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_LATENCY = Histogram(
+    "telegram_delivery_latency_seconds",
+    "Time from queueing a Telegram message to its delivery to a chat",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+DELIVERIES = Counter(
+    "telegram_deliveries_total",
+    "Telegram messages delivered to chats by outcome",
+    ["outcome"],
+)
+RETRIES = Counter(
+    "telegram_delivery_retries_total",
+    "Retried Telegram deliveries by reason",
+    ["reason"],
+)
+
+
+class RateLimiter:
+    """
+    Spaces out acquisitions to at most `rate` per second.
+
+    Waiters are served in the order they arrived, so messages to
+    a chat are sent in the order they were queued.
+    """
+
+    def __init__(
+            self, rate: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.interval = 1 / rate
+        self.clock = clock
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            delay = self.next_at - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at = max(self.next_at, self.clock()) + self.interval
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all acquisitions for the next `seconds`."""
+        self.next_at = max(self.next_at, self.clock() + seconds)
+
+    @property
+    def idle(self) -> bool:
+        return not self.lock.locked() and self.next_at <= self.clock()
+
+
+class DeliveryWorker:
+    """
+    Send queued notifications to admin chats.
+
+    Messages are popped from a Redis list and delivered concurrently:
+    every message is fanned out to the admin chats with `asyncio.gather`
+    while a semaphore bounds the number of requests in flight. Sends are
+    spaced out by a global and a per-chat rate limiter, and `RetryAfter`
+    from Telegram pauses all sends for the requested time. Admin chat ids
+    are cached and reloaded when other processes publish admin changes.
+
+    Before sending, messages pass through a `Coalescer`, which buffers
+    events of the same type in Redis and sends them as digests according
+    to their policies.
+    Outcomes are recorded in a `DeliveryLedger`, which also keeps an
+    event from being sent to the same chat twice.
+    """
+
+    MAX_CHAT_LIMITERS = 1000
+
+    def __init__(
+            self,
+            bot: Bot,
+            redis: Redis,
+            options: dict = None,
+            ledger: DeliveryLedger = None,
+    ) -> None:
+        self.bot = bot
+        self.redis = redis
+        self.options = options or settings.TELEGRAM_DELIVERY
+        self.ledger = ledger or DeliveryLedger(
+            self.options["LEDGER"]["BATCH_SIZE"]
+        )
+        self.semaphore = asyncio.Semaphore(self.options["CONCURRENCY"])
+        self.global_limiter = RateLimiter(self.options["GLOBAL_RATE"])
+        self.chat_limiters = {}
+        self.coalescer = Coalescer(
+            self.options["POLICIES"], self.deliver, redis
+        )
+        self.tasks = set()
+        self.stopping = False
+
+    def stop(self) -> None:
+        self.stopping = True
+
+    async def run(self) -> None:
+        """Deliver queued messages until stopped, then finish sending."""
+        logger.info("Waiting for messages to deliver...")
+        listener = asyncio.create_task(self.listen_for_admin_changes())
+        flusher = asyncio.create_task(self.flush_digests())
+        recorder = asyncio.create_task(self.flush_ledger())
+        max_pending = self.options["CONCURRENCY"] * 10
+        while not self.stopping:
+            if len(self.tasks) >= max_pending:
+                await asyncio.wait(
+                    self.tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                continue
+            item = await self.redis.blpop(
+                [self.options["QUEUE_KEY"]], timeout=1
+            )
+            if item is None:
+                continue
+            task = asyncio.create_task(
+                self.deliver_message(json.loads(item[1]))
+            )
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+        flusher.cancel()
+        recorder.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks)
+        await self.ledger.flush()
+        listener.cancel()
+
+    async def flush_digests(self) -> None:
+        while True:
+            await asyncio.sleep(1)
+            task = asyncio.create_task(self.coalescer.flush_due())
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def flush_ledger(self) -> None:
+        while True:
+            await asyncio.sleep(self.options["LEDGER"]["FLUSH_INTERVAL"])
+            await self.ledger.flush()
+
+    async def listen_for_admin_changes(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(
+                        self.options["ADMIN_CHATS_CHANNEL"]
+                    )
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            admin_chats.invalidate()
+            except RedisError:
+                logger.warning(
+                    "Lost admin chat changes subscription, reconnecting"
+                )
+                admin_chats.invalidate()
+                await asyncio.sleep(1)
+
+    async def deliver_message(self, message: dict) -> None:
+        if "chat_id" in message:
+            chat_ids = [message["chat_id"]]
+        else:
+            chat_ids = await get_admin_chat_ids()
+            if not chat_ids:
+                logger.warning("No admin chats to send messages to.")
+                return
+        chat_ids = await self.ledger.claim(message["id"], chat_ids)
+        if self.coalescer.is_buffered(message):
+            for chat_id in chat_ids:
+                self.ledger.record(
+                    chat_id, message, Delivery.Status.PENDING, 0
+                )
+        await asyncio.gather(
+            *(self.coalescer.add(chat_id, message) for chat_id in chat_ids)
+        )
+
+    async def deliver(self, chat_id: int, message: dict) -> None:
+        status, attempts, message_id = await self.send(chat_id, message)
+        self.ledger.record(chat_id, message, status, attempts, message_id)
+        if self.ledger.full:
+            await self.ledger.flush()
+
+    async def send(
+            self, chat_id: int, message: dict
+    ) -> tuple[str, int, int | None]:
+        """
+        Send the message, returning its delivery status, attempts and the
+        id of the sent Telegram message.
+        """
+        backoff = 1
+        for attempt in range(1, self.options["MAX_ATTEMPTS"] + 1):
+            await self.get_chat_limiter(chat_id).acquire()
+            async with self.semaphore:
+                await self.global_limiter.acquire()
+                try:
+                    sent = await self.bot.send_message(
+                        chat_id=chat_id, text=message["text"]
+                    )
+                except RetryAfter as error:
+                    RETRIES.labels("retry_after").inc()
+                    logger.warning(
+                        f"Telegram asked to retry after "
+                        f"{error.retry_after} s (chat ID: {chat_id})"
+                    )
+                    self.global_limiter.pause(error.retry_after)
+                    continue
+                except Forbidden:
+                    DELIVERIES.labels("forbidden").inc()
+                    logger.warning(
+                        f"Bot was blocked by user with chat ID: {chat_id}. "
+                        f"Removing from the list."
+                    )
+                    await remove_chat_id(chat_id)
+                    return Delivery.Status.BLOCKED, attempt, None
+                except BadRequest:
+                    DELIVERIES.labels("failed").inc()
+                    logger.exception(
+                        f"Telegram rejected message {message['id']} "
+                        f"to chat ID: {chat_id}"
+                    )
+                    return Delivery.Status.FAILED, attempt, None
+                except NetworkError:
+                    RETRIES.labels("network").inc()
+                    logger.warning(
+                        f"Network error sending to chat ID: {chat_id}"
+                    )
+                except TelegramError:
+                    DELIVERIES.labels("failed").inc()
+                    logger.exception(
+                        f"Could not send message {message['id']} "
+                        f"to chat ID: {chat_id}"
+                    )
+                    return Delivery.Status.FAILED, attempt, None
+                else:
+                    DELIVERIES.labels("sent").inc()
+                    DELIVERY_LATENCY.observe(
+                        time.time() - message["enqueued_at"]
+                    )
+                    logger.info(f"Message sent to chat ID: {chat_id}")
+                    return Delivery.Status.SENT, attempt, sent.message_id
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.options["MAX_BACKOFF"])
+
+        DELIVERIES.labels("failed").inc()
+        logger.error(
+            f"Gave up sending message {message['id']} to chat ID: {chat_id}"
+        )
+        return Delivery.Status.FAILED, self.options["MAX_ATTEMPTS"], None
+
+    def get_chat_limiter(self, chat_id: int) -> RateLimiter:
+        if len(self.chat_limiters) > self.MAX_CHAT_LIMITERS:
+            self.chat_limiters = {
+                chat: limiter
+                for chat, limiter in self.chat_limiters.items()
+                if not limiter.idle
+            }
+        if chat_id not in self.chat_limiters:
+            self.chat_limiters[chat_id] = RateLimiter(
+                self.options["CHAT_RATE"]
+            )
+        return self.chat_limiters[chat_id]
@@ -0,0 +1,55 @@
+import json
+import time
+from functools import cache
+from uuid import uuid4
+
+from django.conf import settings
+from redis import Redis
+
+
+@cache
+def get_redis() -> Redis:
+    return Redis.from_url(
+        settings.TELEGRAM_DELIVERY["REDIS_URL"],
+        socket_connect_timeout=1,
+        socket_timeout=1,
+    )
+
+
+def build_message(
+        text: str,
+        event_type: str = "default",
+        chat_id: int = None,
+        event_id: str = None,
+) -> dict:
+    message = {
+        "id": event_id or uuid4().hex,
+        "text": text,
+        "event_type": event_type,
+        "enqueued_at": time.time(),
+    }
+    if chat_id is not None:
+        message["chat_id"] = chat_id
+    return message
+
+
+def enqueue_message(
+        text: str,
+        event_type: str = "default",
+        chat_id: int = None,
+        event_id: str = None,
+) -> str:
+    """
+    Put a notification into the delivery queue.
+
+    It is sent to `chat_id`, or to all admin chats if no chat is given.
+    The event type selects how the message is combined with others
+    (see `TELEGRAM_DELIVERY["POLICIES"]`). Messages with the same
+    `event_id` are sent to a chat only once. Returns the id of the
+    queued message.
+    """
+    message = build_message(text, event_type, chat_id, event_id)
+    get_redis().rpush(
+        settings.TELEGRAM_DELIVERY["QUEUE_KEY"], json.dumps(message)
+    )
+    return message["id"]
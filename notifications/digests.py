@@ -0,0 +1,157 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from django.utils import timezone
+from redis.asyncio import Redis
+from telegram.constants import MessageLimit
+
+IMMEDIATE = "immediate"
+BATCHED = "batched"
+DAILY = "daily"
+
+DEFAULT_EVENT_TYPE = "default"
+
+# Buffered messages taken from Redis per request
+MAX_POP = 500
+
+Send = Callable[[int, dict], Awaitable[None]]
+
+
+def get_next_daily_time(now: float, at: str) -> float:
+    """Return the next `HH:MM` of the current time zone after `now`."""
+    hour, minute = map(int, at.split(":"))
+    current = datetime.fromtimestamp(now, timezone.get_current_timezone())
+    scheduled = current.replace(
+        hour=hour, minute=minute, second=0, microsecond=0
+    )
+    if scheduled <= current:
+        scheduled += timedelta(days=1)
+    return scheduled.timestamp()
+
+
+def build_digest(title: str, messages: list[dict]) -> dict:
+    """
+    Combine buffered messages into a single message. The combined
+    messages are kept in the digest to record their deliveries.
+    """
+    if len(messages) == 1:
+        return messages[0]
+    return {
+        "id": uuid4().hex,
+        "text": "\n\n".join(
+            [f"{title} ({len(messages)}):"]
+            + [message["text"] for message in messages]
+        ),
+        "enqueued_at": min(message["enqueued_at"] for message in messages),
+        "messages": messages,
+    }
+
+
+def build_digests(title: str, messages: list[dict]) -> list[dict]:
+    """
+    Combine buffered messages into as few digests as fit into Telegram
+    messages, keeping their order.
+    """
+    limit = MessageLimit.MAX_TEXT_LENGTH - len(title) - 20
+    chunks = [[]]
+    length = 0
+    for message in messages:
+        length += len(message["text"]) + 2
+        if chunks[-1] and length > limit:
+            chunks.append([])
+            length = len(message["text"]) + 2
+        chunks[-1].append(message)
+    return [build_digest(title, chunk) for chunk in chunks if chunk]
+
+
+class Coalescer:
+    """
+    Buffer notifications per chat and send them as digests.
+
+    Every event type has a policy in `policies` (the `default` one is
+    used for unknown types):
+    - `immediate` messages are sent right away;
+    - `batched` messages are sent as one digest `window` seconds after
+      the first of them was buffered;
+    - `daily` messages are sent as one digest at `at` (`HH:MM`).
+    A buffer holding `max_size` messages is sent at once, and digests
+    too long for one Telegram message are split.
+
+    Buffers are Redis lists per chat and event type, and a sorted set
+    holds the time each of them is due. They outlive the worker, so
+    a restart neither loses nor sends early what was buffered.
+    """
+
+    def __init__(
+            self,
+            policies: dict,
+            send: Send,
+            redis: Redis,
+            prefix: str = "notifications:digest",
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.policies = policies
+        self.send = send
+        self.redis = redis
+        self.prefix = prefix
+        self.due_key = f"{prefix}:due"
+        self.clock = clock
+
+    def get_policy(self, event_type: str) -> dict:
+        return self.policies.get(event_type, self.policies[DEFAULT_EVENT_TYPE])
+
+    def get_flush_at(self, policy: dict) -> float:
+        if policy["mode"] == DAILY:
+            return get_next_daily_time(self.clock(), policy["at"])
+        return self.clock() + policy["window"]
+
+    def get_buffer_key(self, buffer: str) -> str:
+        return f"{self.prefix}:{buffer}"
+
+    def is_buffered(self, message: dict) -> bool:
+        """Return whether the message is buffered for a digest."""
+        event_type = message.get("event_type", DEFAULT_EVENT_TYPE)
+        return self.get_policy(event_type)["mode"] != IMMEDIATE
+
+    async def add(self, chat_id: int, message: dict) -> None:
+        event_type = message.get("event_type", DEFAULT_EVENT_TYPE)
+        policy = self.get_policy(event_type)
+        if policy["mode"] == IMMEDIATE:
+            return await self.send(chat_id, message)
+
+        buffer = f"{chat_id}:{event_type}"
+        size = await self.redis.rpush(
+            self.get_buffer_key(buffer), json.dumps(message)
+        )
+        await self.redis.zadd(
+            self.due_key, {buffer: self.get_flush_at(policy)}, nx=True
+        )
+        if size >= policy["max_size"]:
+            await self.flush(buffer)
+
+    async def flush(self, buffer: str) -> None:
+        chat_id, event_type = buffer.split(":", 1)
+        # Messages buffered after the due time is removed get a new one
+        await self.redis.zrem(self.due_key, buffer)
+        messages = []
+        while items := await self.redis.lpop(
+            self.get_buffer_key(buffer), MAX_POP
+        ):
+            messages += [json.loads(item) for item in items]
+        if not messages:
+            return
+        title = self.get_policy(event_type).get("title", event_type)
+        for digest in build_digests(title, messages):
+            await self.send(int(chat_id), digest)
+
+    async def flush_due(self) -> None:
+        buffers = await self.redis.zrangebyscore(
+            self.due_key, "-inf", self.clock()
+        )
+        await asyncio.gather(
+            *(self.flush(buffer.decode()) for buffer in buffers)
+        )
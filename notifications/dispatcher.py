@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+from telegram import Bot, Update
+from telegram.error import NetworkError
+
+logger = logging.getLogger(__name__)
+
+UpdateHandler = Callable[[Update], Awaitable[None]]
+
+
+class UpdateDispatcher:
+    """
+    Process bot updates concurrently across chats.
+
+    Updates of a chat are queued and handled one by one in the order
+    they were received, while updates of different chats are handled
+    concurrently. A semaphore bounds the number of updates handled at
+    once, and a failing update is logged without affecting the others.
+    """
+
+    def __init__(self, handler: UpdateHandler, concurrency: int) -> None:
+        self.handler = handler
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.chat_queues = {}
+        self.tasks = set()
+        self.pending = 0
+
+    def dispatch(self, update: Update) -> None:
+        chat_id = update.effective_chat and update.effective_chat.id
+        self.pending += 1
+        if chat_id in self.chat_queues:
+            self.chat_queues[chat_id].append(update)
+            return
+
+        self.chat_queues[chat_id] = deque([update])
+        task = asyncio.create_task(self.process_chat(chat_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def process_chat(self, chat_id: int | None) -> None:
+        queue = self.chat_queues[chat_id]
+        try:
+            while queue:
+                await self.handle(queue.popleft())
+        finally:
+            del self.chat_queues[chat_id]
+
+    async def handle(self, update: Update) -> None:
+        async with self.semaphore:
+            try:
+                await self.handler(update)
+            except Exception:
+                logger.exception(f"Failed to handle update {update.update_id}")
+            finally:
+                self.pending -= 1
+
+    async def join(self) -> None:
+        """Wait until all dispatched updates are handled."""
+        while self.tasks:
+            await asyncio.gather(*self.tasks)
+
+
+async def poll_updates(
+        bot: Bot,
+        dispatcher: UpdateDispatcher,
+        timeout: int = 30,
+        max_pending: int = 1000,
+) -> None:
+    """
+    Long-poll the Bot API and dispatch every update of each batch.
+
+    Updates are confirmed as soon as they are dispatched. Polling waits
+    while `max_pending` updates are still being handled.
+    """
+    offset = None
+    while True:
+        while dispatcher.pending >= max_pending:
+            await asyncio.wait(
+                dispatcher.tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+        try:
+            updates = await bot.get_updates(
+                offset=offset,
+                timeout=timeout,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        except NetworkError:
+            logger.warning("Failed to get updates, retrying in 1 s")
+            await asyncio.sleep(1)
+            continue
+
+        for update in updates:
+            dispatcher.dispatch(update)
+        if updates:
+            offset = updates[-1].update_id + 1
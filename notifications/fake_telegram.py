@@ -0,0 +1,293 @@
+"""
+A local stand-in for the parts of the Telegram Bot API used by the bot.
+
+It implements updates (long-polled or pushed to a webhook) and sent
+messages with configurable latency, so the bot and the delivery worker
+can be load-tested without the real Bot API. Point the service at it
+with the `TELEGRAM_API_BASE` setting.
+"""
+import json
+import logging
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+METHOD_PATH = re.compile(r"^/bot(?P<token>[^/]+)/(?P<method>\w+)$")
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Library",
+    "username": "library_fake_bot",
+}
+
+
+class FakeTelegramError(Exception):
+    def __init__(self, error_code: int, description: str) -> None:
+        super().__init__(description)
+        self.error_code = error_code
+        self.description = description
+
+
+class FakeTelegram:
+    """
+    In-memory updates and chats with Bot API-like behaviour.
+
+    - `latency` seconds are added to every call except `getUpdates`,
+      which waits for new updates up to its `timeout` like the real one.
+    - Messages from users are added with `add_message` and sent messages
+      are recorded in `sent_messages`.
+    - Once a webhook is set, updates are posted to it one by one with
+      its secret token, and `getUpdates` fails with a conflict.
+    """
+
+    def __init__(self, latency: float = 0) -> None:
+        self.latency = latency
+        self.webhook_url = None
+        self.webhook_secret = None
+        self.updates = []
+        self.sent_messages = []
+        self.calls = {}
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._condition = threading.Condition()
+        self._poster = None
+
+    def build_message(self, chat_id: int, text: str, sender: dict) -> dict:
+        message = {
+            "message_id": self._next_message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": sender,
+            "text": text,
+        }
+        self._next_message_id += 1
+        return message
+
+    def add_message(self, chat_id: int, text: str) -> dict:
+        """Add a message sent by a user to the bot in a private chat."""
+        sender = {"id": chat_id, "is_bot": False, "first_name": "User"}
+        with self._condition:
+            update = {
+                "update_id": self._next_update_id,
+                "message": self.build_message(chat_id, text, sender),
+            }
+            self._next_update_id += 1
+            self.updates.append(update)
+            self._condition.notify_all()
+        return update
+
+    def get_updates(self, params: dict) -> list[dict]:
+        if self.webhook_url:
+            raise FakeTelegramError(
+                409,
+                "Conflict: can't use getUpdates method while webhook "
+                "is active; use deleteWebhook to delete the webhook first",
+            )
+        offset = params.get("offset") or 0
+        limit = params.get("limit") or 100
+        deadline = time.monotonic() + (params.get("timeout") or 0)
+        with self._condition:
+            # Updates before the offset are confirmed and forgotten
+            self.updates = [
+                update for update in self.updates
+                if update["update_id"] >= offset
+            ]
+            while not self.updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self.updates[:limit]
+
+    def send_message(self, params: dict) -> dict:
+        with self._condition:
+            message = self.build_message(
+                params["chat_id"], params["text"], BOT_USER
+            )
+            if "reply_markup" in params:
+                message["reply_markup"] = params["reply_markup"]
+            self.sent_messages.append(message)
+            self._condition.notify_all()
+        return message
+
+    def set_webhook(self, params: dict) -> bool:
+        with self._condition:
+            self.webhook_url = params["url"]
+            self.webhook_secret = params.get("secret_token")
+            if params.get("drop_pending_updates"):
+                self.updates = []
+            self._condition.notify_all()
+            if self._poster is None or not self._poster.is_alive():
+                self._poster = threading.Thread(
+                    target=self._post_updates, daemon=True
+                )
+                self._poster.start()
+        return True
+
+    def delete_webhook(self, params: dict) -> bool:
+        with self._condition:
+            self.webhook_url = None
+            if params.get("drop_pending_updates"):
+                self.updates = []
+            self._condition.notify_all()
+        return True
+
+    def _post_updates(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self.webhook_url is None or self.updates
+                )
+                if self.webhook_url is None:
+                    return
+                update = self.updates[0]
+                request = urllib.request.Request(
+                    self.webhook_url,
+                    data=json.dumps(update).encode(),
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Telegram-Bot-Api-Secret-Token": (
+                            self.webhook_secret or ""
+                        ),
+                    },
+                )
+            try:
+                urllib.request.urlopen(request, timeout=10).close()
+            except OSError as error:
+                logger.warning(f"Webhook delivery failed: {error}")
+                time.sleep(0.5)
+                continue
+            with self._condition:
+                if self.updates and self.updates[0] is update:
+                    self.updates.pop(0)
+
+    def wait_for_messages(self, count: int, timeout: float) -> bool:
+        """Wait until at least `count` messages have been sent."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self.sent_messages) >= count, timeout
+            )
+
+    def call(self, method: str, params: dict) -> object:
+        with self._condition:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "getUpdates":
+            return self.get_updates(params)
+        if self.latency:
+            time.sleep(self.latency)
+        if method == "getMe":
+            return BOT_USER
+        if method == "sendMessage":
+            return self.send_message(params)
+        if method == "setWebhook":
+            return self.set_webhook(params)
+        if method == "deleteWebhook":
+            return self.delete_webhook(params)
+        if method == "getWebhookInfo":
+            return {
+                "url": self.webhook_url or "",
+                "has_custom_certificate": False,
+                "pending_update_count": len(self.updates),
+            }
+        return True
+
+
+class FakeTelegramRequestHandler(BaseHTTPRequestHandler):
+    server: "FakeTelegramServer"
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one packet to keep keep-alive calls fast
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.dispatch()
+
+    def do_POST(self) -> None:
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+        if self.headers.get("Content-Type", "").startswith(
+            "application/json"
+        ):
+            params = json.loads(body or "{}")
+        else:
+            params = {
+                name: value if name == "text" else self.decode(value)
+                for name, value in parse_qsl(url.query or body)
+            }
+
+        match = METHOD_PATH.match(url.path)
+        if match is None:
+            return self.respond(
+                404,
+                {"ok": False, "error_code": 404, "description": "Not Found"},
+            )
+        try:
+            result = self.server.telegram.call(match["method"], params)
+        except FakeTelegramError as error:
+            return self.respond(
+                error.error_code,
+                {
+                    "ok": False,
+                    "error_code": error.error_code,
+                    "description": error.description,
+                },
+            )
+        self.respond(200, {"ok": True, "result": result})
+
+    @staticmethod
+    def decode(value: str) -> object:
+        """Decode a parameter, which the bot sends JSON-encoded."""
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def respond(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """HTTP server exposing a `FakeTelegram` state on the Bot API paths."""
+
+    daemon_threads = True
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            telegram_state: FakeTelegram = None,
+    ) -> None:
+        super().__init__((host, port), FakeTelegramRequestHandler)
+        self.telegram = telegram_state or FakeTelegram()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve requests in a background thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
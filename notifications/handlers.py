@@ -0,0 +1,119 @@
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+from telegram import Message, Update
+from telegram.error import TelegramError
+
+from notifications.commands import (
+    handle_callback_query,
+    handle_command,
+    is_command,
+)
+from notifications.login_throttle import get_login_throttle
+from notifications.sessions import get_session_store
+
+logger = logging.getLogger(__name__)
+
+# Password hashing is slow on purpose, so it runs on a few dedicated
+# threads instead of the single thread shared by other database calls
+auth_executor = ThreadPoolExecutor(
+    max_workers=settings.TELEGRAM_BOT["AUTH_WORKERS"],
+    thread_name_prefix="bot-auth",
+)
+
+
+async def handle_update(update: Update) -> None:
+    """
+    Lead a user through the login conversation of the bot.
+
+    The state of the conversation is kept in the session store. The
+    password is never stored: it is checked as soon as it is received,
+    and its message is deleted from the chat. Failed attempts are
+    throttled per chat and globally. Authenticated admins may also send
+    commands (see `notifications.commands`) outside of the conversation.
+    """
+    if update.callback_query is not None:
+        return await handle_callback_query(update.callback_query)
+    if update.message is None or not update.message.text:
+        return
+
+    chat_id = update.message.chat_id
+    sessions = get_session_store()
+    session = await sessions.get(chat_id) or {"state": "waiting_for_start"}
+
+    text = update.message.text
+
+    if session["state"] == "waiting_for_password":
+        logger.info(f"Received password from chat {chat_id}")
+    else:
+        logger.info(f"Received message: {text} from chat {chat_id}")
+
+    if session["state"] == "waiting_for_start" and is_command(text):
+        await handle_command(update.message)
+
+    elif session["state"] == "waiting_for_start" and text == "/start":
+        await update.message.reply_text("Please enter your email:")
+        session["state"] = "waiting_for_email"
+        await sessions.set(chat_id, session)
+
+    elif session["state"] == "waiting_for_email":
+        session["email"] = text
+        await update.message.reply_text("Please enter your password:")
+        session["state"] = "waiting_for_password"
+        await sessions.set(chat_id, session)
+
+    elif session["state"] == "waiting_for_password":
+        await sessions.delete(chat_id)
+        await delete_message(update.message)
+        throttle = get_login_throttle()
+        wait = await throttle.acquire(chat_id)
+        if wait:
+            await update.message.reply_text(
+                f"Too many login attempts. "
+                f"Please, try again in {math.ceil(wait)} seconds."
+            )
+        elif user := await link_chat(session["email"], text, chat_id):
+            await throttle.record_success(chat_id)
+            await update.message.reply_text(
+                "You are authenticated as an admin."
+                if user.is_staff
+                else "You will be reminded of your borrowings' due dates."
+            )
+        else:
+            await throttle.record_failure(chat_id)
+            await update.message.reply_text(
+                "Invalid credentials. Please, try again."
+            )
+
+
+async def delete_message(message: Message) -> None:
+    try:
+        await message.delete()
+    except TelegramError:
+        logger.warning(f"Could not delete message from chat {message.chat_id}")
+
+
+@sync_to_async(thread_sensitive=False, executor=auth_executor)
+def link_chat(email: str, password: str, telegram_chat_id: int):
+    """
+    Link the chat to the user with the credentials.
+
+    Admins receive notifications about the library in the chat, other
+    users receive reminders about their borrowings. Returns the user,
+    or None if the credentials are invalid.
+    """
+    # Threads of the executor outlive requests, so their database
+    # connections are not cleaned up by Django
+    close_old_connections()
+    user = authenticate(username=email, password=password)
+
+    if user:
+        user.telegram_chat_id = telegram_chat_id
+        user.save(update_fields=["telegram_chat_id"])
+
+    return user
@@ -0,0 +1,195 @@
+import json
+import logging
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from notifications.delivery_queue import build_message, get_redis
+from notifications.models import Delivery
+
+logger = logging.getLogger(__name__)
+
+# Deliveries which keep an event from being claimed for a chat again
+TAKEN_STATUSES = (Delivery.Status.SENT, Delivery.Status.PENDING)
+
+
+class DeliveryLedger:
+    """
+    Record the outcomes of deliveries in the `Delivery` table.
+
+    Outcomes are buffered and written with one upsert per batch of
+    `batch_size` rows (or when `flush` is called). The ledger also
+    deduplicates deliveries: an event is not sent again to a chat it
+    was already sent to, nor to a chat it is being sent to right now or
+    whose digest it is buffered in.
+    """
+
+    def __init__(self, batch_size: int, max_buffered: int = 10_000) -> None:
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.buffer = {}
+        self.in_flight = set()
+
+    async def claim(self, event_id: str, chat_ids) -> list[int]:
+        """
+        Return the chats the event still has to be sent to and mark
+        them as in flight until their outcome is recorded.
+        """
+        try:
+            taken = await sync_to_async(self.get_taken_chat_ids)(event_id)
+        except DatabaseError:
+            logger.exception(f"Could not check deliveries of {event_id}")
+            taken = set()
+        claimed = []
+        for chat_id in chat_ids:
+            key = (event_id, chat_id)
+            buffered = self.buffer.get(key)
+            if (
+                    chat_id in taken
+                    or key in self.in_flight
+                    or buffered and buffered.status in TAKEN_STATUSES
+            ):
+                continue
+            self.in_flight.add(key)
+            claimed.append(chat_id)
+        return claimed
+
+    @staticmethod
+    def get_taken_chat_ids(event_id: str) -> set[int]:
+        return set(
+            Delivery.objects.filter(
+                event_id=event_id, status__in=TAKEN_STATUSES
+            ).values_list("chat_id", flat=True)
+        )
+
+    def record(
+            self,
+            chat_id: int,
+            message: dict,
+            status: str,
+            attempts: int,
+            message_id: int = None,
+    ) -> None:
+        """
+        Buffer the outcome of sending `message` to the chat, or that it
+        is pending in a digest buffer.
+
+        A digest is recorded as each of the events it combines, with the
+        id of the Telegram message which carried them.
+        """
+        now = time.time()
+        for event in message.get("messages", [message]):
+            key = (event["id"], chat_id)
+            if status != Delivery.Status.PENDING:
+                self.in_flight.discard(key)
+            self.buffer[key] = Delivery(
+                event_id=event["id"],
+                chat_id=chat_id,
+                event_type=event.get("event_type", "default"),
+                text=event["text"],
+                status=status,
+                attempts=attempts,
+                latency=(
+                    now - event["enqueued_at"]
+                    if status == Delivery.Status.SENT
+                    else None
+                ),
+                message_id=message_id,
+                updated_at=timezone.now(),
+            )
+
+    @property
+    def full(self) -> bool:
+        return len(self.buffer) >= self.batch_size
+
+    async def flush(self) -> None:
+        if not self.buffer:
+            return
+        deliveries, self.buffer = self.buffer, {}
+        try:
+            await sync_to_async(self.save)(list(deliveries.values()))
+        except DatabaseError:
+            logger.exception(
+                f"Could not record {len(deliveries)} deliveries, "
+                f"retrying with the next batch"
+            )
+            # Newer outcomes recorded meanwhile take precedence
+            if len(self.buffer) + len(deliveries) <= self.max_buffered:
+                self.buffer = {**deliveries, **self.buffer}
+
+    def save(self, deliveries: list[Delivery]) -> None:
+        for start in range(0, len(deliveries), self.batch_size):
+            Delivery.objects.bulk_create(
+                deliveries[start:start + self.batch_size],
+                update_conflicts=True,
+                unique_fields=["event_id", "chat_id"],
+                update_fields=[
+                    "event_type",
+                    "text",
+                    "status",
+                    "attempts",
+                    "latency",
+                    "message_id",
+                    "updated_at",
+                ],
+            )
+
+
+def replay_deliveries(
+        since: datetime = None, event_type: str = None, limit: int = 1000
+) -> int:
+    """
+    Queue failed deliveries again, oldest first.
+
+    Replayed deliveries are claimed, i.e. marked as such, before they
+    are queued, so they are not queued twice and the outcome the
+    delivery worker records is not overwritten. Returns the number of
+    queued messages.
+    """
+    deliveries = Delivery.objects.filter(status=Delivery.Status.FAILED)
+    if since:
+        deliveries = deliveries.filter(updated_at__gte=since)
+    if event_type:
+        deliveries = deliveries.filter(event_type=event_type)
+    now = timezone.now()
+    with transaction.atomic():
+        # Rows claimed by another replay meanwhile are skipped
+        deliveries = list(
+            deliveries.select_for_update(skip_locked=True).order_by(
+                "updated_at", "id"
+            )[:limit]
+        )
+        ids = [delivery.id for delivery in deliveries]
+        Delivery.objects.filter(
+            id__in=ids, status=Delivery.Status.FAILED
+        ).update(status=Delivery.Status.REPLAYED, updated_at=now)
+        claimed = set(
+            Delivery.objects.filter(
+                id__in=ids, status=Delivery.Status.REPLAYED, updated_at=now
+            ).values_list("id", flat=True)
+        )
+    deliveries = [
+        delivery for delivery in deliveries if delivery.id in claimed
+    ]
+    if not deliveries:
+        return 0
+
+    get_redis().rpush(
+        settings.TELEGRAM_DELIVERY["QUEUE_KEY"],
+        *(
+            json.dumps(
+                build_message(
+                    delivery.text,
+                    delivery.event_type,
+                    delivery.chat_id,
+                    delivery.event_id,
+                )
+            )
+            for delivery in deliveries
+        ),
+    )
+    return len(deliveries)
@@ -0,0 +1,157 @@
+import math
+import time
+from collections import OrderedDict, deque
+from functools import cache
+from typing import Callable
+
+from django.conf import settings
+from redis.asyncio import Redis
+
+from notifications.sessions import RedisSessionStore, get_session_store
+
+
+class LoginThrottle:
+    """
+    Limit password attempts of the bot login.
+
+    A chat may fail `free_attempts` times in a row; after that it has
+    to wait `backoff` seconds, doubled with every further failure up to
+    `max_backoff`. All chats together may try at most `global_limit`
+    passwords per `global_window` seconds. Failures of at most
+    `max_chats` chats are remembered in the memory of a single bot
+    process.
+    """
+
+    def __init__(
+            self,
+            free_attempts: int,
+            backoff: float,
+            max_backoff: float,
+            global_limit: int,
+            global_window: float = 60,
+            max_chats: int = 10_000,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.free_attempts = free_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.global_limit = global_limit
+        self.global_window = global_window
+        self.max_chats = max_chats
+        self.clock = clock
+        self.failures = OrderedDict()
+        self.attempts = deque()
+
+    async def acquire(self, chat_id: int) -> float:
+        """
+        Register a password attempt of the chat.
+
+        Returns 0 if the attempt is allowed, or the number of seconds
+        to wait before the next one.
+        """
+        now = self.clock()
+        _, retry_at = self.failures.get(chat_id, (0, now))
+        if retry_at > now:
+            return retry_at - now
+
+        while self.attempts and self.attempts[0] <= now - self.global_window:
+            self.attempts.popleft()
+        if len(self.attempts) >= self.global_limit:
+            return self.attempts[0] + self.global_window - now
+
+        self.attempts.append(now)
+        return 0
+
+    async def record_failure(self, chat_id: int) -> None:
+        count, _ = self.failures.pop(chat_id, (0, 0))
+        count += 1
+        retry_at = 0
+        if count >= self.free_attempts:
+            retry_at = self.clock() + min(
+                self.backoff * 2 ** (count - self.free_attempts),
+                self.max_backoff,
+            )
+        self.failures[chat_id] = (count, retry_at)
+        while len(self.failures) > self.max_chats:
+            self.failures.popitem(last=False)
+
+    async def record_success(self, chat_id: int) -> None:
+        self.failures.pop(chat_id, None)
+
+
+class RedisLoginThrottle(LoginThrottle):
+    """
+    Login throttle in Redis, shared by all bot processes.
+
+    Attempts of all chats are counted per window with INCR and EXPIRE,
+    and a chat waiting after a failure has a key expiring when it may
+    try again. Failures of a chat are forgotten `failure_ttl` seconds
+    after the last one.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            free_attempts: int,
+            backoff: float,
+            max_backoff: float,
+            global_limit: int,
+            global_window: float = 60,
+            failure_ttl: int = 24 * 60 * 60,
+            prefix: str = "telegram:login",
+    ) -> None:
+        super().__init__(
+            free_attempts, backoff, max_backoff, global_limit, global_window
+        )
+        self.redis = redis
+        self.failure_ttl = failure_ttl
+        self.prefix = prefix
+
+    def get_key(self, name: str, chat_id: int = None) -> str:
+        key = f"{self.prefix}:{name}"
+        return key if chat_id is None else f"{key}:{chat_id}"
+
+    async def acquire(self, chat_id: int) -> float:
+        wait = await self.redis.pttl(self.get_key("retry", chat_id))
+        if wait > 0:
+            return wait / 1000
+
+        key = self.get_key("attempts")
+        attempts = await self.redis.incr(key)
+        await self.redis.expire(key, math.ceil(self.global_window), nx=True)
+        if attempts > self.global_limit:
+            return max(await self.redis.pttl(key), 0) / 1000
+        return 0
+
+    async def record_failure(self, chat_id: int) -> None:
+        key = self.get_key("failures", chat_id)
+        count = await self.redis.incr(key)
+        await self.redis.expire(key, self.failure_ttl)
+        if count >= self.free_attempts:
+            backoff = min(
+                self.backoff * 2 ** (count - self.free_attempts),
+                self.max_backoff,
+            )
+            await self.redis.set(
+                self.get_key("retry", chat_id), count, px=int(backoff * 1000)
+            )
+
+    async def record_success(self, chat_id: int) -> None:
+        await self.redis.delete(
+            self.get_key("failures", chat_id), self.get_key("retry", chat_id)
+        )
+
+
+@cache
+def get_login_throttle() -> LoginThrottle:
+    """
+    Build the throttle configured in `TELEGRAM_BOT["LOGIN_THROTTLE"]`.
+
+    It is kept in Redis when the sessions are, so limits hold across
+    all bot processes.
+    """
+    options = settings.TELEGRAM_BOT["LOGIN_THROTTLE"]
+    sessions = get_session_store()
+    if isinstance(sessions, RedisSessionStore):
+        return RedisLoginThrottle(sessions.redis, **options)
+    return LoginThrottle(**options)
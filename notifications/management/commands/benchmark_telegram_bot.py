@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import uvicorn
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from telegram import Bot
+
+from notifications.bot import get_bot
+from notifications.dispatcher import UpdateDispatcher, poll_updates
+from notifications.fake_telegram import FakeTelegram, FakeTelegramServer
+from notifications.handlers import handle_update
+from notifications.sessions import get_session_store
+from notifications.webhook import build_webhook_server
+
+WEBHOOK_OPTIONS = {
+    "WEBHOOK_URL": "http://127.0.0.1/telegram/webhook/",
+    "WEBHOOK_SECRET": "benchmark",
+    "WEBHOOK_HOST": "127.0.0.1",
+    "WEBHOOK_PORT": 0,
+    "MAX_PENDING_UPDATES": 1000,
+}
+
+CONVERSATION = (
+    ("/start", "Please enter your email:"),
+    ("admin@benchmark.local", "Please enter your password:"),
+)
+
+
+class Command(BaseCommand):
+    """
+    Command to benchmark the update dispatcher of the Telegram bot
+    against a local fake Bot API server.
+    """
+    help = (
+        "Queue login conversations of many chats on a fake Bot API server, "
+        "run the bot until every message is answered and report throughput "
+        "and whether replies kept the order of each chat."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--chats", type=int, default=500)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.TELEGRAM_BOT["CONCURRENCY"],
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=int,
+            default=50,
+            help="Delay added to every fake Bot API call.",
+        )
+        parser.add_argument(
+            "--webhook",
+            action="store_true",
+            help="Receive updates through a webhook instead of polling.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=120,
+            help="Give up after this many seconds.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        server = FakeTelegramServer(
+            telegram_state=FakeTelegram(latency=options["latency_ms"] / 1000)
+        )
+        server.start()
+        chat_ids = range(1, options["chats"] + 1)
+        try:
+            with override_settings(
+                TELEGRAM_API_BASE=server.url,
+                TELEGRAM_BOT_TOKEN="123456:benchmark",
+            ):
+                asyncio.run(
+                    self.run_benchmark(server.telegram, chat_ids, options)
+                )
+        finally:
+            server.stop()
+
+    async def run_benchmark(
+            self, telegram: FakeTelegram, chat_ids: range, options: dict
+    ) -> None:
+        for text, _ in CONVERSATION:
+            for chat_id in chat_ids:
+                telegram.add_message(chat_id, text)
+        expected = len(chat_ids) * len(CONVERSATION)
+
+        bot = get_bot(connection_pool_size=options["concurrency"])
+        dispatcher = UpdateDispatcher(handle_update, options["concurrency"])
+        async with bot:
+            started = time.perf_counter()
+            if options["webhook"]:
+                server = build_webhook_server(
+                    bot, dispatcher, WEBHOOK_OPTIONS
+                )
+                receiving = await self.start_webhook(bot, server)
+            else:
+                receiving = asyncio.create_task(
+                    poll_updates(bot, dispatcher, timeout=1)
+                )
+            answered = await asyncio.to_thread(
+                telegram.wait_for_messages, expected, options["timeout"]
+            )
+            elapsed = time.perf_counter() - started
+            if options["webhook"]:
+                await bot.delete_webhook()
+                server.should_exit = True
+                await receiving
+            else:
+                receiving.cancel()
+            await dispatcher.join()
+
+        sessions = get_session_store()
+        for chat_id in chat_ids:
+            await sessions.delete(chat_id)
+
+        if not answered:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Only {len(telegram.sent_messages)}/{expected} updates "
+                    f"answered in {options['timeout']}s"
+                )
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Bot updates: {expected} updates of {len(chat_ids)} chats "
+                f"in {elapsed:.2f}s ({expected / elapsed:.1f} updates/s)"
+            )
+        )
+        if not options["webhook"]:
+            self.stdout.write(
+                f"  getUpdates calls: {telegram.calls.get('getUpdates', 0)}"
+            )
+        self.stdout.write(
+            f"  chats answered out of order: "
+            f"{self.count_out_of_order(telegram, chat_ids)}"
+        )
+
+    async def start_webhook(
+            self, bot: Bot, server: uvicorn.Server
+    ) -> asyncio.Task:
+        """Serve the webhook on a free port and point the bot to it."""
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        await bot.set_webhook(
+            url=f"http://127.0.0.1:{port}/telegram/webhook/",
+            secret_token=WEBHOOK_OPTIONS["WEBHOOK_SECRET"],
+        )
+        return serving
+
+    def count_out_of_order(
+            self, telegram: FakeTelegram, chat_ids: range
+    ) -> int:
+        replies = {chat_id: [] for chat_id in chat_ids}
+        for message in telegram.sent_messages:
+            replies[message["chat"]["id"]].append(message["text"])
+        expected = [reply for _, reply in CONVERSATION]
+        return sum(texts != expected for texts in replies.values())
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+class Command(BaseCommand):
+    help = (
+        "Create interval schedules for refreshing the snapshots the admin "
+        "commands of the Telegram bot answer from, for sending borrowing "
+        "reminders and for purging old deliveries."
+    )
+
+    def handle(self, *args, **kwargs) -> None:
+        schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=1, period=IntervalSchedule.MINUTES
+        )
+
+        task, created = PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name="Refresh bot snapshots each minute",
+            task="notifications.tasks.refresh_bot_snapshots",
+        )
+
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS("Successfully created interval task")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Interval task already exists")
+            )
+
+        schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=15, period=IntervalSchedule.MINUTES
+        )
+
+        task, created = PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name="Send borrowing reminders each 15 minutes",
+            task="borrowings.tasks.send_borrowing_reminders",
+        )
+
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS("Successfully created reminder task")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Reminder task already exists")
+            )
+
+        schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=1, period=IntervalSchedule.DAYS
+        )
+
+        task, created = PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name="Purge old deliveries each day",
+            task="notifications.tasks.purge_deliveries",
+        )
+
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS("Successfully created purge task")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Purge task already exists")
+            )
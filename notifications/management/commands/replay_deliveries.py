@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import RedisError
+
+from notifications.ledger import replay_deliveries
+from payments.management.commands.reconcile_payments import (
+    parse_aware_datetime,
+)
+
+
+class Command(BaseCommand):
+    """
+    Command to queue failed Telegram deliveries again.
+    """
+    help = (
+        "Queue deliveries which failed for the delivery worker to send "
+        "them again."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--since",
+            type=parse_aware_datetime,
+            help="Replay deliveries which failed after this moment, "
+                 "ex. 2024-10-01T00:00.",
+        )
+        parser.add_argument(
+            "--event-type",
+            help="Replay deliveries of this event type only, "
+                 "ex. payment_paid.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=1000,
+            help="Maximum number of deliveries to replay.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        try:
+            replayed = replay_deliveries(
+                options["since"], options["event_type"], options["limit"]
+            )
+        except RedisError as error:
+            raise CommandError(f"Could not queue deliveries: {error}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Replayed {replayed} failed deliveries")
+        )
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-19 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("borrowings", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BorrowingReminder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day_offset", models.SmallIntegerField()),
+                ("bucket", models.BigIntegerField(db_index=True)),
+                (
+                    "borrowing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reminders",
+                        to="borrowings.borrowing",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("borrowing", "day_offset"),
+                        name="unique_borrowing_reminder",
+                    )
+                ],
+            },
+        ),
+    ]
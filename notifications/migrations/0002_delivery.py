@@ -0,0 +1,66 @@
+# Generated by Django 5.1.2 on 2026-10-19 09:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Delivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_id", models.CharField(max_length=255)),
+                ("chat_id", models.BigIntegerField()),
+                ("event_type", models.CharField(max_length=64)),
+                ("text", models.TextField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("SENT", "Sent"),
+                            ("FAILED", "Failed"),
+                            ("BLOCKED", "Blocked"),
+                            ("REPLAYED", "Replayed"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("latency", models.FloatField(blank=True, null=True)),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "deliveries",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "updated_at"],
+                        name="notificatio_status_557065_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("event_id", "chat_id"), name="unique_delivery"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_delivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="delivery",
+            name="message_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="delivery",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("SENT", "Sent"),
+                    ("FAILED", "Failed"),
+                    ("BLOCKED", "Blocked"),
+                    ("REPLAYED", "Replayed"),
+                ],
+                max_length=10,
+            ),
+        ),
+    ]
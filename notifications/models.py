@@ -0,0 +1,75 @@
+from django.db import models
+from django.utils import timezone
+
+from borrowings.models import Borrowing
+
+
+class BorrowingReminder(models.Model):
+    """
+    A pending reminder about the due date of a borrowing.
+
+    Reminders are kept in time buckets (see
+    `notifications.reminders.get_bucket`) and deleted as soon as they
+    are sent or the book is returned, so the table holds only pending
+    reminders and a tick reads just the buckets which are due.
+    """
+
+    borrowing = models.ForeignKey(
+        Borrowing, on_delete=models.CASCADE, related_name="reminders"
+    )
+    # Days relative to the expected return date
+    day_offset = models.SmallIntegerField()
+    bucket = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["borrowing", "day_offset"],
+                name="unique_borrowing_reminder",
+            )
+        ]
+
+    def __str__(self):
+        return f"Reminder of borrowing {self.borrowing_id} ({self.day_offset})"
+
+
+class Delivery(models.Model):
+    """
+    The outcome of delivering a notification event to a chat.
+
+    The unique `event_id` and `chat_id` pair makes delivery idempotent:
+    an event is sent to a chat at most once, however many times it is
+    queued. Events waiting in a digest buffer are pending. Failed
+    deliveries can be replayed (see the `replay_deliveries` command).
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+        BLOCKED = "BLOCKED", "Blocked"
+        REPLAYED = "REPLAYED", "Replayed"
+
+    event_id = models.CharField(max_length=255)
+    chat_id = models.BigIntegerField()
+    event_type = models.CharField(max_length=64)
+    text = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Seconds from queueing the event to its delivery
+    latency = models.FloatField(null=True, blank=True)
+    # Telegram message which carried the event, alone or in a digest
+    message_id = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event_id", "chat_id"], name="unique_delivery"
+            )
+        ]
+        indexes = [models.Index(fields=["status", "updated_at"])]
+        verbose_name_plural = "deliveries"
+
+    def __str__(self):
+        return f"{self.event_id} to {self.chat_id} ({self.status})"
@@ -0,0 +1,106 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from borrowings.models import Borrowing
+from notifications.models import BorrowingReminder
+from notifications.tasks import BORROWING_REMINDER, send_telegram_message
+
+
+def get_bucket(moment: datetime) -> int:
+    return int(
+        moment.timestamp() // settings.BORROWING_REMINDERS["BUCKET_SECONDS"]
+    )
+
+
+def get_remind_at(borrowing: Borrowing, day_offset: int) -> datetime:
+    hour, minute = map(int, settings.BORROWING_REMINDERS["AT"].split(":"))
+    # The borrowing may have just been created from a date string
+    due = Borrowing._meta.get_field("expected_return_date").to_python(
+        borrowing.expected_return_date
+    )
+    day = due + timedelta(days=day_offset)
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+def schedule_reminders(borrowing: Borrowing) -> None:
+    """
+    Schedule the reminders of a new borrowing.
+
+    Reminders which would be due already are skipped.
+    """
+    now = timezone.now()
+    BorrowingReminder.objects.bulk_create(
+        [
+            BorrowingReminder(
+                borrowing=borrowing,
+                day_offset=day_offset,
+                bucket=get_bucket(remind_at),
+            )
+            for day_offset in settings.BORROWING_REMINDERS["DAYS"]
+            if (remind_at := get_remind_at(borrowing, day_offset)) > now
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def cancel_reminders(borrowing: Borrowing) -> None:
+    BorrowingReminder.objects.filter(borrowing=borrowing).delete()
+
+
+def build_reminder_text(reminder: BorrowingReminder) -> str:
+    borrowing = reminder.borrowing
+    title = borrowing.book.title
+    due = borrowing.expected_return_date
+    days = abs(reminder.day_offset)
+    if reminder.day_offset < 0:
+        return (
+            f'Reminder: "{title}" is due in {days} day(s), on {due}.'
+        )
+    if reminder.day_offset == 0:
+        return f'Reminder: "{title}" is due today.'
+    return (
+        f'"{title}" was due on {due}, {days} day(s) ago. Please, return '
+        f"it: a fine is charged for every overdue day."
+    )
+
+
+def send_due_reminders(now: datetime = None) -> int:
+    """
+    Queue the reminders of all buckets up to the current one.
+
+    Reminders are sent to borrowers who linked their Telegram chat and
+    deleted in batches of `BATCH_SIZE`. Returns the number of queued
+    messages.
+    """
+    bucket = get_bucket(now or timezone.now())
+    batch_size = settings.BORROWING_REMINDERS["BATCH_SIZE"]
+    sent = 0
+    while True:
+        with transaction.atomic():
+            reminders = list(
+                BorrowingReminder.objects.filter(bucket__lte=bucket)
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("borrowing__book", "borrowing__user")
+                .order_by("bucket", "id")[:batch_size]
+            )
+            if not reminders:
+                return sent
+            for reminder in reminders:
+                chat_id = reminder.borrowing.user.telegram_chat_id
+                if chat_id is not None:
+                    send_telegram_message(
+                        build_reminder_text(reminder),
+                        BORROWING_REMINDER,
+                        chat_id=chat_id,
+                        event_id=(
+                            f"borrowing_reminder:{reminder.borrowing_id}:"
+                            f"{reminder.day_offset}"
+                        ),
+                    )
+                    sent += 1
+            BorrowingReminder.objects.filter(
+                id__in=[reminder.id for reminder in reminders]
+            ).delete()
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+import django
+from django.conf import settings
+from prometheus_client import start_http_server
+from redis.asyncio import Redis
+
+
+# Django Setup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_service.settings")
+
+django.setup()
+
+from notifications.bot import get_bot  # noqa: E402
+from notifications.delivery import DeliveryWorker  # noqa: E402
+
+# Logging Setup
+
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+)
+
+
+async def run_worker() -> None:
+    options = settings.TELEGRAM_DELIVERY
+    bot = get_bot(connection_pool_size=options["CONCURRENCY"])
+    redis = Redis.from_url(options["REDIS_URL"])
+    worker = DeliveryWorker(bot, redis, options)
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+
+    start_http_server(options["METRICS_PORT"])
+    async with bot:
+        await worker.run()
+    await redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,114 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import cache
+from typing import Callable
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from redis.asyncio import Redis
+
+
+class SessionStore(ABC):
+    """
+    Storage of bot conversation sessions keyed by chat id.
+
+    Sessions expire `ttl` seconds after their last update, so abandoned
+    conversations do not pile up.
+    """
+
+    def __init__(self, ttl: int) -> None:
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, chat_id: int) -> dict | None:
+        """Return the session of the chat, or None if it has none."""
+
+    @abstractmethod
+    async def set(self, chat_id: int, session: dict) -> None:
+        """Store the session of the chat and restart its `ttl`."""
+
+    @abstractmethod
+    async def delete(self, chat_id: int) -> None:
+        """Forget the session of the chat."""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions in the memory of a single bot process.
+
+    At most `max_size` sessions are kept: when the store is full, the
+    least recently used session is evicted.
+    """
+
+    def __init__(
+            self,
+            ttl: int,
+            max_size: int,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(ttl)
+        self.max_size = max_size
+        self.clock = clock
+        self.sessions = OrderedDict()
+
+    async def get(self, chat_id: int) -> dict | None:
+        if chat_id not in self.sessions:
+            return None
+        expires_at, session = self.sessions[chat_id]
+        if expires_at <= self.clock():
+            del self.sessions[chat_id]
+            return None
+        self.sessions.move_to_end(chat_id)
+        return dict(session)
+
+    async def set(self, chat_id: int, session: dict) -> None:
+        self.sessions[chat_id] = (self.clock() + self.ttl, dict(session))
+        self.sessions.move_to_end(chat_id)
+        while len(self.sessions) > self.max_size:
+            self.sessions.popitem(last=False)
+
+    async def delete(self, chat_id: int) -> None:
+        self.sessions.pop(chat_id, None)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions in Redis, shared by all bot processes.
+
+    Every session is a key expiring after `ttl` seconds; the memory
+    used by Redis is capped by its `maxmemory` policy.
+    """
+
+    def __init__(
+            self, ttl: int, url: str, prefix: str = "telegram:session"
+    ) -> None:
+        super().__init__(ttl)
+        self.redis = Redis.from_url(url)
+        self.prefix = prefix
+
+    def get_key(self, chat_id: int) -> str:
+        return f"{self.prefix}:{chat_id}"
+
+    async def get(self, chat_id: int) -> dict | None:
+        session = await self.redis.get(self.get_key(chat_id))
+        return session and json.loads(session)
+
+    async def set(self, chat_id: int, session: dict) -> None:
+        await self.redis.set(
+            self.get_key(chat_id), json.dumps(session), ex=self.ttl
+        )
+
+    async def delete(self, chat_id: int) -> None:
+        await self.redis.delete(self.get_key(chat_id))
+
+
+@cache
+def get_session_store() -> SessionStore:
+    """Build the session store configured in `TELEGRAM_BOT["SESSIONS"]`."""
+    config = settings.TELEGRAM_BOT["SESSIONS"]
+    return import_string(config["BACKEND"])(**config["OPTIONS"])
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from borrowings.models import Borrowing
+from notifications.reminders import cancel_reminders, schedule_reminders
+from notifications.utils import publish_admin_chats_changed
+
+User = get_user_model()
+
+
+def get_admin_chat_state(user: User) -> tuple:
+    # Deferred fields are not loaded just to remember them
+    return (
+        user.__dict__.get("is_staff"),
+        user.__dict__.get("telegram_chat_id"),
+    )
+
+
+def is_admin_chat(state: tuple) -> bool:
+    is_staff, telegram_chat_id = state
+    return bool(is_staff) and telegram_chat_id is not None
+
+
+@receiver(post_init, sender=User)
+def remember_admin_chat_state(sender: type, instance: User, **kwargs) -> None:
+    instance._admin_chat_state = get_admin_chat_state(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_admin_chats_on_save(
+        sender: type, instance: User, created: bool, **kwargs
+) -> None:
+    state = get_admin_chat_state(instance)
+    if created:
+        changed = is_admin_chat(state)
+    else:
+        changed = state != instance._admin_chat_state
+    instance._admin_chat_state = state
+    if changed:
+        transaction.on_commit(publish_admin_chats_changed)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_admin_chats_on_delete(
+        sender: type, instance: User, **kwargs
+) -> None:
+    if is_admin_chat(instance._admin_chat_state):
+        transaction.on_commit(publish_admin_chats_changed)
+
+
+@receiver(post_save, sender=Borrowing)
+def update_borrowing_reminders(
+        sender: type, instance: Borrowing, created: bool, **kwargs
+) -> None:
+    if instance.actual_return_date is not None:
+        cancel_reminders(instance)
+    elif created:
+        schedule_reminders(instance)
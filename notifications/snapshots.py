@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from books.models import Book
+from borrowings.models import Borrowing
+from payments.models import Payment
+from payments.reports import format_money
+
+OVERDUE = "overdue"
+PENDING_PAYMENTS = "pending_payments"
+STATS = "stats"
+
+
+def get_overdue_borrowings():
+    return Borrowing.objects.filter(
+        expected_return_date__lt=timezone.now().date(),
+        actual_return_date__isnull=True,
+    )
+
+
+def build_overdue() -> dict:
+    borrowings = get_overdue_borrowings()
+    return {
+        "count": borrowings.count(),
+        "rows": list(
+            borrowings.order_by("expected_return_date", "id").values(
+                "id", "expected_return_date", "book__title", "user__email"
+            )[: settings.TELEGRAM_BOT["SNAPSHOT_MAX_ROWS"]]
+        ),
+    }
+
+
+def build_pending_payments() -> dict:
+    payments = Payment.objects.filter(status=Payment.Status.PENDING)
+    return {
+        "count": payments.count(),
+        "rows": [
+            {**row, "money_to_pay": format_money(row["money_to_pay"])}
+            for row in payments.order_by("created_at", "id").values(
+                "id",
+                "type",
+                "money_to_pay",
+                "borrowing__book__title",
+                "borrowing__user__email",
+            )[: settings.TELEGRAM_BOT["SNAPSHOT_MAX_ROWS"]]
+        ],
+    }
+
+
+def build_stats() -> dict:
+    books = Book.objects.aggregate(titles=Count("id"), copies=Sum("inventory"))
+    borrowings = Borrowing.objects.filter(
+        actual_return_date__isnull=True
+    ).aggregate(
+        active=Count("id"),
+        overdue=Count(
+            "id",
+            filter=Q(expected_return_date__lt=timezone.now().date()),
+        ),
+    )
+    payments = Payment.objects.aggregate(
+        pending=Count("id", filter=Q(status=Payment.Status.PENDING)),
+        pending_total=Sum(
+            "money_to_pay", filter=Q(status=Payment.Status.PENDING)
+        ),
+        paid_total=Sum("money_to_pay", filter=Q(status=Payment.Status.PAID)),
+    )
+    return {
+        "titles": books["titles"],
+        "copies": books["copies"] or 0,
+        **borrowings,
+        "pending_payments": payments["pending"],
+        "pending_total": format_money(payments["pending_total"]),
+        "paid_total": format_money(payments["paid_total"]),
+    }
+
+
+def build_book_search(query: str) -> dict:
+    # Served by the trigram index on the title on PostgreSQL
+    books = Book.objects.filter(title__icontains=query)
+    return {
+        "count": books.count(),
+        "rows": list(
+            books.order_by("title", "id").values(
+                "id", "title", "author", "inventory"
+            )[: settings.TELEGRAM_BOT["SNAPSHOT_MAX_ROWS"]]
+        ),
+    }
+
+
+BUILDERS = {
+    OVERDUE: build_overdue,
+    PENDING_PAYMENTS: build_pending_payments,
+    STATS: build_stats,
+}
+
+
+def get_snapshot_key(name: str) -> str:
+    return f"notifications:snapshot:{name}"
+
+
+def get_book_search_key(query: str) -> str:
+    digest = hashlib.sha256(query.encode()).hexdigest()
+    return get_snapshot_key(f"books:{digest}")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def store_snapshot(key: str, data) -> dict:
+    snapshot = {"refreshed_at": timezone.now(), "data": data}
+    cache.set(key, snapshot, settings.TELEGRAM_BOT["SNAPSHOT_TIMEOUT"])
+    return snapshot
+
+
+def refresh_snapshot(name: str) -> dict:
+    """Query the data of the snapshot `name` and store it in the cache."""
+    return store_snapshot(get_snapshot_key(name), BUILDERS[name]())
+
+
+def refresh_book_search(query: str) -> dict:
+    """Search books by title and store the result in the cache."""
+    return store_snapshot(
+        get_book_search_key(query), build_book_search(query)
+    )
+
+
+def refresh_snapshots() -> None:
+    for name in BUILDERS:
+        refresh_snapshot(name)
+
+
+snapshot_locks = defaultdict(asyncio.Lock)
+
+
+async def get_snapshot(name: str) -> dict:
+    """
+    Return the snapshot `name` from the cache.
+
+    Snapshots are refreshed periodically by a Celery task, so bot
+    commands never query the tables. A missing snapshot is built once,
+    however many chats ask for it at the same time.
+    """
+    key = get_snapshot_key(name)
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        async with snapshot_locks[name]:
+            snapshot = await cache.aget(key)
+            if snapshot is None:
+                snapshot = await sync_to_async(refresh_snapshot)(name)
+    return snapshot
+
+
+async def search_books(query: str) -> dict:
+    """
+    Return the books with the normalised `query` in their title.
+
+    Searches query the database, and their results are cached per query
+    like snapshots.
+    """
+    snapshot = await cache.aget(get_book_search_key(query))
+    if snapshot is None:
+        snapshot = await sync_to_async(refresh_book_search)(query)
+    return snapshot
@@ -1,39 +1,67 @@
-import asyncio
 import logging
+from datetime import timedelta
 
-from telegram.error import Forbidden
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from redis.exceptions import RedisError
 
-from notifications.run_telegram_bot import BOT
-from notifications.utils import get_admin_chat_ids, remove_chat_id
+from library_service.instrumentation import track
+from notifications.delivery_queue import enqueue_message
+from notifications.models import Delivery
+from notifications.snapshots import refresh_snapshots
 
+logger = logging.getLogger(__name__)
 
-async def send_telegram_message_async(message: str) -> None:
-    admin_chats = await get_admin_chat_ids()
+BORROWING_CREATED = "borrowing_created"
+BORROWING_OVERDUE = "borrowing_overdue"
+PAYMENT_PAID = "payment_paid"
+BORROWING_REMINDER = "borrowing_reminder"
 
-    if not admin_chats:
-        logging.warning("No admin chats to send messages to.")
-        return
 
-    for chat_id in admin_chats:
-        try:
-            await BOT.send_message(chat_id=chat_id, text=message)
-            logging.info(f"Message sent to chat ID: {chat_id}")
-        except Forbidden as e:
-            logging.warning(
-                f"Bot was blocked by user with chat ID: {chat_id}. "
-                f"Removing from the list."
-            )
-            await remove_chat_id(chat_id)
+def send_telegram_message(
+        message: str,
+        event_type: str = "default",
+        chat_id: int = None,
+        event_id: str = None,
+) -> None:
+    """
+    Queue a notification for admin chats, or for `chat_id` only.
 
-
-def send_telegram_message(message: str) -> None:
+    The message is sent by the delivery worker, so callers never wait
+    for Telegram. Messages of the same `event_type` may be combined into
+    a digest. An `event_id` identifying the event keeps it from being
+    sent to a chat twice when the caller runs again. A failure to queue
+    it is logged and does not break the calling request or task.
+    """
     try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError as e:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    if loop.is_running():
-        asyncio.ensure_future(send_telegram_message_async(message))
-    else:
-        loop.run_until_complete(send_telegram_message_async(message))
+        with track("telegram"):
+            enqueue_message(message, event_type, chat_id, event_id)
+    except RedisError:
+        logger.exception("Could not queue Telegram message")
+
+
+@shared_task
+def refresh_bot_snapshots() -> None:
+    """Refresh the snapshots the admin commands of the bot answer from."""
+    refresh_snapshots()
+
+
+@shared_task
+def purge_deliveries() -> int:
+    """
+    Delete deliveries older than `LEDGER["RETENTION_DAYS"]` in batches,
+    so the ledger stays small. Returns the number of deleted rows.
+    """
+    options = settings.TELEGRAM_DELIVERY["LEDGER"]
+    cutoff = timezone.now() - timedelta(days=options["RETENTION_DAYS"])
+    deleted = 0
+    while True:
+        ids = list(
+            Delivery.objects.filter(updated_at__lt=cutoff).values_list(
+                "id", flat=True
+            )[: options["PURGE_BATCH_SIZE"]]
+        )
+        if not ids:
+            return deleted
+        deleted += Delivery.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,218 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from books.models import Book
+from borrowings.models import Borrowing
+from notifications.commands import (
+    NOT_AN_ADMIN,
+    build_page,
+    handle_callback_query,
+    handle_command,
+)
+from notifications.snapshots import OVERDUE, STATS, get_snapshot
+from payments.models import Payment
+
+CHAT_ID = 42
+
+
+def build_message(text: str) -> MagicMock:
+    return MagicMock(chat_id=CHAT_ID, text=text, reply_text=AsyncMock())
+
+
+def build_callback_query(data: str) -> MagicMock:
+    return MagicMock(
+        data=data,
+        message=MagicMock(chat=MagicMock(id=CHAT_ID)),
+        answer=AsyncMock(),
+        edit_message_text=AsyncMock(),
+    )
+
+
+@override_settings(
+    TELEGRAM_BOT={
+        "SNAPSHOT_TIMEOUT": 60,
+        "SNAPSHOT_MAX_ROWS": 100,
+        "PAGE_SIZE": 2,
+    }
+)
+@patch(
+    "notifications.commands.get_admin_chat_ids",
+    new_callable=AsyncMock,
+    return_value=frozenset({CHAT_ID}),
+)
+class TestAdminCommands(TestCase):
+    """Test cases for the admin commands of the bot."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        Payment.objects.all().delete()
+        today = timezone.now().date()
+        user = get_user_model().objects.create_user(
+            email="reader@example.com", password="1qazcde3"
+        )
+        for number in range(5):
+            book = Book.objects.create(
+                title=f"Dune {number}",
+                author="Frank Herbert",
+                cover="HARD",
+                inventory=3,
+                daily_fee=1,
+            )
+            borrowing = Borrowing.objects.create(
+                borrow_date=today - timedelta(days=10),
+                expected_return_date=today - timedelta(days=5 - number),
+                book=book,
+                user=user,
+            )
+        Payment.objects.create(
+            status=Payment.Status.PENDING,
+            type=Payment.Type.FINE,
+            borrowing=borrowing,
+            money_to_pay=5,
+        )
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_snapshot_is_served_from_cache(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        snapshot = async_to_sync(get_snapshot)(OVERDUE)
+
+        with self.assertNumQueries(0):
+            cached = async_to_sync(get_snapshot)(OVERDUE)
+
+        self.assertEqual(cached, snapshot)
+        self.assertEqual(
+            [row["book__title"] for row in snapshot["data"]["rows"]],
+            ["Dune 0", "Dune 1", "Dune 2", "Dune 3", "Dune 4"],
+        )
+
+    def test_due_today_is_not_overdue(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        Borrowing.objects.filter(book__title="Dune 4").update(
+            expected_return_date=timezone.now().date()
+        )
+
+        snapshot = async_to_sync(get_snapshot)(STATS)
+
+        self.assertEqual(snapshot["data"]["active"], 5)
+        self.assertEqual(snapshot["data"]["overdue"], 4)
+        self.assertEqual(snapshot["data"]["pending_total"], "5.00")
+
+    def test_command_replies_with_first_page(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        message = build_message("/overdue")
+
+        async_to_sync(handle_command)(message)
+
+        text = message.reply_text.await_args.args[0]
+        keyboard = message.reply_text.await_args.kwargs["reply_markup"]
+        self.assertIn("Dune 0", text)
+        self.assertNotIn("Dune 2", text)
+        self.assertIn("Page 1 of 3", text)
+        self.assertEqual(
+            [button.callback_data for button in keyboard.inline_keyboard[0]],
+            ["overdue:2"],
+        )
+
+    def test_callback_query_shows_requested_page(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        callback_query = build_callback_query("book:dune:3")
+
+        async_to_sync(handle_callback_query)(callback_query)
+
+        callback_query.answer.assert_awaited_once_with()
+        text = callback_query.edit_message_text.await_args.args[0]
+        self.assertIn("Dune 4", text)
+        self.assertIn("Page 3 of 3", text)
+
+    @override_settings(
+        TELEGRAM_BOT={
+            "SNAPSHOT_TIMEOUT": 60,
+            "SNAPSHOT_MAX_ROWS": 2,
+            "PAGE_SIZE": 2,
+        }
+    )
+    def test_capped_results_show_the_real_count(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        message = build_message("/overdue")
+
+        async_to_sync(handle_command)(message)
+
+        text = message.reply_text.await_args.args[0]
+        self.assertIn("(5):", text)
+        self.assertIn("Showing the first 2 results.", text)
+
+    @override_settings(
+        TELEGRAM_BOT={
+            "SNAPSHOT_TIMEOUT": 60,
+            "SNAPSHOT_MAX_ROWS": 2,
+            "PAGE_SIZE": 2,
+        }
+    )
+    def test_book_search_is_not_limited_to_a_snapshot(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        message = build_message("/book  DUNE   4")
+
+        async_to_sync(handle_command)(message)
+        with self.assertNumQueries(0):
+            async_to_sync(handle_command)(build_message("/book dune 4"))
+
+        text = message.reply_text.await_args.args[0]
+        self.assertIn('Books matching "dune 4"', text)
+        self.assertIn("Dune 4 by Frank Herbert", text)
+
+    def test_book_requires_title(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        message = build_message("/book ")
+
+        async_to_sync(handle_command)(message)
+
+        message.reply_text.assert_awaited_once_with("Usage: /book <title>")
+
+    def test_command_is_refused_to_non_admins(
+            self, mock_get_admin_chat_ids: AsyncMock
+    ) -> None:
+        mock_get_admin_chat_ids.return_value = frozenset()
+        message = build_message("/stats")
+
+        with self.assertNumQueries(0):
+            async_to_sync(handle_command)(message)
+
+        message.reply_text.assert_awaited_once_with(NOT_AN_ADMIN)
+
+
+@override_settings(TELEGRAM_BOT={"PAGE_SIZE": 10})
+class TestBuildPage(SimpleTestCase):
+    """Test cases for paginating the answers of the bot."""
+
+    def test_middle_page_links_both_neighbours(self) -> None:
+        rows = [f"Row {number}" for number in range(25)]
+
+        text, keyboard = build_page("Rows", rows, 2, "rows:")
+
+        self.assertIn("Row 10", text)
+        self.assertNotIn("Row 20", text)
+        self.assertEqual(
+            [button.callback_data for button in keyboard.inline_keyboard[0]],
+            ["rows:1", "rows:3"],
+        )
+
+    def test_single_page_has_no_keyboard(self) -> None:
+        text, keyboard = build_page("Rows", [], 5, "rows:")
+
+        self.assertIn("Nothing found.", text)
+        self.assertIsNone(keyboard)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.test import SimpleTestCase
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from notifications.delivery import DeliveryWorker, RateLimiter
+from notifications.delivery_queue import build_message
+from notifications.ledger import TAKEN_STATUSES, DeliveryLedger
+from notifications.models import Delivery
+from notifications.tasks import send_telegram_message
+
+TEST_OPTIONS = {
+    "QUEUE_KEY": "notifications:test",
+    "CONCURRENCY": 5,
+    "GLOBAL_RATE": 1000,
+    "CHAT_RATE": 1000,
+    "MAX_ATTEMPTS": 3,
+    "MAX_BACKOFF": 0,
+    "ADMIN_CHATS_CHANNEL": "notifications:test-admin-chats",
+    "LEDGER": {"BATCH_SIZE": 100, "FLUSH_INTERVAL": 0.01},
+    "POLICIES": {
+        "default": {"mode": "immediate"},
+        "payment_paid": {
+            "mode": "batched",
+            "window": 60,
+            "max_size": 20,
+            "title": "Successful payments",
+        },
+    },
+}
+ADMIN_CHAT_IDS = {1, 2, 3}
+
+
+class MemoryLedger(DeliveryLedger):
+    """Delivery ledger keeping saved deliveries in memory."""
+
+    def __init__(self) -> None:
+        super().__init__(batch_size=100)
+        self.saved = {}
+
+    def get_taken_chat_ids(self, event_id: str) -> set[int]:
+        return {
+            chat_id
+            for (saved_event_id, chat_id), delivery in self.saved.items()
+            if saved_event_id == event_id
+            and delivery.status in TAKEN_STATUSES
+        }
+
+    def save(self, deliveries: list[Delivery]) -> None:
+        for delivery in deliveries:
+            self.saved[delivery.event_id, delivery.chat_id] = delivery
+
+
+class TestSendTelegramMessage(SimpleTestCase):
+    """Test cases for queueing Telegram notifications."""
+
+    @patch("notifications.delivery_queue.get_redis")
+    def test_message_is_queued(self, mock_get_redis: MagicMock) -> None:
+        send_telegram_message("Hello")
+
+        key, payload = mock_get_redis.return_value.rpush.call_args.args
+        message = json.loads(payload)
+        self.assertEqual(message["text"], "Hello")
+        self.assertIn("id", message)
+        self.assertIn("enqueued_at", message)
+
+
+class TestRateLimiter(SimpleTestCase):
+    """Test cases for spacing out Telegram requests."""
+
+    async def test_acquisitions_are_spaced_out(self) -> None:
+        limiter = RateLimiter(rate=20)
+        started_at = time.monotonic()
+
+        for _ in range(3):
+            await limiter.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.1)
+
+    async def test_pause_holds_back_acquisitions(self) -> None:
+        limiter = RateLimiter(rate=1000)
+        limiter.pause(0.1)
+        started_at = time.monotonic()
+
+        await limiter.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.09)
+
+
+@patch(
+    "notifications.delivery.get_admin_chat_ids",
+    AsyncMock(return_value=ADMIN_CHAT_IDS),
+)
+@patch("notifications.delivery.asyncio.sleep", AsyncMock())
+class TestDeliveryWorker(SimpleTestCase):
+    """Test cases for delivering queued notifications."""
+
+    def setUp(self) -> None:
+        self.sent = MagicMock(message_id=100)
+        self.bot = MagicMock(send_message=AsyncMock(return_value=self.sent))
+        self.redis = MagicMock()
+        self.ledger = MemoryLedger()
+        self.worker = DeliveryWorker(
+            self.bot, self.redis, TEST_OPTIONS, self.ledger
+        )
+        self.message = build_message("Hello")
+
+    def get_sent_chat_ids(self) -> list[int]:
+        return [
+            call.kwargs["chat_id"]
+            for call in self.bot.send_message.call_args_list
+        ]
+
+    async def test_message_is_sent_to_all_admin_chats(self) -> None:
+        await self.worker.deliver_message(self.message)
+
+        self.assertEqual(sorted(self.get_sent_chat_ids()), [1, 2, 3])
+
+    async def test_message_to_a_chat_is_sent_to_it_only(self) -> None:
+        await self.worker.deliver_message(build_message("Hello", chat_id=7))
+
+        self.assertEqual(self.get_sent_chat_ids(), [7])
+
+    async def test_event_is_sent_to_a_chat_once(self) -> None:
+        message = build_message("Hello", event_id="borrowing_created:1")
+
+        await asyncio.gather(
+            self.worker.deliver_message(message),
+            self.worker.deliver_message(message),
+        )
+        await self.ledger.flush()
+        await self.worker.deliver_message(message)
+
+        self.assertEqual(sorted(self.get_sent_chat_ids()), [1, 2, 3])
+
+    async def test_sent_message_id_is_recorded(self) -> None:
+        await self.worker.deliver(1, self.message)
+        await self.ledger.flush()
+
+        delivery = self.ledger.saved[self.message["id"], 1]
+        self.assertEqual(delivery.status, Delivery.Status.SENT)
+        self.assertEqual(delivery.message_id, 100)
+
+    async def test_buffered_event_is_recorded_as_pending(self) -> None:
+        self.redis.rpush = AsyncMock(return_value=1)
+        self.redis.zadd = AsyncMock()
+        message = build_message("Paid", "payment_paid", chat_id=1)
+
+        await self.worker.deliver_message(message)
+        await self.ledger.flush()
+        await self.worker.deliver_message(message)
+
+        self.bot.send_message.assert_not_awaited()
+        self.redis.rpush.assert_awaited_once()
+        delivery = self.ledger.saved[message["id"], 1]
+        self.assertEqual(delivery.status, Delivery.Status.PENDING)
+        self.assertEqual(delivery.attempts, 0)
+
+    async def test_failed_delivery_is_recorded(self) -> None:
+        self.bot.send_message.side_effect = [NetworkError("timeout")] * 3
+
+        await self.worker.deliver(1, self.message)
+        await self.ledger.flush()
+
+        delivery = self.ledger.saved[self.message["id"], 1]
+        self.assertEqual(delivery.status, Delivery.Status.FAILED)
+        self.assertEqual(delivery.attempts, 3)
+        self.assertIsNone(delivery.latency)
+
+    async def test_retry_after_is_respected(self) -> None:
+        self.bot.send_message.side_effect = [RetryAfter(5), self.sent]
+
+        with patch.object(self.worker.global_limiter, "pause") as mock_pause:
+            await self.worker.deliver(1, self.message)
+
+        mock_pause.assert_called_once_with(5)
+        self.assertEqual(self.get_sent_chat_ids(), [1, 1])
+
+    @patch("notifications.delivery.remove_chat_id", new_callable=AsyncMock)
+    async def test_blocked_chat_is_removed(
+            self, mock_remove_chat_id: AsyncMock
+    ) -> None:
+        self.bot.send_message.side_effect = Forbidden("blocked")
+
+        await self.worker.deliver(1, self.message)
+
+        mock_remove_chat_id.assert_awaited_once_with(1)
+
+    async def test_rejected_message_is_not_retried(self) -> None:
+        self.bot.send_message.side_effect = BadRequest("Chat not found")
+
+        await self.worker.deliver(1, self.message)
+
+        self.bot.send_message.assert_awaited_once()
+
+    async def test_run_delivers_queued_messages(self) -> None:
+        payload = json.dumps(self.message)
+
+        async def blpop(keys: list, timeout: int) -> tuple | None:
+            if self.redis.blpop.await_count > 1:
+                self.worker.stop()
+                return None
+            return keys[0], payload
+
+        self.redis.blpop = AsyncMock(side_effect=blpop)
+
+        with patch.object(self.worker, "listen_for_admin_changes"):
+            await self.worker.run()
+
+        self.assertEqual(len(self.get_sent_chat_ids()), 3)
+        self.assertEqual(
+            {delivery.status for delivery in self.ledger.saved.values()},
+            {Delivery.Status.SENT},
+        )
+
+    @patch("notifications.delivery.admin_chats")
+    async def test_admin_changes_invalidate_chat_ids(
+            self, mock_admin_chats: MagicMock
+    ) -> None:
+        invalidated = asyncio.Event()
+        mock_admin_chats.invalidate.side_effect = invalidated.set
+
+        async def listen() -> AsyncIterator[dict]:
+            yield {"type": "subscribe"}
+            yield {"type": "message", "data": b"changed"}
+            await asyncio.Future()
+
+        pubsub = self.redis.pubsub.return_value.__aenter__.return_value
+        pubsub.subscribe = AsyncMock()
+        pubsub.listen = listen
+        listener = asyncio.create_task(self.worker.listen_for_admin_changes())
+
+        await asyncio.wait_for(invalidated.wait(), timeout=1)
+        listener.cancel()
+
+        pubsub.subscribe.assert_awaited_once_with(
+            TEST_OPTIONS["ADMIN_CHATS_CHANNEL"]
+        )
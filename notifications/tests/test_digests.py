@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+from django.test import SimpleTestCase, override_settings
+
+from library_service.tests.utils import FakeClock
+from notifications.delivery_queue import build_message
+from notifications.digests import (
+    Coalescer,
+    build_digests,
+    get_next_daily_time,
+)
+
+TEST_POLICIES = {
+    "default": {"mode": "immediate"},
+    "borrowing_created": {
+        "mode": "batched",
+        "window": 60,
+        "max_size": 3,
+        "title": "New borrowings",
+    },
+    "payment_paid": {"mode": "daily", "at": "09:00", "max_size": 100},
+}
+
+
+class MemoryRedis:
+    """The Redis list and sorted set commands used by digests."""
+
+    def __init__(self) -> None:
+        self.lists = {}
+        self.sorted_sets = {}
+
+    async def rpush(self, key: str, *values: str) -> int:
+        self.lists.setdefault(key, []).extend(
+            value.encode() for value in values
+        )
+        return len(self.lists[key])
+
+    async def lpop(self, key: str, count: int) -> list[bytes] | None:
+        items = self.lists.get(key, [])
+        popped, self.lists[key] = items[:count], items[count:]
+        return popped or None
+
+    async def zadd(self, key: str, mapping: dict, nx: bool) -> int:
+        scores = self.sorted_sets.setdefault(key, {})
+        added = {
+            member: score
+            for member, score in mapping.items()
+            if not (nx and member in scores)
+        }
+        scores.update(added)
+        return len(added)
+
+    async def zrem(self, key: str, member: str) -> int:
+        return int(
+            self.sorted_sets.get(key, {}).pop(member, None) is not None
+        )
+
+    async def zrangebyscore(
+            self, key: str, minimum: str, maximum: float
+    ) -> list[bytes]:
+        return [
+            member.encode()
+            for member, score in self.sorted_sets.get(key, {}).items()
+            if score <= maximum
+        ]
+
+
+class TestCoalescer(SimpleTestCase):
+    """Test cases for combining notifications into digests."""
+
+    def setUp(self) -> None:
+        self.clock = FakeClock(1_000_000.0)
+        self.send = AsyncMock()
+        self.redis = MemoryRedis()
+        self.coalescer = Coalescer(
+            TEST_POLICIES, self.send, self.redis, clock=self.clock
+        )
+
+    def get_sent_texts(self) -> list[str]:
+        return [call.args[1]["text"] for call in self.send.await_args_list]
+
+    async def test_immediate_message_is_sent_at_once(self) -> None:
+        await self.coalescer.add(1, build_message("Hello"))
+
+        self.assertEqual(self.get_sent_texts(), ["Hello"])
+
+    async def test_batched_messages_are_sent_after_window(self) -> None:
+        for number in range(2):
+            await self.coalescer.add(
+                1, build_message(f"Borrowing {number}", "borrowing_created")
+            )
+        await self.coalescer.add(
+            2, build_message("Borrowing 0", "borrowing_created")
+        )
+        await self.coalescer.flush_due()
+        self.send.assert_not_awaited()
+
+        self.clock.now += 60
+        await self.coalescer.flush_due()
+
+        sent = {
+            call.args[0]: call.args[1]["text"]
+            for call in self.send.await_args_list
+        }
+        self.assertEqual(
+            sent[1], "New borrowings (2):\n\nBorrowing 0\n\nBorrowing 1"
+        )
+        self.assertEqual(sent[2], "Borrowing 0")
+
+    async def test_full_buffer_is_sent_early(self) -> None:
+        for number in range(3):
+            await self.coalescer.add(
+                1, build_message(f"Borrowing {number}", "borrowing_created")
+            )
+
+        self.send.assert_awaited_once()
+        await self.coalescer.flush_due()
+        self.send.assert_awaited_once()
+
+    async def test_buffers_outlive_the_coalescer(self) -> None:
+        await self.coalescer.add(1, build_message("Paid", "payment_paid"))
+        await self.coalescer.flush_due()
+        self.send.assert_not_awaited()
+
+        restarted = Coalescer(
+            TEST_POLICIES, self.send, self.redis, clock=self.clock
+        )
+        self.clock.now += 24 * 60 * 60
+        await restarted.flush_due()
+
+        self.assertEqual(self.get_sent_texts(), ["Paid"])
+
+
+class TestDigests(SimpleTestCase):
+    """Test cases for building digests."""
+
+    def test_long_digest_is_split(self) -> None:
+        messages = [build_message("x" * 1000) for _ in range(10)]
+
+        digests = build_digests("Overdue borrowings", messages)
+
+        self.assertEqual(len(digests), 3)
+        for digest in digests:
+            self.assertLessEqual(len(digest["text"]), 4096)
+        self.assertEqual(
+            [message for digest in digests for message in digest["messages"]],
+            messages,
+        )
+        self.assertEqual(
+            digests[0]["enqueued_at"], messages[0]["enqueued_at"]
+        )
+
+    @override_settings(TIME_ZONE="UTC")
+    def test_next_daily_time(self) -> None:
+        morning = datetime(2024, 10, 10, 8, tzinfo=timezone.utc).timestamp()
+        evening = datetime(2024, 10, 10, 20, tzinfo=timezone.utc).timestamp()
+
+        self.assertEqual(
+            get_next_daily_time(morning, "09:00"),
+            datetime(2024, 10, 10, 9, tzinfo=timezone.utc).timestamp(),
+        )
+        self.assertEqual(
+            get_next_daily_time(evening, "09:00"),
+            datetime(2024, 10, 11, 9, tzinfo=timezone.utc).timestamp(),
+        )
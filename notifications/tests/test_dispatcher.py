@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase, override_settings
+from telegram import Update
+
+from notifications.bot import get_bot
+from notifications.dispatcher import UpdateDispatcher, poll_updates
+from notifications.fake_telegram import FakeTelegramServer
+from notifications.handlers import handle_update
+from notifications.sessions import get_session_store
+
+
+def build_update(update_id: int, chat_id: int) -> MagicMock:
+    return MagicMock(
+        spec=Update, update_id=update_id, effective_chat=MagicMock(id=chat_id)
+    )
+
+
+class TestUpdateDispatcher(SimpleTestCase):
+    """Test cases for dispatching bot updates."""
+
+    def setUp(self) -> None:
+        self.handled = []
+
+    async def test_updates_of_a_chat_are_handled_in_order(self) -> None:
+        release_first = asyncio.Event()
+
+        async def handler(update: Update) -> None:
+            if update.update_id == 1:
+                await release_first.wait()
+            self.handled.append(update.update_id)
+
+        dispatcher = UpdateDispatcher(handler, concurrency=10)
+        dispatcher.dispatch(build_update(1, chat_id=1))
+        dispatcher.dispatch(build_update(2, chat_id=1))
+        dispatcher.dispatch(build_update(3, chat_id=2))
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(self.handled, [3])
+        release_first.set()
+        await dispatcher.join()
+        self.assertEqual(self.handled, [3, 1, 2])
+        self.assertEqual(dispatcher.pending, 0)
+
+    async def test_failing_update_does_not_stop_the_chat(self) -> None:
+        async def handler(update: Update) -> None:
+            if update.update_id == 1:
+                raise ValueError("Broken update")
+            self.handled.append(update.update_id)
+
+        dispatcher = UpdateDispatcher(handler, concurrency=10)
+        dispatcher.dispatch(build_update(1, chat_id=1))
+        dispatcher.dispatch(build_update(2, chat_id=1))
+
+        with self.assertLogs("notifications.dispatcher", "ERROR"):
+            await dispatcher.join()
+        self.assertEqual(self.handled, [2])
+
+
+class TestPollUpdates(SimpleTestCase):
+    """Test polling a fake Bot API server."""
+
+    def setUp(self) -> None:
+        self.server = FakeTelegramServer()
+        self.server.start()
+        self.settings_override = override_settings(
+            TELEGRAM_API_BASE=self.server.url,
+            TELEGRAM_BOT_TOKEN="123456:test",
+        )
+        self.settings_override.enable()
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        self.server.stop()
+        get_session_store.cache_clear()
+
+    async def test_every_update_of_a_batch_is_answered(self) -> None:
+        telegram = self.server.telegram
+        for text in ("/start", "admin@example.com"):
+            for chat_id in (1, 2, 3):
+                telegram.add_message(chat_id, text)
+        bot = get_bot(connection_pool_size=4)
+        dispatcher = UpdateDispatcher(handle_update, concurrency=4)
+
+        async with bot:
+            polling = asyncio.create_task(
+                poll_updates(bot, dispatcher, timeout=1)
+            )
+            answered = await asyncio.to_thread(
+                telegram.wait_for_messages, 6, 10
+            )
+            polling.cancel()
+            await dispatcher.join()
+
+        self.assertTrue(answered)
+        self.assertLess(telegram.calls["getUpdates"], 6)
+        replies = [
+            message["text"]
+            for message in telegram.sent_messages
+            if message["chat"]["id"] == 1
+        ]
+        self.assertEqual(
+            replies,
+            ["Please enter your email:", "Please enter your password:"],
+        )
@@ -0,0 +1,147 @@
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications.delivery_queue import build_message
+from notifications.digests import build_digests
+from notifications.ledger import DeliveryLedger, replay_deliveries
+from notifications.models import Delivery
+from notifications.tasks import purge_deliveries
+
+
+class TestDeliveryLedger(TestCase):
+    """Test cases for recording deliveries in the ledger."""
+
+    def setUp(self) -> None:
+        self.ledger = DeliveryLedger(batch_size=2)
+        self.message = build_message("Hello", event_id="payment_paid:1")
+
+    def test_outcomes_are_upserted_in_batches(self) -> None:
+        self.ledger.record(1, self.message, Delivery.Status.FAILED, 5)
+        async_to_sync(self.ledger.flush)()
+        for chat_id in (1, 2, 3):
+            self.ledger.record(chat_id, self.message, Delivery.Status.SENT, 1)
+
+        with self.assertNumQueries(2):
+            async_to_sync(self.ledger.flush)()
+
+        self.assertEqual(
+            list(
+                Delivery.objects.order_by("chat_id").values_list(
+                    "chat_id", "status", "attempts"
+                )
+            ),
+            [(1, "SENT", 1), (2, "SENT", 1), (3, "SENT", 1)],
+        )
+
+    def test_sent_events_are_not_claimed_again(self) -> None:
+        self.ledger.record(1, self.message, Delivery.Status.SENT, 1)
+        self.ledger.record(2, self.message, Delivery.Status.FAILED, 5)
+        async_to_sync(self.ledger.flush)()
+
+        claimed = async_to_sync(self.ledger.claim)("payment_paid:1", [1, 2])
+
+        self.assertEqual(claimed, [2])
+
+    def test_digest_is_recorded_per_event(self) -> None:
+        messages = [
+            build_message("First", "payment_paid", event_id="payment_paid:1"),
+            build_message("Second", "payment_paid", event_id="payment_paid:2"),
+        ]
+
+        self.ledger.record(
+            1,
+            build_digests("Payments", messages)[0],
+            Delivery.Status.SENT,
+            1,
+            message_id=100,
+        )
+        async_to_sync(self.ledger.flush)()
+
+        self.assertEqual(
+            sorted(
+                Delivery.objects.values_list("event_id", "text", "message_id")
+            ),
+            [
+                ("payment_paid:1", "First", 100),
+                ("payment_paid:2", "Second", 100),
+            ],
+        )
+
+    def test_pending_events_are_not_claimed_again(self) -> None:
+        self.ledger.record(1, self.message, Delivery.Status.PENDING, 0)
+        async_to_sync(self.ledger.flush)()
+        restarted = DeliveryLedger(batch_size=2)
+
+        claimed = async_to_sync(restarted.claim)("payment_paid:1", [1, 2])
+
+        self.assertEqual(claimed, [2])
+
+
+@override_settings(
+    TELEGRAM_DELIVERY={
+        "QUEUE_KEY": "notifications:test",
+        "LEDGER": {"RETENTION_DAYS": 30, "PURGE_BATCH_SIZE": 1},
+    }
+)
+class TestLedgerMaintenance(TestCase):
+    """Test cases for replaying and purging deliveries."""
+
+    def create_delivery(self, status: str, age_days: int = 0) -> Delivery:
+        return Delivery.objects.create(
+            event_id=f"event:{Delivery.objects.count()}",
+            chat_id=1,
+            event_type="payment_paid",
+            text="Hello",
+            status=status,
+            updated_at=timezone.now() - timedelta(days=age_days),
+        )
+
+    @patch("notifications.ledger.get_redis")
+    def test_failed_deliveries_are_replayed_once(
+            self, mock_get_redis: MagicMock
+    ) -> None:
+        failed = self.create_delivery(Delivery.Status.FAILED)
+        self.create_delivery(Delivery.Status.SENT)
+
+        self.assertEqual(replay_deliveries(), 1)
+        self.assertEqual(replay_deliveries(), 0)
+
+        key, payload = mock_get_redis.return_value.rpush.call_args.args
+        message = json.loads(payload)
+        self.assertEqual(key, "notifications:test")
+        self.assertEqual(message["id"], failed.event_id)
+        self.assertEqual(message["chat_id"], 1)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Delivery.Status.REPLAYED)
+
+    @patch("notifications.ledger.get_redis")
+    def test_outcome_of_a_replay_is_not_overwritten(
+            self, mock_get_redis: MagicMock
+    ) -> None:
+        failed = self.create_delivery(Delivery.Status.FAILED)
+
+        def deliver(key: str, *payloads: str) -> None:
+            # The worker records the outcome as soon as it is queued
+            Delivery.objects.filter(id=failed.id).update(
+                status=Delivery.Status.SENT
+            )
+
+        mock_get_redis.return_value.rpush.side_effect = deliver
+
+        self.assertEqual(replay_deliveries(), 1)
+
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Delivery.Status.SENT)
+
+    def test_old_deliveries_are_purged(self) -> None:
+        self.create_delivery(Delivery.Status.SENT, age_days=31)
+        self.create_delivery(Delivery.Status.FAILED, age_days=40)
+        recent = self.create_delivery(Delivery.Status.SENT, age_days=1)
+
+        self.assertEqual(purge_deliveries(), 2)
+        self.assertEqual(list(Delivery.objects.all()), [recent])
@@ -0,0 +1,223 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from library_service.tests.utils import FakeClock
+from notifications.handlers import handle_update, link_chat
+from notifications.login_throttle import (
+    LoginThrottle,
+    RedisLoginThrottle,
+    get_login_throttle,
+)
+from notifications.sessions import MemorySessionStore, RedisSessionStore
+from notifications.tests.utils import CHAT_ID, build_update
+
+
+class TestLoginThrottle(SimpleTestCase):
+    """Test cases for throttling password attempts."""
+
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.throttle = LoginThrottle(
+            free_attempts=2,
+            backoff=10,
+            max_backoff=25,
+            global_limit=5,
+            global_window=60,
+            clock=self.clock,
+        )
+
+    async def fail(self, chat_id: int = CHAT_ID) -> None:
+        self.assertEqual(await self.throttle.acquire(chat_id), 0)
+        await self.throttle.record_failure(chat_id)
+
+    async def test_backoff_doubles_after_free_attempts(self) -> None:
+        await self.fail()
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 0)
+        await self.throttle.record_failure(CHAT_ID)
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 10)
+
+        self.clock.now += 10
+        await self.fail()
+
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 20)
+        self.clock.now += 20
+        await self.fail()
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 25)
+
+    async def test_success_resets_failures(self) -> None:
+        await self.fail()
+        await self.throttle.record_success(CHAT_ID)
+        await self.fail()
+
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 0)
+
+    async def test_global_limit(self) -> None:
+        for chat_id in range(5):
+            self.assertEqual(await self.throttle.acquire(chat_id), 0)
+
+        self.assertEqual(await self.throttle.acquire(100), 60)
+        self.clock.now += 60
+        self.assertEqual(await self.throttle.acquire(100), 0)
+
+
+class TestRedisLoginThrottle(SimpleTestCase):
+    """Test cases for throttling password attempts in Redis."""
+
+    def setUp(self) -> None:
+        self.redis = AsyncMock()
+        self.redis.pttl.return_value = -2
+        self.throttle = RedisLoginThrottle(
+            self.redis,
+            free_attempts=2,
+            backoff=10,
+            max_backoff=25,
+            global_limit=5,
+            global_window=60,
+        )
+
+    async def test_attempts_are_counted_per_window(self) -> None:
+        self.redis.incr.return_value = 1
+
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 0)
+
+        self.redis.pttl.assert_awaited_once_with(
+            f"telegram:login:retry:{CHAT_ID}"
+        )
+        self.redis.incr.assert_awaited_once_with("telegram:login:attempts")
+        self.redis.expire.assert_awaited_once_with(
+            "telegram:login:attempts", 60, nx=True
+        )
+
+    async def test_global_limit(self) -> None:
+        self.redis.incr.return_value = 6
+        self.redis.pttl.side_effect = [-2, 30_000]
+
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 30)
+
+    async def test_waiting_chat_is_not_counted(self) -> None:
+        self.redis.pttl.return_value = 20_000
+
+        self.assertEqual(await self.throttle.acquire(CHAT_ID), 20)
+        self.redis.incr.assert_not_awaited()
+
+    async def test_backoff_doubles_after_free_attempts(self) -> None:
+        self.redis.incr.return_value = 3
+
+        await self.throttle.record_failure(CHAT_ID)
+
+        self.redis.expire.assert_awaited_once_with(
+            f"telegram:login:failures:{CHAT_ID}", 24 * 60 * 60
+        )
+        self.redis.set.assert_awaited_once_with(
+            f"telegram:login:retry:{CHAT_ID}", 3, px=20_000
+        )
+
+    async def test_free_attempt_sets_no_backoff(self) -> None:
+        self.redis.incr.return_value = 1
+
+        await self.throttle.record_failure(CHAT_ID)
+
+        self.redis.set.assert_not_awaited()
+
+    async def test_success_resets_failures(self) -> None:
+        await self.throttle.record_success(CHAT_ID)
+
+        self.redis.delete.assert_awaited_once_with(
+            f"telegram:login:failures:{CHAT_ID}",
+            f"telegram:login:retry:{CHAT_ID}",
+        )
+
+
+class TestGetLoginThrottle(SimpleTestCase):
+    """Test cases for choosing where the login throttle is kept."""
+
+    def tearDown(self) -> None:
+        get_login_throttle.cache_clear()
+
+    @patch("notifications.login_throttle.get_session_store")
+    def test_throttle_is_in_memory_with_memory_sessions(
+            self, mock_get_session_store: MagicMock
+    ) -> None:
+        mock_get_session_store.return_value = MemorySessionStore(
+            ttl=60, max_size=10
+        )
+
+        throttle = get_login_throttle()
+
+        self.assertIs(type(throttle), LoginThrottle)
+
+    @patch("notifications.login_throttle.get_session_store")
+    def test_throttle_is_in_redis_with_redis_sessions(
+            self, mock_get_session_store: MagicMock
+    ) -> None:
+        store = RedisSessionStore(ttl=60, url="redis://localhost:6379")
+        mock_get_session_store.return_value = store
+
+        throttle = get_login_throttle()
+
+        self.assertIsInstance(throttle, RedisLoginThrottle)
+        self.assertIs(throttle.redis, store.redis)
+
+
+class TestThrottledLogin(SimpleTestCase):
+    """Test cases for throttling and offloading the bot login."""
+
+    def setUp(self) -> None:
+        self.throttle = LoginThrottle(
+            free_attempts=1, backoff=30, max_backoff=60, global_limit=10
+        )
+        self.store = MemorySessionStore(ttl=60, max_size=10)
+        self.patchers = [
+            patch(
+                "notifications.handlers.get_login_throttle",
+                return_value=self.throttle,
+            ),
+            patch(
+                "notifications.handlers.get_session_store",
+                return_value=self.store,
+            ),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+
+    async def log_in(self, password: str) -> MagicMock:
+        await handle_update(build_update("/start"))
+        await handle_update(build_update("admin@example.com"))
+        update = build_update(password)
+        await handle_update(update)
+        return update
+
+    @patch("notifications.handlers.link_chat", new_callable=AsyncMock)
+    async def test_password_is_not_checked_while_throttled(
+            self, mock_link_chat: AsyncMock
+    ) -> None:
+        mock_link_chat.return_value = None
+        await self.log_in("wrong")
+
+        update = await self.log_in("1qazcde3")
+
+        mock_link_chat.assert_awaited_once()
+        reply = update.message.reply_text.await_args.args[0]
+        self.assertTrue(reply.startswith("Too many login attempts"))
+
+    @patch("notifications.handlers.authenticate")
+    async def test_passwords_are_checked_in_parallel(
+            self, mock_authenticate: MagicMock
+    ) -> None:
+        mock_authenticate.side_effect = lambda **kwargs: time.sleep(0.2)
+        started_at = time.monotonic()
+
+        results = await asyncio.gather(
+            link_chat("admin@example.com", "1", 1),
+            link_chat("admin@example.com", "2", 2),
+        )
+
+        self.assertEqual(results, [None, None])
+        self.assertLess(time.monotonic() - started_at, 0.35)
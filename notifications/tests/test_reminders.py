@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from books.models import Book
+from borrowings.models import Borrowing
+from notifications.models import BorrowingReminder
+from notifications.reminders import get_bucket, send_due_reminders
+
+
+@override_settings(
+    BORROWING_REMINDERS={
+        "DAYS": [-2, 0, 1],
+        "AT": "10:00",
+        "BUCKET_SECONDS": 15 * 60,
+        "BATCH_SIZE": 2,
+    }
+)
+class TestBorrowingReminders(TestCase):
+    """Test cases for reminding borrowers of due dates."""
+
+    def setUp(self) -> None:
+        self.today = timezone.localdate()
+        self.user = get_user_model().objects.create_user(
+            email="reader@example.com",
+            password="1qazcde3",
+            telegram_chat_id=7,
+        )
+        self.book = Book.objects.create(
+            title="Dune",
+            author="Frank Herbert",
+            cover="HARD",
+            inventory=3,
+            daily_fee=1,
+        )
+
+    def borrow(self, days: int, user=None) -> Borrowing:
+        return Borrowing.objects.create(
+            borrow_date=self.today,
+            expected_return_date=self.today + timedelta(days=days),
+            book=self.book,
+            user=user or self.user,
+        )
+
+    def at_ten(self, days: int) -> datetime:
+        return timezone.make_aware(
+            datetime.combine(
+                self.today + timedelta(days=days), datetime.min.time()
+            )
+            + timedelta(hours=10)
+        )
+
+    def test_reminders_are_scheduled_on_creation(self) -> None:
+        borrowing = self.borrow(10)
+
+        self.assertEqual(
+            list(
+                borrowing.reminders.order_by("day_offset").values_list(
+                    "day_offset", "bucket"
+                )
+            ),
+            [
+                (-2, get_bucket(self.at_ten(8))),
+                (0, get_bucket(self.at_ten(10))),
+                (1, get_bucket(self.at_ten(11))),
+            ],
+        )
+
+    def test_past_reminders_are_skipped(self) -> None:
+        borrowing = self.borrow(1)
+
+        self.assertEqual(
+            sorted(borrowing.reminders.values_list("day_offset", flat=True)),
+            [0, 1],
+        )
+
+    def test_reminders_are_cancelled_on_return(self) -> None:
+        borrowing = self.borrow(10)
+
+        borrowing.return_book()
+
+        self.assertFalse(BorrowingReminder.objects.exists())
+
+    @patch("notifications.reminders.send_telegram_message")
+    def test_only_due_reminders_are_sent(
+            self, mock_send_telegram_message: MagicMock
+    ) -> None:
+        self.borrow(10)
+        self.borrow(12)
+        unlinked = get_user_model().objects.create_user(
+            email="other@example.com", password="1qazcde3"
+        )
+        self.borrow(10, user=unlinked)
+
+        sent = send_due_reminders(now=self.at_ten(10))
+
+        self.assertEqual(sent, 3)
+        texts = [
+            call.args[0] for call in mock_send_telegram_message.call_args_list
+        ]
+        self.assertEqual(texts.count('Reminder: "Dune" is due today.'), 1)
+        for call in mock_send_telegram_message.call_args_list:
+            self.assertEqual(call.kwargs["chat_id"], 7)
+        self.assertEqual(
+            sorted(
+                BorrowingReminder.objects.values_list("day_offset", flat=True)
+            ),
+            [0, 1, 1, 1],
+        )
@@ -0,0 +1,132 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from library_service.tests.utils import FakeClock
+from notifications.handlers import handle_update
+from notifications.sessions import (
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionStore,
+)
+from notifications.tests.utils import CHAT_ID, build_update
+
+
+class TestSessionStore(SimpleTestCase):
+    """Test cases for the interface of session stores."""
+
+    def test_store_must_implement_all_methods(self) -> None:
+        class PartialSessionStore(SessionStore):
+            async def get(self, chat_id: int) -> dict | None:
+                return None
+
+        with self.assertRaises(TypeError):
+            PartialSessionStore(ttl=60)
+
+
+class TestMemorySessionStore(SimpleTestCase):
+    """Test cases for keeping bot sessions in memory."""
+
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.store = MemorySessionStore(ttl=60, max_size=2, clock=self.clock)
+
+    async def test_least_recently_used_session_is_evicted(self) -> None:
+        await self.store.set(1, {"state": "waiting_for_email"})
+        await self.store.set(2, {"state": "waiting_for_email"})
+        await self.store.get(1)
+
+        await self.store.set(3, {"state": "waiting_for_email"})
+
+        self.assertEqual(len(self.store), 2)
+        self.assertIsNone(await self.store.get(2))
+        self.assertIsNotNone(await self.store.get(1))
+
+    async def test_session_expires(self) -> None:
+        await self.store.set(1, {"state": "waiting_for_email"})
+
+        self.clock.now = 61
+
+        self.assertIsNone(await self.store.get(1))
+        self.assertEqual(len(self.store), 0)
+
+
+class TestRedisSessionStore(SimpleTestCase):
+    """Test cases for keeping bot sessions in Redis."""
+
+    def setUp(self) -> None:
+        self.store = RedisSessionStore(ttl=60, url="redis://localhost:6379")
+        self.store.redis = AsyncMock()
+
+    async def test_session_is_stored_with_ttl(self) -> None:
+        await self.store.set(CHAT_ID, {"state": "waiting_for_email"})
+
+        self.store.redis.set.assert_awaited_once_with(
+            f"telegram:session:{CHAT_ID}",
+            json.dumps({"state": "waiting_for_email"}),
+            ex=60,
+        )
+
+    async def test_session_is_loaded(self) -> None:
+        self.store.redis.get.return_value = b'{"state": "waiting_for_email"}'
+
+        session = await self.store.get(CHAT_ID)
+
+        self.assertEqual(session, {"state": "waiting_for_email"})
+
+
+@patch("notifications.handlers.link_chat", new_callable=AsyncMock)
+class TestLoginConversation(SimpleTestCase):
+    """Test that the login conversation does not keep passwords."""
+
+    def setUp(self) -> None:
+        self.store = MemorySessionStore(ttl=60, max_size=10)
+        self.patcher = patch(
+            "notifications.handlers.get_session_store",
+            return_value=self.store,
+        )
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    async def test_password_is_not_stored(
+            self, mock_link_chat: AsyncMock
+    ) -> None:
+        mock_link_chat.return_value = MagicMock(is_staff=True)
+        await handle_update(build_update("/start"))
+        await handle_update(build_update("admin@example.com"))
+        session = await self.store.get(CHAT_ID)
+        password_update = build_update("1qazcde3")
+
+        await handle_update(password_update)
+
+        self.assertEqual(session["state"], "waiting_for_password")
+        self.assertNotIn("password", session)
+        mock_link_chat.assert_awaited_once_with(
+            "admin@example.com", "1qazcde3", CHAT_ID
+        )
+        password_update.message.delete.assert_awaited_once()
+        self.assertEqual(len(self.store), 0)
+
+    async def test_borrower_is_told_about_reminders(
+            self, mock_link_chat: AsyncMock
+    ) -> None:
+        mock_link_chat.return_value = MagicMock(is_staff=False)
+        await handle_update(build_update("/start"))
+        await handle_update(build_update("reader@example.com"))
+        password_update = build_update("1qazcde3")
+
+        await handle_update(password_update)
+
+        password_update.message.reply_text.assert_awaited_once_with(
+            "You will be reminded of your borrowings' due dates."
+        )
+
+    async def test_unrelated_messages_do_not_create_sessions(
+            self, mock_link_chat: AsyncMock
+    ) -> None:
+        await handle_update(build_update("hello"))
+
+        self.assertEqual(len(self.store), 0)
@@ -0,0 +1,78 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from notifications.utils import (
+    admin_chats,
+    get_admin_chat_ids,
+    remove_chat_id,
+)
+
+
+@patch("notifications.utils.get_redis")
+class TestAdminChatRegistry(TestCase):
+    """Test cases for caching admin chat ids."""
+
+    def setUp(self) -> None:
+        admin_chats.invalidate()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@example.com",
+            password="1qazcde3",
+            is_staff=True,
+            telegram_chat_id=1,
+        )
+        get_user_model().objects.create_user(
+            email="user@example.com", password="1qazcde3", telegram_chat_id=2
+        )
+
+    def tearDown(self) -> None:
+        admin_chats.invalidate()
+
+    async def get_chat_ids_concurrently(self, count: int) -> list:
+        return await asyncio.gather(
+            *(get_admin_chat_ids() for _ in range(count))
+        )
+
+    def test_burst_of_lookups_costs_one_query(
+            self, mock_get_redis: MagicMock
+    ) -> None:
+        with self.assertNumQueries(1):
+            results = async_to_sync(self.get_chat_ids_concurrently)(1000)
+
+        self.assertEqual(set(results), {frozenset({1})})
+
+    def test_staff_change_invalidates_chat_ids(
+            self, mock_get_redis: MagicMock
+    ) -> None:
+        async_to_sync(get_admin_chat_ids)()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.is_staff = False
+            self.admin.save()
+
+        self.assertEqual(async_to_sync(get_admin_chat_ids)(), frozenset())
+        mock_get_redis.return_value.publish.assert_called_once()
+
+    def test_unrelated_change_keeps_chat_ids(
+            self, mock_get_redis: MagicMock
+    ) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.first_name = "Admin"
+            self.admin.save()
+
+        mock_get_redis.return_value.publish.assert_not_called()
+
+    def test_remove_chat_id_is_a_single_update(
+            self, mock_get_redis: MagicMock
+    ) -> None:
+        async_to_sync(get_admin_chat_ids)()
+
+        with self.assertNumQueries(1):
+            async_to_sync(remove_chat_id)(1)
+
+        self.admin.refresh_from_db()
+        self.assertIsNone(self.admin.telegram_chat_id)
+        self.assertEqual(async_to_sync(get_admin_chat_ids)(), frozenset())
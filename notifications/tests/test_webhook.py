@@ -0,0 +1,164 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from telegram import Update
+
+from notifications.bot import get_bot
+from notifications.dispatcher import UpdateDispatcher
+from notifications.fake_telegram import FakeTelegramServer
+from notifications.handlers import handle_update
+from notifications.sessions import get_session_store
+from notifications.webhook import (
+    WebhookApp,
+    build_webhook_server,
+    serve_webhook,
+)
+
+WEBHOOK_PATH = "/telegram/webhook/"
+WEBHOOK_SECRET = "test-secret"
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 42, "type": "private"},
+        "text": "/start",
+    },
+}
+
+
+class TestWebhookApp(SimpleTestCase):
+    """Test cases for receiving bot updates through the webhook."""
+
+    def setUp(self) -> None:
+        self.dispatcher = MagicMock(pending=0)
+        app = WebhookApp(
+            MagicMock(),
+            self.dispatcher,
+            secret_token=WEBHOOK_SECRET,
+            path=WEBHOOK_PATH,
+            max_pending=10,
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app), base_url="http://testserver"
+        )
+
+    async def post_update(
+            self, content: str = json.dumps(UPDATE), secret: str = None
+    ) -> httpx.Response:
+        return await self.client.post(
+            WEBHOOK_PATH,
+            content=content,
+            headers={
+                "X-Telegram-Bot-Api-Secret-Token": secret or WEBHOOK_SECRET
+            },
+        )
+
+    async def test_update_is_dispatched(self) -> None:
+        response = await self.post_update()
+
+        self.assertEqual(response.status_code, 200)
+        update = self.dispatcher.dispatch.call_args.args[0]
+        self.assertIsInstance(update, Update)
+        self.assertEqual(update.message.chat_id, 42)
+
+    async def test_wrong_secret_token_is_rejected(self) -> None:
+        response = await self.post_update(secret="wrong")
+
+        self.assertEqual(response.status_code, 403)
+        self.dispatcher.dispatch.assert_not_called()
+
+    async def test_invalid_update_is_rejected(self) -> None:
+        response = await self.post_update(content="not json")
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_update_is_refused_while_overloaded(self) -> None:
+        self.dispatcher.pending = 10
+
+        response = await self.post_update()
+
+        self.assertEqual(response.status_code, 503)
+        self.dispatcher.dispatch.assert_not_called()
+
+    async def test_webhook_is_not_set_without_a_secret(self) -> None:
+        bot = MagicMock(set_webhook=AsyncMock())
+
+        for secret in (None, "", "not a valid token"):
+            with self.assertRaises(ImproperlyConfigured):
+                await serve_webhook(
+                    bot,
+                    self.dispatcher,
+                    {
+                        "WEBHOOK_URL": f"https://bot.test{WEBHOOK_PATH}",
+                        "WEBHOOK_SECRET": secret,
+                    },
+                )
+
+        bot.set_webhook.assert_not_called()
+
+
+class TestWebhookServer(SimpleTestCase):
+    """Test receiving updates pushed by a fake Bot API server."""
+
+    def setUp(self) -> None:
+        self.server = FakeTelegramServer()
+        self.server.start()
+        self.settings_override = override_settings(
+            TELEGRAM_API_BASE=self.server.url,
+            TELEGRAM_BOT_TOKEN="123456:test",
+        )
+        self.settings_override.enable()
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        self.server.stop()
+        get_session_store.cache_clear()
+
+    async def test_pushed_updates_are_answered(self) -> None:
+        telegram = self.server.telegram
+        for chat_id in (1, 2):
+            telegram.add_message(chat_id, "/start")
+        bot = get_bot(connection_pool_size=4)
+        dispatcher = UpdateDispatcher(handle_update, concurrency=4)
+        webhook = build_webhook_server(
+            bot,
+            dispatcher,
+            {
+                "WEBHOOK_URL": f"http://127.0.0.1{WEBHOOK_PATH}",
+                "WEBHOOK_SECRET": WEBHOOK_SECRET,
+                "WEBHOOK_HOST": "127.0.0.1",
+                "WEBHOOK_PORT": 0,
+                "MAX_PENDING_UPDATES": 10,
+            },
+        )
+
+        async with bot:
+            serving = asyncio.create_task(webhook.serve())
+            while not webhook.started:
+                await asyncio.sleep(0.01)
+            port = webhook.servers[0].sockets[0].getsockname()[1]
+            await bot.set_webhook(
+                url=f"http://127.0.0.1:{port}{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET,
+            )
+            answered = await asyncio.to_thread(
+                telegram.wait_for_messages, 2, 10
+            )
+            await bot.delete_webhook()
+            webhook.should_exit = True
+            await serving
+            await dispatcher.join()
+
+        self.assertTrue(answered)
+        self.assertEqual(
+            sorted(
+                message["chat"]["id"] for message in telegram.sent_messages
+            ),
+            [1, 2],
+        )
+        self.assertNotIn("getUpdates", telegram.calls)
@@ -0,0 +1,10 @@
+from unittest.mock import AsyncMock, MagicMock
+
+CHAT_ID = 42
+
+
+def build_update(text: str) -> MagicMock:
+    message = MagicMock(
+        chat_id=CHAT_ID, text=text, reply_text=AsyncMock(), delete=AsyncMock()
+    )
+    return MagicMock(message=message, callback_query=None)
@@ -1,21 +1,99 @@
+import logging
+import threading
+import time
+from typing import Callable
+
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from redis.exceptions import RedisError
 
+from notifications.delivery_queue import get_redis
 
-@sync_to_async
-def remove_chat_id(chat_id: int) -> None:
-    user = get_user_model().objects.filter(telegram_chat_id=chat_id).first()
+logger = logging.getLogger(__name__)
 
-    if user:
-        user.telegram_chat_id = None
-        user.save()
 
+class AdminChatRegistry:
+    """
+    In-process cache of the chat ids of admins linked to the bot.
 
-@sync_to_async
-def get_admin_chat_ids() -> set:
+    The ids are loaded with a single query and kept for `ttl` seconds,
+    unless the registry is invalidated earlier when an admin changes.
+    """
+
+    def __init__(
+            self, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        self.chat_ids = None
+        self.expires_at = 0.0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def get_cached(self) -> frozenset | None:
+        if self.expires_at <= self.clock():
+            return None
+        return self.chat_ids
+
+    def load(self) -> frozenset:
+        with self.lock:
+            # Another thread may have loaded the ids while this one waited
+            chat_ids = self.get_cached()
+            if chat_ids is None:
+                version = self.version
+                chat_ids = frozenset(
+                    get_user_model()
+                    .objects.filter(
+                        is_staff=True, telegram_chat_id__isnull=False
+                    )
+                    .values_list("telegram_chat_id", flat=True)
+                )
+                # Ids invalidated during the query may be stale already
+                if version == self.version:
+                    self.chat_ids = chat_ids
+                    self.expires_at = self.clock() + self.ttl
+            return chat_ids
+
+    def discard(self, chat_id: int) -> None:
+        if self.chat_ids is not None:
+            self.chat_ids = self.chat_ids - {chat_id}
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self.expires_at = 0.0
 
-    return set(
-        get_user_model()
-        .objects.filter(is_staff=True, telegram_chat_id__isnull=False)
-        .values_list("telegram_chat_id", flat=True)
+
+admin_chats = AdminChatRegistry(settings.TELEGRAM_DELIVERY["ADMIN_CHATS_TTL"])
+
+
+def publish_admin_chats_changed() -> None:
+    """
+    Invalidate the admin chat ids in this process and tell the other
+    processes (the delivery worker) to do the same.
+    """
+    admin_chats.invalidate()
+    try:
+        get_redis().publish(
+            settings.TELEGRAM_DELIVERY["ADMIN_CHATS_CHANNEL"], "changed"
+        )
+    except RedisError:
+        logger.warning(
+            "Could not publish admin chat changes, other processes "
+            "will reload them when their cache expires"
+        )
+
+
+@sync_to_async
+def remove_chat_id(chat_id: int) -> None:
+    get_user_model().objects.filter(telegram_chat_id=chat_id).update(
+        telegram_chat_id=None
     )
+    admin_chats.discard(chat_id)
+
+
+async def get_admin_chat_ids() -> frozenset:
+    chat_ids = admin_chats.get_cached()
+    if chat_ids is None:
+        chat_ids = await sync_to_async(admin_chats.load)()
+    return chat_ids
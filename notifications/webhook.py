@@ -0,0 +1,151 @@
+import hmac
+import json
+import logging
+import re
+from urllib.parse import urlsplit
+
+import uvicorn
+from django.core.exceptions import ImproperlyConfigured
+from telegram import Bot, Update
+
+from notifications.dispatcher import UpdateDispatcher
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = b"x-telegram-bot-api-secret-token"
+
+# Secret tokens Telegram accepts for `set_webhook`
+SECRET_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
+
+def validate_secret_token(secret_token: str | None) -> None:
+    """
+    Raise `ImproperlyConfigured` unless `secret_token` is a non-empty
+    token Telegram accepts. Without it anyone could push updates.
+    """
+    if not secret_token or not SECRET_TOKEN_PATTERN.fullmatch(secret_token):
+        raise ImproperlyConfigured(
+            "TELEGRAM_WEBHOOK_SECRET must be 1-256 characters of A-Z, a-z, "
+            "0-9, _ and - to receive updates by webhook"
+        )
+
+
+class WebhookApp:
+    """
+    ASGI application receiving bot updates pushed by Telegram.
+
+    Requests to `path` must carry the secret token the webhook was set
+    with. Updates are handed to the dispatcher and answered at once,
+    so Telegram never waits for an update to be handled. While too many
+    updates are pending, requests are refused and Telegram retries them
+    later.
+    """
+
+    MAX_BODY_SIZE = 1024 * 1024
+
+    def __init__(
+            self,
+            bot: Bot,
+            dispatcher: UpdateDispatcher,
+            secret_token: str,
+            path: str,
+            max_pending: int,
+    ) -> None:
+        validate_secret_token(secret_token)
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.secret_token = secret_token.encode()
+        self.path = path
+        self.max_pending = max_pending
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        if scope["path"] != self.path:
+            return await self.respond(send, 404)
+        if scope["method"] != "POST":
+            return await self.respond(send, 405)
+
+        token = dict(scope["headers"]).get(SECRET_TOKEN_HEADER, b"")
+        if not hmac.compare_digest(token, self.secret_token):
+            logger.warning("Rejected webhook request with a wrong token")
+            return await self.respond(send, 403)
+        if self.dispatcher.pending >= self.max_pending:
+            return await self.respond(send, 503)
+
+        body = await self.read_body(receive)
+        if body is None:
+            return await self.respond(send, 413)
+        try:
+            update = Update.de_json(json.loads(body), self.bot)
+        except (ValueError, TypeError, KeyError):
+            update = None
+        if update is None:
+            return await self.respond(send, 400)
+
+        self.dispatcher.dispatch(update)
+        await self.respond(send, 200)
+
+    async def read_body(self, receive) -> bytes | None:
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if len(body) > self.MAX_BODY_SIZE:
+                return None
+            if not message.get("more_body"):
+                return body
+
+    @staticmethod
+    async def respond(send, status: int) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-length", b"0")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+
+
+def build_webhook_server(
+        bot: Bot, dispatcher: UpdateDispatcher, options: dict
+) -> uvicorn.Server:
+    app = WebhookApp(
+        bot,
+        dispatcher,
+        secret_token=options["WEBHOOK_SECRET"],
+        path=urlsplit(options["WEBHOOK_URL"]).path or "/",
+        max_pending=options["MAX_PENDING_UPDATES"],
+    )
+    return uvicorn.Server(
+        uvicorn.Config(
+            app,
+            host=options["WEBHOOK_HOST"],
+            port=options["WEBHOOK_PORT"],
+            lifespan="off",
+            access_log=False,
+        )
+    )
+
+
+async def serve_webhook(
+        bot: Bot, dispatcher: UpdateDispatcher, options: dict
+) -> None:
+    """
+    Point the bot's webhook to `WEBHOOK_URL` and serve it until stopped.
+
+    Raises `ImproperlyConfigured` if `WEBHOOK_SECRET` is missing or
+    invalid, before the webhook is set, and
+    `telegram.error.TelegramError` if the webhook cannot be set.
+    """
+    validate_secret_token(options["WEBHOOK_SECRET"])
+    await bot.set_webhook(
+        url=options["WEBHOOK_URL"],
+        secret_token=options["WEBHOOK_SECRET"],
+        allowed_updates=Update.ALL_TYPES,
+        max_connections=options["CONCURRENCY"],
+    )
+    logger.info(f"Receiving updates at {options['WEBHOOK_URL']}")
+    await build_webhook_server(bot, dispatcher, options).serve()
+    await dispatcher.join()
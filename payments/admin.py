@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from payments.models import Payment
+from payments.models import Payment, PaymentReconciliation, StripeEvent
 
 
 @admin.register(Payment)
@@ -17,3 +17,22 @@ class PaymentAdmin(admin.ModelAdmin):
         "type",
         "borrowing",
     )
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ("event_id", "type", "received_at", "processed_at")
+    list_filter = ("type",)
+    search_fields = ("event_id",)
+
+
+@admin.register(PaymentReconciliation)
+class PaymentReconciliationAdmin(admin.ModelAdmin):
+    list_display = (
+        "window_start",
+        "window_end",
+        "finished_at",
+        "statuses_fixed",
+        "missing_locally",
+        "missing_in_stripe",
+    )
@@ -0,0 +1,317 @@
+"""
+A local stand-in for the parts of the Stripe API used by the service.
+
+It implements Checkout sessions (create, retrieve, list, expire), signed
+webhook delivery, configurable latency and error injection, so borrowings
+and the payment tasks can be load-tested without the real Stripe API.
+Point the service at it with the `STRIPE_API_BASE` setting.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SESSION_PATH = re.compile(r"^/v1/checkout/sessions/(?P<id>[\w-]+)$")
+EXPIRE_PATH = re.compile(r"^/v1/checkout/sessions/(?P<id>[\w-]+)/expire$")
+COMPLETE_PATH = re.compile(
+    r"^/_fake/checkout/sessions/(?P<id>[\w-]+)/complete$"
+)
+
+
+def sign_webhook_payload(payload: str, secret: str) -> str:
+    """Build a `Stripe-Signature` header value for a webhook payload."""
+    timestamp = int(time.time())
+    signature = hmac.new(
+        secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class FakeStripe:
+    """
+    In-memory Checkout sessions with Stripe-like behaviour.
+
+    - `latency` seconds are added to every API call.
+    - `error_rate` is the share of API calls answered with a 500 error.
+    - Open sessions expire after `session_ttl` seconds.
+    - Completed and expired sessions are sent as signed events to
+      `webhook_url`, when it is set.
+    """
+
+    def __init__(
+            self,
+            latency: float = 0,
+            error_rate: float = 0,
+            session_ttl: int = 24 * 60 * 60,
+            webhook_url: str = None,
+            webhook_secret: str = None,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret or ""
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def create_session(self, params: dict, base_url: str) -> dict:
+        session_id = f"cs_test_{secrets.token_hex(12)}"
+        created = int(time.time())
+        unit_amount = int(
+            params.get("line_items[0][price_data][unit_amount]", 0)
+        )
+        quantity = int(params.get("line_items[0][quantity]", 1))
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "amount_total": unit_amount * quantity,
+            "created": created,
+            "currency": params.get("line_items[0][price_data][currency]"),
+            "expires_at": created + self.session_ttl,
+            "mode": params.get("mode"),
+            "payment_status": "unpaid",
+            "status": "open",
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "url": f"{base_url}/pay/{session_id}",
+        }
+        with self._lock:
+            self.sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id: str) -> dict | None:
+        with self._lock:
+            session = self.sessions.get(session_id)
+        if (
+            session
+            and session["status"] == "open"
+            and session["expires_at"] <= time.time()
+        ):
+            self.expire_session(session_id)
+        return session
+
+    def list_sessions(self, params: dict) -> dict:
+        limit = min(int(params.get("limit", 10)), 100)
+        with self._lock:
+            sessions = sorted(
+                self.sessions.values(),
+                key=lambda session: (session["created"], session["id"]),
+                reverse=True,
+            )
+        filters = {
+            "created[gte]": lambda value, session: session["created"] >= value,
+            "created[gt]": lambda value, session: session["created"] > value,
+            "created[lte]": lambda value, session: session["created"] <= value,
+            "created[lt]": lambda value, session: session["created"] < value,
+        }
+        for key, matches in filters.items():
+            if key in params:
+                value = int(params[key])
+                sessions = [s for s in sessions if matches(value, s)]
+        if "status" in params:
+            sessions = [s for s in sessions if s["status"] == params["status"]]
+        if "starting_after" in params:
+            ids = [session["id"] for session in sessions]
+            if params["starting_after"] in ids:
+                start = ids.index(params["starting_after"]) + 1
+                sessions = sessions[start:]
+        return {
+            "object": "list",
+            "url": "/v1/checkout/sessions",
+            "has_more": len(sessions) > limit,
+            "data": sessions[:limit],
+        }
+
+    def expire_session(self, session_id: str) -> dict | None:
+        return self._finish_session(
+            session_id, "expired", "unpaid", "checkout.session.expired"
+        )
+
+    def complete_session(self, session_id: str) -> dict | None:
+        return self._finish_session(
+            session_id, "complete", "paid", "checkout.session.completed"
+        )
+
+    def _finish_session(
+            self,
+            session_id: str,
+            status: str,
+            payment_status: str,
+            event_type: str,
+    ) -> dict | None:
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None or session["status"] != "open":
+                return session
+            session["status"] = status
+            session["payment_status"] = payment_status
+            session = dict(session)
+        self.send_webhook(event_type, session)
+        return session
+
+    def build_event(self, event_type: str, data: dict) -> dict:
+        return {
+            "id": f"evt_{secrets.token_hex(12)}",
+            "object": "event",
+            "api_version": "2024-09-30.acacia",
+            "created": int(time.time()),
+            "type": event_type,
+            "data": {"object": data},
+        }
+
+    def send_webhook(self, event_type: str, data: dict) -> None:
+        if not self.webhook_url:
+            return
+        payload = json.dumps(self.build_event(event_type, data))
+        threading.Thread(
+            target=self._post_webhook, args=(payload,), daemon=True
+        ).start()
+
+    def _post_webhook(self, payload: str) -> None:
+        request = urllib.request.Request(
+            self.webhook_url,
+            data=payload.encode(),
+            headers={
+                "Content-Type": "application/json",
+                "Stripe-Signature": sign_webhook_payload(
+                    payload, self.webhook_secret
+                ),
+            },
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except OSError as error:
+            logger.warning(f"Webhook delivery failed: {error}")
+
+
+class FakeStripeRequestHandler(BaseHTTPRequestHandler):
+    server: "FakeStripeServer"
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one packet to keep keep-alive calls fast
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.dispatch("POST")
+
+    def dispatch(self, method: str) -> None:
+        stripe_state = self.server.stripe
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+        params = dict(parse_qsl(url.query or body, keep_blank_values=True))
+
+        if stripe_state.latency:
+            time.sleep(stripe_state.latency)
+
+        if COMPLETE_PATH.match(url.path) and method == "POST":
+            session_id = COMPLETE_PATH.match(url.path)["id"]
+            return self.respond_session(
+                stripe_state.complete_session(session_id)
+            )
+
+        if random.random() < stripe_state.error_rate:
+            return self.respond(
+                500,
+                {
+                    "error": {
+                        "type": "api_error",
+                        "message": "Injected fake Stripe error",
+                    }
+                },
+            )
+
+        if url.path == "/v1/checkout/sessions":
+            if method == "POST":
+                return self.respond(
+                    200, stripe_state.create_session(params, self.server.url)
+                )
+            return self.respond(200, stripe_state.list_sessions(params))
+        if EXPIRE_PATH.match(url.path) and method == "POST":
+            session_id = EXPIRE_PATH.match(url.path)["id"]
+            return self.respond_session(
+                stripe_state.expire_session(session_id)
+            )
+        if SESSION_PATH.match(url.path) and method == "GET":
+            session_id = SESSION_PATH.match(url.path)["id"]
+            return self.respond_session(stripe_state.get_session(session_id))
+
+        self.respond(
+            404,
+            {
+                "error": {
+                    "type": "invalid_request_error",
+                    "message": f"Unrecognized request URL ({url.path})",
+                }
+            },
+        )
+
+    def respond_session(self, session: dict | None) -> None:
+        if session is None:
+            return self.respond(
+                404,
+                {
+                    "error": {
+                        "type": "invalid_request_error",
+                        "code": "resource_missing",
+                        "message": "No such checkout.session",
+                        "param": "session",
+                    }
+                },
+            )
+        self.respond(200, session)
+
+    def respond(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Request-Id", f"req_{secrets.token_hex(8)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+class FakeStripeServer(ThreadingHTTPServer):
+    """HTTP server exposing a `FakeStripe` state on the Stripe API paths."""
+
+    daemon_threads = True
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            stripe_state: FakeStripe = None,
+    ) -> None:
+        super().__init__((host, port), FakeStripeRequestHandler)
+        self.stripe = stripe_state or FakeStripe()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve requests in a background thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -3,7 +3,10 @@ from django_celery_beat.models import PeriodicTask, IntervalSchedule
 
 
 class Command(BaseCommand):
-    help = "Create interval schedule for checking expired Stripe sessions."
+    help = (
+        "Create interval schedules for checking expired Stripe sessions "
+        "and reconciling payments with Stripe."
+    )
 
     def handle(self, *args, **kwargs) -> None:
         schedule, _ = IntervalSchedule.objects.get_or_create(
@@ -24,3 +27,22 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS("Interval task already exists")
             )
+
+        schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=1, period=IntervalSchedule.HOURS
+        )
+
+        task, created = PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name="Reconcile payments with Stripe each hour",
+            task="payments.tasks.reconcile_payments",
+        )
+
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS("Successfully created reconciliation task")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Reconciliation task already exists")
+            )
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from payments.reconciliation import PaymentReconciler
+
+
+def parse_aware_datetime(value: str) -> datetime:
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f"Invalid date and time: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    """
+    Command to reconcile local payments with Stripe Checkout sessions.
+    """
+    help = (
+        "Reconcile local payments with Stripe, starting from the last "
+        "checkpoint, fix drifted statuses and write a drift report."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--since",
+            type=parse_aware_datetime,
+            help="Start of the reconciled period, ex. 2024-10-01T00:00. "
+                 "Defaults to the last checkpoint.",
+        )
+        parser.add_argument(
+            "--until",
+            type=parse_aware_datetime,
+            help="End of the reconciled period. "
+                 "Defaults to a few minutes ago.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        run = PaymentReconciler().run(options["since"], options["until"])
+
+        if run is None:
+            self.stdout.write(self.style.SUCCESS("Nothing to reconcile"))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled {run.sessions_checked} Stripe sessions and "
+                f"{run.payments_checked} payments from {run.window_start} "
+                f"to {run.window_end}"
+            )
+        )
+        self.stdout.write(
+            f"Statuses fixed: {run.statuses_fixed}\n"
+            f"Sessions missing locally: {run.missing_locally}\n"
+            f"Payments missing in Stripe: {run.missing_in_stripe}\n"
+            f"Drift report: {run.report_file}"
+        )
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments.fake_stripe import FakeStripe, FakeStripeServer
+
+
+class Command(BaseCommand):
+    """
+    Command to run a local fake Stripe API server for load tests.
+    """
+    help = (
+        "Run a local fake Stripe server. Start the service with "
+        "STRIPE_API_BASE=http://<host>:<port> to use it."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=12111)
+        parser.add_argument(
+            "--latency-ms",
+            type=int,
+            default=0,
+            help="Delay added to every API call.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Share of API calls answered with a 500 error (0-1).",
+        )
+        parser.add_argument(
+            "--session-ttl",
+            type=int,
+            default=24 * 60 * 60,
+            help="Seconds after which open sessions expire.",
+        )
+        parser.add_argument(
+            "--webhook-url",
+            help="URL receiving signed checkout.session.* events, "
+                 "ex. http://localhost:8000/api/payments/webhook/",
+        )
+
+    def handle(self, *args, **options) -> None:
+        server = FakeStripeServer(
+            options["host"],
+            options["port"],
+            FakeStripe(
+                latency=options["latency_ms"] / 1000,
+                error_rate=options["error_rate"],
+                session_ttl=options["session_ttl"],
+                webhook_url=options["webhook_url"],
+                webhook_secret=settings.STRIPE_WEBHOOK_SECRET,
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Fake Stripe is listening on {server.url}")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
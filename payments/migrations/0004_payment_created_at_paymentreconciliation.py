@@ -0,0 +1,80 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:00
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import DateTimeField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+
+def backfill_created_at(apps, schema_editor) -> None:
+    # Payments are created when their borrowing starts or ends, so the
+    # borrow date is the closest known time for existing ones
+    Payment = apps.get_model("payments", "Payment")
+    Borrowing = apps.get_model("borrowings", "Borrowing")
+    borrow_date = Borrowing.objects.filter(
+        pk=OuterRef("borrowing_id")
+    ).values("borrow_date")[:1]
+    Payment.objects.using(schema_editor.connection.alias).update(
+        created_at=Cast(Subquery(borrow_date), DateTimeField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0003_stripeevent_alter_payment_session_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="created_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(
+            backfill_created_at, migrations.RunPython.noop, elidable=True
+        ),
+        migrations.AlterField(
+            model_name="payment",
+            name="created_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.CreateModel(
+            name="PaymentReconciliation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("window_start", models.DateTimeField()),
+                ("window_end", models.DateTimeField()),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "sessions_checked",
+                    models.PositiveIntegerField(default=0),
+                ),
+                (
+                    "payments_checked",
+                    models.PositiveIntegerField(default=0),
+                ),
+                ("statuses_fixed", models.PositiveIntegerField(default=0)),
+                ("missing_locally", models.PositiveIntegerField(default=0)),
+                (
+                    "missing_in_stripe",
+                    models.PositiveIntegerField(default=0),
+                ),
+                ("report_file", models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                "ordering": ["-window_end"],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0004_payment_created_at_paymentreconciliation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["status", "created_at"],
+                name="payments_pa_status_343680_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["type", "created_at"],
+                name="payments_pa_type_430cd9_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0005_payment_payments_pa_status_343680_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReplacedSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "session_id",
+                    models.CharField(max_length=255, unique=True),
+                ),
+                ("replaced_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="replaced_sessions",
+                        to="payments.payment",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from borrowings.models import Borrowing
 
@@ -22,12 +23,81 @@ class Payment(models.Model):
         Borrowing, on_delete=models.CASCADE, related_name="payments"
     )
     session_url = models.TextField()
-    session_id = models.CharField(max_length=255)
+    session_id = models.CharField(max_length=255, db_index=True)
     money_to_pay = models.DecimalField(
         max_digits=8,
         decimal_places=2,
         validators=[MinValueValidator(Decimal("0.01"))]
     )
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["type", "created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.type} for {self.borrowing.book.title} ({self.status})"
+
+
+class ReplacedSession(models.Model):
+    """
+    A Checkout session of a payment which was replaced by a renewed one.
+
+    Stripe still lists replaced sessions, so reconciliation can tell
+    them from sessions unknown to the service.
+    """
+
+    payment = models.ForeignKey(
+        Payment, on_delete=models.CASCADE, related_name="replaced_sessions"
+    )
+    session_id = models.CharField(max_length=255, unique=True)
+    replaced_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.session_id} of payment {self.payment_id}"
+
+
+class StripeEvent(models.Model):
+    """
+    A Stripe webhook event received by the service.
+
+    The unique `event_id` makes webhook delivery idempotent: Stripe may
+    deliver the same event several times, but it is processed only once.
+    """
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=255)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
+
+
+class PaymentReconciliation(models.Model):
+    """
+    A run of the reconciliation of local payments with Stripe.
+
+    `window_end` is advanced after every reconciled window and serves
+    as the checkpoint the next run starts from.
+    """
+
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    sessions_checked = models.PositiveIntegerField(default=0)
+    payments_checked = models.PositiveIntegerField(default=0)
+    statuses_fixed = models.PositiveIntegerField(default=0)
+    missing_locally = models.PositiveIntegerField(default=0)
+    missing_in_stripe = models.PositiveIntegerField(default=0)
+    report_file = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ["-window_end"]
+
+    def __str__(self):
+        return f"Reconciliation {self.window_start} - {self.window_end}"
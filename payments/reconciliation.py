@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+
+import stripe
+from django.conf import settings
+from django.utils import timezone
+
+from payments.models import (
+    Payment,
+    PaymentReconciliation,
+    ReplacedSession,
+)
+from payments.reports import invalidate_payment_report
+from payments.stripe_client import stripe_gateway
+
+logger = logging.getLogger(__name__)
+
+STATUS_MISMATCH = "status_mismatch"
+MISSING_LOCALLY = "missing_locally"
+MISSING_IN_STRIPE = "missing_in_stripe"
+SUPERSEDED = "superseded"
+
+
+def get_expected_status(session: stripe.checkout.Session) -> str:
+    """Return the local payment status matching a Checkout session."""
+    if session.payment_status == "paid":
+        return Payment.Status.PAID
+    if session.status == "expired":
+        return Payment.Status.EXPIRED
+    return Payment.Status.PENDING
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class PaymentReconciler:
+    """
+    Compare local payments with Stripe Checkout sessions and fix drift.
+
+    The time since the last checkpoint is split into windows. For every
+    window the Stripe sessions created in it are paged through, and every
+    page is compared with the local payments of its sessions. Local
+    payments created in the window are then streamed with `iterator()`;
+    only the ids of the listed sessions are kept to skip them. Statuses
+    which differ from Stripe are fixed with bulk updates, and every drift
+    is written as a JSON line to the report file of the run.
+    """
+
+    def __init__(self, options: dict = None) -> None:
+        self.options = options or settings.PAYMENT_RECONCILIATION
+        self.batch_size = self.options["BATCH_SIZE"]
+
+    def get_checkpoint(self) -> datetime:
+        last_run = PaymentReconciliation.objects.first()
+        if last_run:
+            return last_run.window_end
+        return timezone.now() - timedelta(
+            days=self.options["INITIAL_LOOKBACK_DAYS"]
+        )
+
+    def run(
+            self, since: datetime = None, until: datetime = None
+    ) -> PaymentReconciliation | None:
+        """
+        Reconcile payments created between `since` (the last checkpoint
+        by default) and `until` (a few minutes ago by default).
+        """
+        since = since or self.get_checkpoint()
+        until = until or timezone.now() - timedelta(
+            minutes=self.options["SETTLE_MINUTES"]
+        )
+        if since >= until:
+            return None
+
+        run = PaymentReconciliation.objects.create(
+            window_start=since, window_end=since
+        )
+        os.makedirs(self.options["REPORT_DIR"], exist_ok=True)
+        run.report_file = os.path.join(
+            self.options["REPORT_DIR"], f"reconciliation-{run.id}.jsonl"
+        )
+
+        window = timedelta(minutes=self.options["WINDOW_MINUTES"])
+        with open(run.report_file, "w") as report:
+            while run.window_end < until:
+                window_end = min(run.window_end + window, until)
+                self.reconcile_window(run, run.window_end, window_end, report)
+                run.window_end = window_end
+                run.save()
+
+        run.finished_at = timezone.now()
+        run.save()
+        logger.info(
+            f"Reconciled payments from {run.window_start} to "
+            f"{run.window_end}: {run.statuses_fixed} statuses fixed, "
+            f"{run.missing_locally} sessions missing locally, "
+            f"{run.missing_in_stripe} payments missing in Stripe"
+        )
+        return run
+
+    def reconcile_window(
+            self,
+            run: PaymentReconciliation,
+            start: datetime,
+            end: datetime,
+            report: TextIO,
+    ) -> None:
+        listed = set()
+        fixes = defaultdict(list)
+        for page in self.iter_stripe_pages(start, end):
+            expected_statuses = {
+                session.id: get_expected_status(session) for session in page
+            }
+            run.sessions_checked += len(expected_statuses)
+            listed.update(expected_statuses)
+            self.reconcile_sessions(run, expected_statuses, fixes, report)
+
+        local_payments = (
+            Payment.objects.filter(created_at__gte=start, created_at__lt=end)
+            .exclude(session_id="")
+            .values_list("id", "session_id", "status")
+            .iterator(chunk_size=self.batch_size)
+        )
+        for payment_id, session_id, status in local_payments:
+            run.payments_checked += 1
+            if session_id in listed:
+                continue
+            try:
+                session = stripe_gateway.retrieve_checkout_session(session_id)
+            except stripe.error.InvalidRequestError:
+                run.missing_in_stripe += 1
+                self.write_drift(
+                    report,
+                    MISSING_IN_STRIPE,
+                    payment_id=payment_id,
+                    session_id=session_id,
+                    local_status=status,
+                )
+                continue
+            self.compare(
+                run,
+                fixes,
+                report,
+                payment_id,
+                session_id,
+                status,
+                get_expected_status(session),
+            )
+            if sum(map(len, fixes.values())) >= self.batch_size:
+                self.apply_fixes(run, fixes)
+        self.apply_fixes(run, fixes)
+
+    def reconcile_sessions(
+            self,
+            run: PaymentReconciliation,
+            expected_statuses: dict[str, str],
+            fixes: dict,
+            report: TextIO,
+    ) -> None:
+        # Sessions are matched by id across the whole table, since
+        # renewed payments keep their original creation time. Sessions
+        # replaced by a renewal are reported as superseded, not missing
+        for session_ids in batched(expected_statuses, self.batch_size):
+            found = set()
+            for payment_id, session_id, status in Payment.objects.filter(
+                session_id__in=session_ids
+            ).values_list("id", "session_id", "status"):
+                found.add(session_id)
+                self.compare(
+                    run,
+                    fixes,
+                    report,
+                    payment_id,
+                    session_id,
+                    status,
+                    expected_statuses[session_id],
+                )
+            for session_id, payment_id in ReplacedSession.objects.filter(
+                session_id__in=set(session_ids) - found
+            ).values_list("session_id", "payment_id"):
+                found.add(session_id)
+                self.write_drift(
+                    report,
+                    SUPERSEDED,
+                    payment_id=payment_id,
+                    session_id=session_id,
+                    stripe_status=expected_statuses[session_id],
+                )
+            for session_id in set(session_ids) - found:
+                run.missing_locally += 1
+                self.write_drift(
+                    report,
+                    MISSING_LOCALLY,
+                    session_id=session_id,
+                    stripe_status=expected_statuses[session_id],
+                )
+            self.apply_fixes(run, fixes)
+
+    def iter_stripe_pages(
+            self, start: datetime, end: datetime
+    ) -> Iterator[list[stripe.checkout.Session]]:
+        params = {
+            "limit": 100,
+            "created": {
+                "gte": int(start.timestamp()),
+                "lt": int(end.timestamp()),
+            },
+        }
+        while True:
+            page = stripe_gateway.list_checkout_sessions(**params)
+            yield page.data
+            if not page.has_more or not page.data:
+                return
+            params["starting_after"] = page.data[-1].id
+
+    def compare(
+            self,
+            run: PaymentReconciliation,
+            fixes: dict,
+            report: TextIO,
+            payment_id: int,
+            session_id: str,
+            status: str,
+            expected_status: str,
+    ) -> None:
+        if status == expected_status:
+            return
+        fixes[expected_status].append(payment_id)
+        self.write_drift(
+            report,
+            STATUS_MISMATCH,
+            payment_id=payment_id,
+            session_id=session_id,
+            local_status=status,
+            stripe_status=expected_status,
+        )
+
+    def apply_fixes(self, run: PaymentReconciliation, fixes: dict) -> None:
+        fixed = 0
+        for status, payment_ids in fixes.items():
+            fixed += (
+                Payment.objects.filter(pk__in=payment_ids)
+                .exclude(status=status)
+                .update(status=status)
+            )
+        fixes.clear()
+        if fixed:
+            run.statuses_fixed += fixed
+            invalidate_payment_report()
+
+    def write_drift(self, report: TextIO, kind: str, **details) -> None:
+        report.write(json.dumps({"kind": kind, **details}) + "\n")
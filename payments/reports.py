@@ -0,0 +1,136 @@
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, QuerySet, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from payments.models import Payment
+
+REPORT_VERSION_KEY = "payments:report:version"
+
+PERIODS = {
+    "day": TruncDay,
+    "month": TruncMonth,
+}
+
+
+def aggregate(queryset: QuerySet, *fields: str) -> QuerySet:
+    return queryset.values(*fields).annotate(
+        total=Sum("money_to_pay"), count=Count("id")
+    )
+
+
+def format_money(value: Decimal | None) -> str:
+    """Format a sum the same way on every database backend."""
+    return str(Decimal(value or 0).quantize(Decimal("0.01")))
+
+
+def serialize_rows(rows: QuerySet, **fields: str) -> list[dict]:
+    """Convert aggregated rows, renaming `fields` values to their keys."""
+    return [
+        {
+            **{name: row[field] for name, field in fields.items()},
+            "total": format_money(row["total"]),
+            "count": row["count"],
+        }
+        for row in rows
+    ]
+
+
+def start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def build_payment_report(
+        period: str = "month",
+        date_from: date = None,
+        date_to: date = None,
+        book_limit: int = 20,
+) -> dict:
+    """
+    Aggregate `money_to_pay` of payments in the database.
+
+    Totals are grouped by status, type, day or month of creation and book
+    (the `book_limit` books with the largest totals). Payments which are
+    not paid yet are reported as outstanding.
+    """
+    payments = Payment.objects.all()
+    if date_from:
+        payments = payments.filter(created_at__gte=start_of_day(date_from))
+    if date_to:
+        payments = payments.filter(
+            created_at__lt=start_of_day(date_to + timedelta(days=1))
+        )
+
+    totals = payments.aggregate(total=Sum("money_to_pay"), count=Count("id"))
+    outstanding = payments.exclude(status=Payment.Status.PAID).aggregate(
+        total=Sum("money_to_pay"), count=Count("id")
+    )
+    by_period = (
+        payments.annotate(period=PERIODS[period]("created_at"))
+        .values("period")
+        .annotate(total=Sum("money_to_pay"), count=Count("id"))
+        .order_by("period")
+    )
+    by_book = aggregate(
+        payments, "borrowing__book_id", "borrowing__book__title"
+    ).order_by("-total")[:book_limit]
+
+    return {
+        "total": format_money(totals["total"]),
+        "count": totals["count"],
+        "outstanding": {
+            "total": format_money(outstanding["total"]),
+            "count": outstanding["count"],
+        },
+        "by_status": serialize_rows(
+            aggregate(payments, "status").order_by("status"),
+            status="status",
+        ),
+        "by_type": serialize_rows(
+            aggregate(payments, "type").order_by("type"),
+            type="type",
+        ),
+        "by_period": [
+            {
+                "period": row["period"].date().isoformat(),
+                "total": format_money(row["total"]),
+                "count": row["count"],
+            }
+            for row in by_period
+        ],
+        "by_book": serialize_rows(
+            by_book,
+            book="borrowing__book_id",
+            title="borrowing__book__title",
+        ),
+    }
+
+
+def get_payment_report(
+        period: str = "month", date_from: date = None, date_to: date = None
+) -> dict:
+    """
+    Return the payment report from the cache, building it on a miss.
+
+    Cached reports are keyed by a version number, so invalidating
+    all of them is a single cache write.
+    """
+    version = cache.get_or_set(REPORT_VERSION_KEY, time.time_ns, timeout=None)
+    key = f"payments:report:{version}:{period}:{date_from}:{date_to}"
+    report = cache.get(key)
+    if report is None:
+        report = build_payment_report(period, date_from, date_to)
+        cache.set(key, report, settings.PAYMENT_REPORT_CACHE_TIMEOUT)
+    return report
+
+
+def invalidate_payment_report() -> None:
+    try:
+        cache.incr(REPORT_VERSION_KEY)
+    except ValueError:
+        cache.set(REPORT_VERSION_KEY, time.time_ns(), timeout=None)
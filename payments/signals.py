@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from payments.models import Payment
+from payments.reports import invalidate_payment_report
+
+# Fields of a payment which the report aggregates
+REPORT_FIELDS = ("status", "type", "money_to_pay")
+
+
+def get_report_state(payment: Payment) -> tuple:
+    # Deferred fields are not loaded just to remember them
+    return tuple(payment.__dict__.get(field) for field in REPORT_FIELDS)
+
+
+@receiver(post_init, sender=Payment)
+def remember_report_state(
+        sender: type, instance: Payment, **kwargs
+) -> None:
+    instance._report_state = get_report_state(instance)
+
+
+@receiver(post_save, sender=Payment)
+def invalidate_report_on_payment_save(
+        sender: type, instance: Payment, created: bool, **kwargs
+) -> None:
+    state = get_report_state(instance)
+    changed = created or state != instance._report_state
+    instance._report_state = state
+    if changed:
+        invalidate_payment_report()
+
+
+@receiver(post_delete, sender=Payment)
+def invalidate_report_on_payment_delete(sender: type, **kwargs) -> None:
+    invalidate_payment_report()
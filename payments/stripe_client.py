@@ -0,0 +1,391 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+import httpx
+import requests
+import stripe
+from django.conf import settings
+from prometheus_client import Counter, Gauge, Histogram
+from requests.adapters import HTTPAdapter
+
+from library_service.instrumentation import track
+
+logger = logging.getLogger(__name__)
+
+STRIPE_REQUESTS = Counter(
+    "stripe_requests_total",
+    "Stripe API calls by operation and outcome.",
+    ["operation", "outcome"],
+)
+STRIPE_REQUEST_DURATION = Histogram(
+    "stripe_request_duration_seconds",
+    "Duration of Stripe API calls, including retries.",
+    ["operation"],
+)
+STRIPE_RETRIES = Counter(
+    "stripe_retries_total",
+    "Retried Stripe API calls.",
+    ["operation"],
+)
+STRIPE_CIRCUIT_STATE = Gauge(
+    "stripe_circuit_state",
+    "State of the Stripe circuit breaker "
+    "(0 - closed, 1 - half open, 2 - open).",
+)
+
+# Errors which mean that Stripe itself is unhealthy. Client errors such as
+# `InvalidRequestError` are a valid answer and do not trip the breaker.
+TRANSIENT_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.RateLimitError,
+    stripe.error.APIError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Stripe while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker over a sliding time window.
+
+    The breaker opens once at least `minimum_calls` calls were made within
+    `window_seconds` and the share of failed ones reaches
+    `failure_rate_threshold`. While open, calls fail fast. After
+    `reset_timeout` seconds a single trial call is let through
+    (half open): its success closes the breaker, its failure opens it again.
+    A trial which ends without an answer, e.g. because it was cancelled,
+    is released, so the next call becomes the trial.
+    """
+
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    def __init__(
+            self,
+            failure_rate_threshold: float,
+            minimum_calls: int,
+            window_seconds: float,
+            reset_timeout: float,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self._calls = deque()
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        return self.acquire() is not None
+
+    def acquire(self) -> int | None:
+        """
+        Return the state a call is let through in, or None if it has to
+        fail fast. A call let through half open is the trial.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return self.CLOSED
+            if (
+                self.state == self.OPEN
+                and self.clock() - self._opened_at >= self.reset_timeout
+            ):
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return self.HALF_OPEN
+            return None
+
+    def release_trial(self) -> None:
+        """Let the next call through as the trial, the last one ended."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._calls.clear()
+                self._set_state(self.CLOSED)
+            else:
+                self._record(failed=False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+            self._record(failed=True)
+            failures = sum(failed for _, failed in self._calls)
+            if (
+                len(self._calls) >= self.minimum_calls
+                and failures / len(self._calls) >= self.failure_rate_threshold
+            ):
+                self._open()
+
+    def _record(self, failed: bool) -> None:
+        now = self.clock()
+        self._calls.append((now, failed))
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self) -> None:
+        self._opened_at = self.clock()
+        self._calls.clear()
+        self._set_state(self.OPEN)
+        logger.warning("Stripe circuit breaker opened")
+
+    def _set_state(self, state: int) -> None:
+        self.state = state
+        self._trial_in_flight = False
+        STRIPE_CIRCUIT_STATE.set(state)
+
+
+class StripeGateway:
+    """
+    Shared access point to the Stripe API.
+
+    Wraps a `stripe.StripeClient` that keeps connections alive in a pooled
+    `requests` session and uses bounded timeouts. Safe calls (reads, and
+    creates sent with an idempotency key) are retried with jittered
+    exponential backoff, and every call goes through a circuit breaker,
+    so a Stripe outage fails fast with `CircuitOpenError`.
+
+    Async views use the `*_async` methods instead, which go through the
+    same breaker with an `httpx` client of the running event loop.
+    """
+
+    def __init__(self, options: dict) -> None:
+        self.options = options
+        self.breaker = CircuitBreaker(
+            failure_rate_threshold=options["FAILURE_RATE_THRESHOLD"],
+            minimum_calls=options["MINIMUM_CALLS"],
+            window_seconds=options["WINDOW_SECONDS"],
+            reset_timeout=options["RESET_TIMEOUT"],
+        )
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> stripe.StripeClient:
+        # Built lazily, so the project can be imported without a Stripe key
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._build_client()
+            return self._client
+
+    @property
+    def async_client(self) -> stripe.StripeClient:
+        # Connections of an httpx client belong to the event loop they
+        # were opened in, so every loop gets a client of its own
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = self._build_client(
+                stripe.HTTPXClient(
+                    timeout=httpx.Timeout(
+                        self.options["READ_TIMEOUT"],
+                        connect=self.options["CONNECT_TIMEOUT"],
+                    )
+                )
+            )
+        return self._async_clients[loop]
+
+    def _build_client(
+            self, http_client: stripe.HTTPClient = None
+    ) -> stripe.StripeClient:
+        if http_client is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.options["POOL_MAXSIZE"],
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            http_client = stripe.RequestsClient(
+                session=session,
+                timeout=(
+                    self.options["CONNECT_TIMEOUT"],
+                    self.options["READ_TIMEOUT"],
+                ),
+            )
+        return stripe.StripeClient(
+            settings.STRIPE_API_KEY,
+            base_addresses={"api": settings.STRIPE_API_BASE},
+            http_client=http_client,
+            max_network_retries=0,
+        )
+
+    def reset(self) -> None:
+        """Drop the current clients, so they are rebuilt from the settings."""
+        with self._client_lock:
+            self._client = None
+            self._async_clients.clear()
+
+    def create_checkout_session(
+            self, idempotency_key: str = None, **params
+    ) -> stripe.checkout.Session:
+        options = {}
+        if idempotency_key:
+            options["idempotency_key"] = idempotency_key
+        return self.call(
+            "checkout.sessions.create",
+            lambda: self.client.checkout.sessions.create(
+                params=params, options=options
+            ),
+            retry=bool(idempotency_key),
+        )
+
+    def retrieve_checkout_session(
+            self, session_id: str
+    ) -> stripe.checkout.Session:
+        return self.call(
+            "checkout.sessions.retrieve",
+            lambda: self.client.checkout.sessions.retrieve(session_id),
+            retry=True,
+        )
+
+    async def create_checkout_session_async(
+            self, idempotency_key: str = None, **params
+    ) -> stripe.checkout.Session:
+        options = {}
+        if idempotency_key:
+            options["idempotency_key"] = idempotency_key
+        return await self.call_async(
+            "checkout.sessions.create",
+            lambda: self.async_client.checkout.sessions.create_async(
+                params=params, options=options
+            ),
+            retry=bool(idempotency_key),
+        )
+
+    async def retrieve_checkout_session_async(
+            self, session_id: str
+    ) -> stripe.checkout.Session:
+        return await self.call_async(
+            "checkout.sessions.retrieve",
+            lambda: self.async_client.checkout.sessions.retrieve_async(
+                session_id
+            ),
+            retry=True,
+        )
+
+    def list_checkout_sessions(self, **params) -> stripe.ListObject:
+        return self.call(
+            "checkout.sessions.list",
+            lambda: self.client.checkout.sessions.list(params=params),
+            retry=True,
+        )
+
+    def call(self, operation: str, func: Callable, retry: bool = False):
+        """
+        Run a Stripe API call through the circuit breaker.
+
+        Transient errors are retried up to `MAX_RETRIES` times when `retry`
+        is set; the last error is re-raised.
+        """
+        state = self.breaker.acquire()
+        if state is None:
+            STRIPE_REQUESTS.labels(operation, "short_circuited").inc()
+            raise CircuitOpenError("Stripe is temporarily unavailable")
+
+        attempts = self.options["MAX_RETRIES"] + 1 if retry else 1
+        with (
+            STRIPE_REQUEST_DURATION.labels(operation).time(),
+            track("stripe"),
+            self._releasing_trial(state),
+        ):
+            for attempt in range(attempts):
+                try:
+                    result = func()
+                except TRANSIENT_ERRORS:
+                    if attempt + 1 == attempts:
+                        self.breaker.record_failure()
+                        STRIPE_REQUESTS.labels(operation, "error").inc()
+                        raise
+                    STRIPE_RETRIES.labels(operation).inc()
+                    time.sleep(self._backoff(attempt))
+                except stripe.error.StripeError:
+                    self.breaker.record_success()
+                    STRIPE_REQUESTS.labels(operation, "rejected").inc()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    STRIPE_REQUESTS.labels(operation, "success").inc()
+                    return result
+
+    async def call_async(
+            self,
+            operation: str,
+            func: Callable[[], Awaitable],
+            retry: bool = False,
+    ):
+        """Same as `call`, for coroutines of the async client."""
+        state = self.breaker.acquire()
+        if state is None:
+            STRIPE_REQUESTS.labels(operation, "short_circuited").inc()
+            raise CircuitOpenError("Stripe is temporarily unavailable")
+
+        attempts = self.options["MAX_RETRIES"] + 1 if retry else 1
+        with (
+            STRIPE_REQUEST_DURATION.labels(operation).time(),
+            track("stripe"),
+            self._releasing_trial(state),
+        ):
+            for attempt in range(attempts):
+                try:
+                    result = await func()
+                except TRANSIENT_ERRORS:
+                    if attempt + 1 == attempts:
+                        self.breaker.record_failure()
+                        STRIPE_REQUESTS.labels(operation, "error").inc()
+                        raise
+                    STRIPE_RETRIES.labels(operation).inc()
+                    await asyncio.sleep(self._backoff(attempt))
+                except stripe.error.StripeError:
+                    self.breaker.record_success()
+                    STRIPE_REQUESTS.labels(operation, "rejected").inc()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    STRIPE_REQUESTS.labels(operation, "success").inc()
+                    return result
+
+    @contextmanager
+    def _releasing_trial(self, state: int):
+        # Stripe errors are recorded by the callers. Anything else, e.g. a
+        # bug, a timeout of a Celery task or a cancelled coroutine, is no
+        # answer of Stripe, so the trial is only given back
+        try:
+            yield
+        except BaseException as error:
+            if state == CircuitBreaker.HALF_OPEN and not isinstance(
+                error, stripe.error.StripeError
+            ):
+                self.breaker.release_trial()
+            raise
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff capped at `MAX_BACKOFF`."""
+        ceiling = min(
+            self.options["MAX_BACKOFF"],
+            self.options["RETRY_BACKOFF"] * 2 ** attempt,
+        )
+        return random.uniform(0, ceiling)
+
+
+stripe_gateway = StripeGateway(settings.STRIPE_CLIENT)
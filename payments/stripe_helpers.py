@@ -1,14 +1,17 @@
 from decimal import Decimal
 
-import stripe
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.urls import reverse
 from rest_framework.request import Request
 
 from borrowings.models import Borrowing
-from payments.models import Payment
-
-stripe.api_key = settings.STRIPE_API_KEY
+from payments.models import Payment, ReplacedSession
+from payments.stripe_client import (
+    TRANSIENT_ERRORS,
+    CircuitOpenError,
+    stripe_gateway,
+)
+from payments.tasks import create_deferred_checkout_session
 
 FINE_MULTIPLIER = 2
 
@@ -28,9 +31,30 @@ def create_stripe_session(borrowing: Borrowing, request: Request) -> None:
     Creates:
     - A `Payment` object with the relevant information about the transaction.
     """
+    checkout = build_borrowing_checkout(borrowing, request)
+    if checkout:
+        start_checkout_session(*checkout)
+
+
+async def acreate_stripe_session(
+        borrowing: Borrowing, request: Request
+) -> None:
+    """Async version of `create_stripe_session` for async views."""
+    checkout = build_borrowing_checkout(borrowing, request)
+    if checkout:
+        await astart_checkout_session(*checkout)
+
+
+def build_borrowing_checkout(
+        borrowing: Borrowing, request: Request
+) -> tuple[Payment, dict, str] | None:
+    """
+    Build the payment of a borrowing, the parameters of its Checkout
+    session and its idempotency key. Returns None if nothing is due.
+    """
     if borrowing.actual_return_date:
         if borrowing.actual_return_date <= borrowing.expected_return_date:
-            return
+            return None
         latest_date = borrowing.actual_return_date
         earliest_date = borrowing.expected_return_date
         multiplier = FINE_MULTIPLIER
@@ -44,73 +68,144 @@ def create_stripe_session(borrowing: Borrowing, request: Request) -> None:
     total_days = (latest_date - earliest_date).days
     total_price = borrowing.book.daily_fee * Decimal(total_days) * multiplier
 
-    session = stripe.checkout.Session.create(
-        payment_method_types=["card"],
-        line_items=[
-            {
-                "price_data": {
-                    "currency": "usd",
-                    "product_data": {
-                        "name": borrowing.book.title,
-                    },
-                    "unit_amount": int(total_price * 100),
-                },
-                "quantity": 1,
-            }
-        ],
-        mode="payment",
-        locale="en",
-        success_url=(
-            request.build_absolute_uri(reverse("payments:payment-success"))
-            + "?session_id={CHECKOUT_SESSION_ID}"
-        ),
-        cancel_url=request.build_absolute_uri(
-            reverse("payments:payment-cancel")
-        ),
-    )
-    payment = Payment.objects.create(
+    payment = Payment(
         borrowing=borrowing,
         type=payment_type,
         status=Payment.Status.PENDING,
-        session_url=session.url,
-        session_id=session.id,
         money_to_pay=total_price,
     )
-    payment.save()
+    return (
+        payment,
+        build_checkout_session_params(
+            borrowing.book.title, total_price, request
+        ),
+        f"borrowing-{borrowing.id}-{payment_type}",
+    )
 
 
-def renew_stripe_session(payment: Payment, request: Request) -> None:
+def renew_stripe_session(payment: Payment, request: Request) -> bool:
     """
     This function creates a new Stripe Checkout session for an expired payment,
     allowing the user to complete the payment again. It updates the payment
     status to 'PENDING' and assigns a new session URL and session ID to the
     payment.
+
+    Returns False if Stripe is unavailable and the session
+    will be created later.
     """
-    session = stripe.checkout.Session.create(
-        payment_method_types=["card"],
-        line_items=[
+    payment.status = Payment.Status.PENDING
+    checkout = build_renewal_checkout(payment, request)
+    if payment.session_id:
+        ReplacedSession.objects.get_or_create(
+            session_id=payment.session_id, defaults={"payment": payment}
+        )
+    return start_checkout_session(*checkout)
+
+
+async def arenew_stripe_session(payment: Payment, request: Request) -> bool:
+    """Async version of `renew_stripe_session` for async views."""
+    payment.status = Payment.Status.PENDING
+    checkout = build_renewal_checkout(payment, request)
+    if payment.session_id:
+        await ReplacedSession.objects.aget_or_create(
+            session_id=payment.session_id, defaults={"payment": payment}
+        )
+    return await astart_checkout_session(*checkout)
+
+
+def build_renewal_checkout(
+        payment: Payment, request: Request
+) -> tuple[Payment, dict, str]:
+    return (
+        payment,
+        build_checkout_session_params(
+            payment.borrowing.book.title, payment.money_to_pay, request
+        ),
+        f"payment-{payment.id}-renew-{payment.session_id}",
+    )
+
+
+def build_checkout_session_params(
+        title: str, price: Decimal, request: Request
+) -> dict:
+    """Build the parameters of a Checkout session paying for one book."""
+    return {
+        "payment_method_types": ["card"],
+        "line_items": [
             {
                 "price_data": {
                     "currency": "usd",
                     "product_data": {
-                        "name": payment.borrowing.book.title,
+                        "name": title,
                     },
-                    "unit_amount": int(payment.money_to_pay * 100),
+                    "unit_amount": int(price * 100),
                 },
                 "quantity": 1,
             }
         ],
-        mode="payment",
-        locale="en",
-        success_url=(
+        "mode": "payment",
+        "locale": "en",
+        "success_url": (
             request.build_absolute_uri(reverse("payments:payment-success"))
             + "?session_id={CHECKOUT_SESSION_ID}"
         ),
-        cancel_url=request.build_absolute_uri(
+        "cancel_url": request.build_absolute_uri(
             reverse("payments:payment-cancel")
         ),
-    )
-    payment.status = Payment.Status.PENDING
+    }
+
+
+def start_checkout_session(
+        payment: Payment, params: dict, idempotency_key: str
+) -> bool:
+    """
+    Open a Stripe Checkout session for the payment and save the payment.
+
+    If Stripe is unavailable, the payment is saved without a session and
+    the session is created later by the `create_deferred_checkout_session`
+    task. Returns True if the session was created right away.
+    """
+    try:
+        session = stripe_gateway.create_checkout_session(
+            idempotency_key=idempotency_key, **params
+        )
+    except (CircuitOpenError, *TRANSIENT_ERRORS):
+        payment.session_url = ""
+        payment.session_id = ""
+        payment.save()
+        create_deferred_checkout_session.delay(
+            payment.id, params, idempotency_key
+        )
+        return False
+
     payment.session_url = session.url
     payment.session_id = session.id
     payment.save()
+    return True
+
+
+async def astart_checkout_session(
+        payment: Payment, params: dict, idempotency_key: str
+) -> bool:
+    """
+    Async version of `start_checkout_session`.
+
+    The worker is free to serve other requests while Stripe answers.
+    """
+    try:
+        session = await stripe_gateway.create_checkout_session_async(
+            idempotency_key=idempotency_key, **params
+        )
+    except (CircuitOpenError, *TRANSIENT_ERRORS):
+        payment.session_url = ""
+        payment.session_id = ""
+        await payment.asave()
+        await sync_to_async(create_deferred_checkout_session.delay)(
+            payment.id, params, idempotency_key
+        )
+        return False
+
+    payment.session_url = session.url
+    payment.session_id = session.id
+    await payment.asave()
+    return True
@@ -1,23 +1,128 @@
+import logging
+
 import stripe
 from celery import shared_task
-from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from library_service.task_metrics import count_task_event
+from notifications.tasks import PAYMENT_PAID, send_telegram_message
+from payments.models import Payment, StripeEvent
+from payments.reconciliation import PaymentReconciler
+from payments.stripe_client import (
+    TRANSIENT_ERRORS,
+    CircuitOpenError,
+    stripe_gateway,
+)
+from payments.webhooks import (
+    EXPIRED_EVENT_TYPES,
+    PAID_EVENT_TYPES,
+    handle_checkout_session_completed,
+    handle_checkout_session_expired,
+)
 
-from payments.models import Payment
+logger = logging.getLogger(__name__)
 
-stripe.api_key = settings.STRIPE_API_KEY
+
+def notify_payment_paid(payment: Payment) -> None:
+    message = (
+        f"{payment.get_type_display()} for borrowing "
+        f"(ID: {payment.borrowing.id}):\n"
+        f"Amount: $ {payment.money_to_pay}\n"
+        f"User: {payment.borrowing.user.email}"
+    )
+    send_telegram_message(
+        message, PAYMENT_PAID, event_id=f"payment_paid:{payment.id}"
+    )
 
 
 @shared_task
 def check_expired_sessions() -> None:
-    pending_payments = Payment.objects.filter(status=Payment.Status.PENDING)
+    """
+    Catch up on pending payments whose webhook events were missed: paid
+    sessions mark their payment paid and expired ones mark it expired.
+    """
+    pending_payments = Payment.objects.filter(
+        status=Payment.Status.PENDING
+    ).exclude(session_id="")
 
     for payment in pending_payments:
         try:
-            session = stripe.checkout.Session.retrieve(payment.session_id)
-            if session.status != "open":
-                payment.status = Payment.Status.EXPIRED
-                payment.save()
+            session = stripe_gateway.retrieve_checkout_session(
+                payment.session_id
+            )
+            if session.payment_status == "paid":
+                if paid_payment := handle_checkout_session_completed(session):
+                    count_task_event("paid_payments")
+                    notify_payment_paid(paid_payment)
+            elif session.status == "expired":
+                if handle_checkout_session_expired(session):
+                    count_task_event("expired_payments")
 
         except stripe.error.InvalidRequestError:
             payment.status = Payment.Status.EXPIRED
             payment.save()
+            count_task_event("expired_payments")
+        except (CircuitOpenError, *TRANSIENT_ERRORS):
+            logger.warning("Stripe is unavailable, skipping expiry check")
+            return
+
+
+@shared_task(
+    autoretry_for=(CircuitOpenError, *TRANSIENT_ERRORS),
+    retry_backoff=30,
+    retry_backoff_max=600,
+    max_retries=20,
+)
+def create_deferred_checkout_session(
+        payment_id: int, params: dict, idempotency_key: str
+) -> None:
+    """
+    Create the Checkout session of a payment which was saved while Stripe
+    was unavailable. Retried with backoff until Stripe recovers.
+    """
+    session = stripe_gateway.create_checkout_session(
+        idempotency_key=idempotency_key, **params
+    )
+    Payment.objects.filter(pk=payment_id).update(
+        session_url=session.url, session_id=session.id
+    )
+
+
+@shared_task
+def process_stripe_event(event_id: str) -> None:
+    """
+    Apply a stored Stripe webhook event to the local payments.
+
+    The event row is locked while it is processed and marked as processed
+    afterwards, so repeated deliveries of the same event are no-ops.
+    A Telegram notification is sent once a payment becomes paid.
+    """
+    paid_payment = None
+
+    with transaction.atomic():
+        event = (
+            StripeEvent.objects.select_for_update()
+            .filter(event_id=event_id, processed_at__isnull=True)
+            .first()
+        )
+        if event is None:
+            return
+
+        session = event.payload["data"]["object"]
+        if event.type in PAID_EVENT_TYPES:
+            paid_payment = handle_checkout_session_completed(session)
+        elif event.type in EXPIRED_EVENT_TYPES:
+            handle_checkout_session_expired(session)
+
+        event.processed_at = timezone.now()
+        event.save(update_fields=["processed_at"])
+
+    if paid_payment:
+        notify_payment_paid(paid_payment)
+
+
+@shared_task
+def reconcile_payments() -> None:
+    """Reconcile payments created since the last checkpoint with Stripe."""
+    PaymentReconciler().run()
@@ -0,0 +1,101 @@
+import json
+
+import stripe
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+
+from payments.fake_stripe import (
+    FakeStripe,
+    FakeStripeServer,
+    sign_webhook_payload,
+)
+from payments.stripe_client import StripeGateway
+from payments.tests.utils import SESSION_PARAMS, TEST_OPTIONS
+
+
+class TestFakeStripeServer(SimpleTestCase):
+    """Test that the Stripe client works against the fake Stripe server."""
+
+    def setUp(self) -> None:
+        self.server = FakeStripeServer()
+        self.server.start()
+        self.settings_override = override_settings(
+            STRIPE_API_BASE=self.server.url, STRIPE_API_KEY="sk_test_fake"
+        )
+        self.settings_override.enable()
+        self.gateway = StripeGateway({**TEST_OPTIONS, "MINIMUM_CALLS": 100})
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        self.server.stop()
+
+    def test_create_and_retrieve_session(self) -> None:
+        session = self.gateway.create_checkout_session(**SESSION_PARAMS)
+
+        retrieved = self.gateway.retrieve_checkout_session(session.id)
+
+        self.assertEqual(retrieved.id, session.id)
+        self.assertEqual(retrieved.status, "open")
+        self.assertEqual(retrieved.amount_total, 700)
+
+    def test_create_and_retrieve_session_async(self) -> None:
+        async def create_and_retrieve():
+            session = await self.gateway.create_checkout_session_async(
+                **SESSION_PARAMS
+            )
+            return await self.gateway.retrieve_checkout_session_async(
+                session.id
+            )
+
+        retrieved = async_to_sync(create_and_retrieve)()
+
+        self.assertEqual(retrieved.status, "open")
+        self.assertEqual(retrieved.amount_total, 700)
+
+    def test_completed_and_expired_sessions(self) -> None:
+        paid = self.gateway.create_checkout_session(**SESSION_PARAMS)
+        expired = self.gateway.create_checkout_session(**SESSION_PARAMS)
+
+        self.server.stripe.complete_session(paid.id)
+        self.server.stripe.expire_session(expired.id)
+
+        paid = self.gateway.retrieve_checkout_session(paid.id)
+        expired = self.gateway.retrieve_checkout_session(expired.id)
+        self.assertEqual(paid.payment_status, "paid")
+        self.assertEqual(expired.status, "expired")
+
+    def test_missing_session(self) -> None:
+        with self.assertRaises(stripe.error.InvalidRequestError):
+            self.gateway.retrieve_checkout_session("cs_test_missing")
+
+    def test_list_sessions_pages(self) -> None:
+        for _ in range(3):
+            self.gateway.create_checkout_session(**SESSION_PARAMS)
+
+        page = self.gateway.client.checkout.sessions.list(params={"limit": 2})
+        next_page = self.gateway.client.checkout.sessions.list(
+            params={"limit": 2, "starting_after": page.data[-1].id}
+        )
+
+        self.assertTrue(page.has_more)
+        self.assertEqual(len(page.data), 2)
+        self.assertFalse(next_page.has_more)
+        self.assertEqual(len(next_page.data), 1)
+
+    def test_error_injection(self) -> None:
+        self.server.stripe.error_rate = 1
+
+        with self.assertRaises(stripe.error.APIError):
+            self.gateway.retrieve_checkout_session("cs_test_missing")
+
+    def test_webhook_events_are_signed(self) -> None:
+        fake_stripe = FakeStripe(webhook_secret="whsec_test")
+        payload = json.dumps(
+            fake_stripe.build_event("checkout.session.completed", {})
+        )
+
+        event = stripe.Webhook.construct_event(
+            payload, sign_webhook_payload(payload, "whsec_test"), "whsec_test"
+        )
+
+        self.assertEqual(event.type, "checkout.session.completed")
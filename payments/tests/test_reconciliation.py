@@ -0,0 +1,130 @@
+import json
+import tempfile
+from datetime import timedelta
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from payments.fake_stripe import FakeStripeServer
+from payments.models import Payment, PaymentReconciliation
+from payments.reconciliation import PaymentReconciler
+from payments.stripe_client import stripe_gateway
+from payments.stripe_helpers import renew_stripe_session
+from payments.tests.utils import SESSION_PARAMS, PaymentTestMixin
+
+
+class TestPaymentReconciler(PaymentTestMixin, TestCase):
+    """Test cases for reconciling local payments with Stripe."""
+
+    def setUp(self) -> None:
+        self.server = FakeStripeServer()
+        self.server.start()
+        self.settings_override = override_settings(
+            STRIPE_API_BASE=self.server.url, STRIPE_API_KEY="sk_test_fake"
+        )
+        self.settings_override.enable()
+        stripe_gateway.reset()
+        self.report_dir = tempfile.TemporaryDirectory()
+        self.reconciler = PaymentReconciler(
+            {
+                "REPORT_DIR": self.report_dir.name,
+                "WINDOW_MINUTES": 30,
+                "SETTLE_MINUTES": 0,
+                "BATCH_SIZE": 2,
+                "INITIAL_LOOKBACK_DAYS": 1,
+            }
+        )
+        self.payment = self.create_payment()
+        self.since = timezone.now() - timedelta(hours=1)
+        self.until = timezone.now() + timedelta(minutes=1)
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        stripe_gateway.reset()
+        self.server.stop()
+        self.report_dir.cleanup()
+
+    def create_payment_with_session(self) -> Payment:
+        session = stripe_gateway.create_checkout_session(**SESSION_PARAMS)
+        payment = Payment.objects.get(pk=self.payment.pk)
+        payment.pk = None
+        payment.session_id = session.id
+        payment.save()
+        return payment
+
+    def read_report(self, run: PaymentReconciliation) -> list[dict]:
+        with open(run.report_file) as report:
+            return [json.loads(line) for line in report]
+
+    def test_drifted_statuses_are_fixed(self) -> None:
+        paid = self.create_payment_with_session()
+        expired = self.create_payment_with_session()
+        pending = self.create_payment_with_session()
+        self.server.stripe.complete_session(paid.session_id)
+        self.server.stripe.expire_session(expired.session_id)
+        self.payment.delete()
+
+        run = self.reconciler.run(self.since, self.until)
+
+        statuses = dict(Payment.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[paid.pk], Payment.Status.PAID)
+        self.assertEqual(statuses[expired.pk], Payment.Status.EXPIRED)
+        self.assertEqual(statuses[pending.pk], Payment.Status.PENDING)
+        self.assertEqual(run.sessions_checked, 3)
+        self.assertEqual(run.statuses_fixed, 2)
+        self.assertEqual(
+            sorted(drift["payment_id"] for drift in self.read_report(run)),
+            sorted([paid.pk, expired.pk]),
+        )
+
+    def test_missing_sessions_and_payments_are_reported(self) -> None:
+        stray_session = stripe_gateway.create_checkout_session(
+            **SESSION_PARAMS
+        )
+
+        run = self.reconciler.run(self.since, self.until)
+
+        self.assertEqual(run.missing_locally, 1)
+        self.assertEqual(run.missing_in_stripe, 1)
+        kinds = {
+            drift["kind"]: drift for drift in self.read_report(run)
+        }
+        self.assertEqual(
+            kinds["missing_locally"]["session_id"], stray_session.id
+        )
+        self.assertEqual(
+            kinds["missing_in_stripe"]["payment_id"], self.payment.pk
+        )
+
+    def test_renewed_sessions_are_superseded(self) -> None:
+        payment = self.create_payment_with_session()
+        old_session_id = payment.session_id
+        self.server.stripe.expire_session(old_session_id)
+        payment.status = Payment.Status.EXPIRED
+        payment.save()
+        self.payment.delete()
+
+        renew_stripe_session(payment, RequestFactory().get("/"))
+        run = self.reconciler.run(self.since, self.until)
+
+        self.assertEqual(run.sessions_checked, 2)
+        self.assertEqual(run.missing_locally, 0)
+        self.assertEqual(run.statuses_fixed, 0)
+        self.assertEqual(
+            self.read_report(run),
+            [
+                {
+                    "kind": "superseded",
+                    "payment_id": payment.pk,
+                    "session_id": old_session_id,
+                    "stripe_status": Payment.Status.EXPIRED,
+                }
+            ],
+        )
+
+    def test_next_run_starts_from_checkpoint(self) -> None:
+        first_run = self.reconciler.run(self.since, self.until)
+
+        self.assertEqual(self.reconciler.get_checkpoint(), self.until)
+        self.assertIsNotNone(first_run.finished_at)
+        self.assertIsNone(self.reconciler.run(until=self.until))
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payments.models import Payment
+from payments.reports import REPORT_VERSION_KEY
+from payments.tests.utils import PaymentTestMixin
+
+PAYMENT_REPORT_URL = reverse("payments:payment-report")
+
+
+class TestPaymentReport(PaymentTestMixin, TestCase):
+    """Test cases for the aggregated payments report."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        Payment.objects.all().delete()
+        self.client = APIClient()
+        self.payment = self.create_payment()
+        Payment.objects.create(
+            borrowing=self.payment.borrowing,
+            type=Payment.Type.FINE,
+            status=Payment.Status.PAID,
+            session_url="https://test.url",
+            session_id="cs_test_fine",
+            money_to_pay=3,
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="1qazcde3"
+        )
+
+    def test_report_is_available_only_to_admin(self) -> None:
+        self.client.force_authenticate(self.payment.borrowing.user)
+
+        response = self.client.get(PAYMENT_REPORT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_report_totals(self) -> None:
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get(PAYMENT_REPORT_URL, {"period": "day"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], "10.00")
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(response.data["outstanding"]["total"], "7.00")
+        self.assertEqual(
+            {row["type"]: row["total"] for row in response.data["by_type"]},
+            {Payment.Type.PAYMENT: "7.00", Payment.Type.FINE: "3.00"},
+        )
+        self.assertEqual(len(response.data["by_period"]), 1)
+        self.assertEqual(response.data["by_book"][0]["title"], "Test Book")
+
+    def test_report_is_invalidated_when_status_changes(self) -> None:
+        self.client.force_authenticate(self.admin)
+        self.client.get(PAYMENT_REPORT_URL)
+
+        self.payment.status = Payment.Status.PAID
+        self.payment.save()
+        response = self.client.get(PAYMENT_REPORT_URL)
+
+        self.assertEqual(response.data["outstanding"]["total"], "0.00")
+        self.assertEqual(response.data["outstanding"]["count"], 0)
+
+    def test_report_is_kept_when_other_fields_change(self) -> None:
+        self.client.force_authenticate(self.admin)
+        self.client.get(PAYMENT_REPORT_URL)
+        version = cache.get(REPORT_VERSION_KEY)
+
+        self.payment.session_url = "https://renewed.url"
+        self.payment.save()
+
+        self.assertEqual(cache.get(REPORT_VERSION_KEY), version)
+
+    def test_invalid_parameters(self) -> None:
+        self.client.force_authenticate(self.admin)
+
+        for params in (
+            {"period": "year"},
+            {"date_from": "yesterday"},
+            {"date_to": "2024-02-30"},
+        ):
+            response = self.client.get(PAYMENT_REPORT_URL, params)
+
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
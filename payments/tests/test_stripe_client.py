@@ -0,0 +1,192 @@
+import asyncio
+from unittest.mock import AsyncMock, patch, MagicMock
+
+import stripe
+from django.test import SimpleTestCase
+
+from library_service.tests.utils import FakeClock
+from payments.stripe_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    StripeGateway,
+)
+from payments.stripe_helpers import start_checkout_session
+from payments.tests.utils import TEST_OPTIONS
+
+
+class TestCircuitBreaker(SimpleTestCase):
+    """Test cases for the Stripe circuit breaker states."""
+
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_rate_threshold=0.5,
+            minimum_calls=4,
+            window_seconds=30,
+            reset_timeout=10,
+            clock=self.clock,
+        )
+
+    def test_opens_when_failure_rate_is_reached(self) -> None:
+        self.breaker.record_success()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_old_calls_leave_the_window(self) -> None:
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now = 31
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_closes_the_breaker(self) -> None:
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now = 10
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_trial_opens_the_breaker_again(self) -> None:
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.allow_request()
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+
+class TestStripeGateway(SimpleTestCase):
+    """Test cases for retries and fail-fast behaviour of Stripe calls."""
+
+    def setUp(self) -> None:
+        self.gateway = StripeGateway(TEST_OPTIONS)
+        self.gateway._client = MagicMock()
+        self.retrieve = self.gateway._client.checkout.sessions.retrieve
+        self.create = self.gateway._client.checkout.sessions.create
+
+    def test_safe_call_is_retried(self) -> None:
+        self.retrieve.side_effect = [
+            stripe.error.APIConnectionError("timeout"),
+            MagicMock(id="cs_test"),
+        ]
+
+        session = self.gateway.retrieve_checkout_session("cs_test")
+
+        self.assertEqual(session.id, "cs_test")
+        self.assertEqual(self.retrieve.call_count, 2)
+
+    def test_create_without_idempotency_key_is_not_retried(self) -> None:
+        self.create.side_effect = stripe.error.APIConnectionError("timeout")
+
+        with self.assertRaises(stripe.error.APIConnectionError):
+            self.gateway.create_checkout_session(mode="payment")
+
+        self.create.assert_called_once()
+
+    def test_create_with_idempotency_key_is_retried(self) -> None:
+        self.create.side_effect = [
+            stripe.error.APIError("server error"),
+            MagicMock(id="cs_test"),
+        ]
+
+        self.gateway.create_checkout_session(
+            idempotency_key="key", mode="payment"
+        )
+
+        self.assertEqual(self.create.call_count, 2)
+        self.create.assert_called_with(
+            params={"mode": "payment"}, options={"idempotency_key": "key"}
+        )
+
+    def test_client_errors_do_not_open_the_breaker(self) -> None:
+        self.retrieve.side_effect = stripe.error.InvalidRequestError(
+            "No such session", "id"
+        )
+
+        for _ in range(3):
+            with self.assertRaises(stripe.error.InvalidRequestError):
+                self.gateway.retrieve_checkout_session("cs_test")
+
+        self.assertEqual(self.gateway.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_open_breaker_fails_fast(self) -> None:
+        self.retrieve.side_effect = stripe.error.APIConnectionError("timeout")
+        for _ in range(2):
+            with self.assertRaises(stripe.error.APIConnectionError):
+                self.gateway.retrieve_checkout_session("cs_test")
+        self.retrieve.reset_mock()
+
+        with self.assertRaises(CircuitOpenError):
+            self.gateway.retrieve_checkout_session("cs_test")
+
+        self.retrieve.assert_not_called()
+
+    def open_half(self) -> None:
+        self.gateway.breaker = CircuitBreaker(
+            failure_rate_threshold=0.5,
+            minimum_calls=1,
+            window_seconds=30,
+            reset_timeout=0,
+        )
+        self.gateway.breaker.record_failure()
+
+    def test_trial_is_released_after_an_unexpected_error(self) -> None:
+        self.open_half()
+        self.retrieve.side_effect = [RuntimeError, MagicMock(id="cs_test")]
+
+        with self.assertRaises(RuntimeError):
+            self.gateway.retrieve_checkout_session("cs_test")
+        self.gateway.retrieve_checkout_session("cs_test")
+
+        self.assertEqual(self.gateway.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_trial_is_released_after_a_cancelled_call(self) -> None:
+        self.open_half()
+
+        async def cancelled_call() -> None:
+            await self.gateway.call_async(
+                "checkout.sessions.retrieve",
+                AsyncMock(side_effect=asyncio.CancelledError),
+            )
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancelled_call())
+
+        self.assertTrue(self.gateway.breaker.allow_request())
+
+
+class TestDeferredCheckoutSession(SimpleTestCase):
+    """Test that payments are queued while Stripe is unavailable."""
+
+    @patch("payments.stripe_helpers.create_deferred_checkout_session.delay")
+    @patch(
+        "payments.stripe_helpers.stripe_gateway.create_checkout_session",
+        side_effect=CircuitOpenError,
+    )
+    def test_session_creation_is_queued(
+            self, mock_create: MagicMock, mock_delay: MagicMock
+    ) -> None:
+        payment = MagicMock(id=1)
+
+        created = start_checkout_session(payment, {"mode": "payment"}, "key")
+
+        self.assertFalse(created)
+        self.assertEqual(payment.session_id, "")
+        payment.save.assert_called_once()
+        mock_delay.assert_called_once_with(1, {"mode": "payment"}, "key")
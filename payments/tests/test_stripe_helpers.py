@@ -46,7 +46,9 @@ class TestCreateStripeSession(TestCase):
     def setUp(self) -> None:
         self.user = get_user_model().objects.get(pk=2)
         self.client.force_login(self.user)
-        self.patcher = patch("stripe.checkout.Session.create")
+        self.patcher = patch(
+            "payments.stripe_helpers.stripe_gateway.create_checkout_session"
+        )
         self.mock_stripe_create_session = self.patcher.start()
         self.mock_stripe_create_session.return_value = MagicMock(
             id=TEST_SESSION_ID, url=TEST_SESSION_URL
@@ -69,6 +71,7 @@ class TestCreateStripeSession(TestCase):
 
         unit_amount = int(Decimal(7) * borrowing.book.daily_fee * 100)
         self.mock_stripe_create_session.assert_called_once_with(
+            idempotency_key=f"borrowing-{borrowing.id}-PAYMENT",
             payment_method_types=["card"],
             line_items=[
                 {
@@ -112,6 +115,7 @@ class TestCreateStripeSession(TestCase):
 
         fine_unit_amount = int(Decimal(7) * borrowing.book.daily_fee * 100 * 2)
         self.mock_stripe_create_session.assert_called_once_with(
+            idempotency_key=f"borrowing-{borrowing.id}-FINE",
             payment_method_types=["card"],
             line_items=[
                 {
@@ -167,7 +171,9 @@ class TestRenewStripeSession(TestCase):
         self.patcher.stop()
 
     def setUp(self) -> None:
-        self.patcher = patch("stripe.checkout.Session.create")
+        self.patcher = patch(
+            "payments.stripe_helpers.stripe_gateway.create_checkout_session"
+        )
         self.mock_stripe_create_session = self.patcher.start()
         self.mock_stripe_create_session.return_value = MagicMock(
             id=TEST_SESSION_ID, url=TEST_SESSION_URL
@@ -181,10 +187,12 @@ class TestRenewStripeSession(TestCase):
             "borrowing__book").first()
         payment.status = "EXPIRED"
         payment.save()
+        old_session_id = payment.session_id
 
         renew_stripe_session(payment, request)
 
         self.mock_stripe_create_session.assert_called_once_with(
+            idempotency_key=f"payment-{payment.id}-renew-{old_session_id}",
             payment_method_types=["card"],
             line_items=[
                 {
@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payments.fake_stripe import FakeStripeServer
+from payments.models import Payment
+from payments.stripe_client import CircuitOpenError, stripe_gateway
+from payments.tests.utils import TEST_SESSION_ID, PaymentTestMixin
+
+
+def renew_url(payment_id: int) -> str:
+    return reverse("payments:payment-renew", args=[payment_id])
+
+
+class TestRenewPaymentSessionView(PaymentTestMixin, TestCase):
+    """Test cases for renewing sessions with the async Stripe client."""
+
+    def setUp(self) -> None:
+        self.server = FakeStripeServer()
+        self.server.start()
+        self.settings_override = override_settings(
+            STRIPE_API_BASE=self.server.url, STRIPE_API_KEY="sk_test_fake"
+        )
+        self.settings_override.enable()
+        stripe_gateway.reset()
+        self.client = APIClient()
+        self.payment = self.create_payment()
+        self.payment.status = Payment.Status.EXPIRED
+        self.payment.save()
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        self.server.stop()
+        stripe_gateway.reset()
+
+    def test_expired_session_is_renewed(self) -> None:
+        response = self.client.post(renew_url(self.payment.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.PENDING)
+        self.assertNotEqual(self.payment.session_id, TEST_SESSION_ID)
+        self.assertIn(self.payment.session_id, self.server.stripe.sessions)
+
+    @patch("payments.stripe_helpers.create_deferred_checkout_session.delay")
+    @patch(
+        "payments.stripe_helpers.stripe_gateway.create_checkout_session_async",
+        side_effect=CircuitOpenError,
+    )
+    def test_renewal_is_queued_while_stripe_is_unavailable(
+            self, mock_create: MagicMock, mock_delay: MagicMock
+    ) -> None:
+        response = self.client.post(renew_url(self.payment.id))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock_delay.assert_called_once()
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.session_id, "")
+
+    def test_payment_which_did_not_expire_is_not_renewed(self) -> None:
+        self.payment.status = Payment.Status.PAID
+        self.payment.save()
+
+        response = self.client.post(renew_url(self.payment.id))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
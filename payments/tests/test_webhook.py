@@ -0,0 +1,276 @@
+import hashlib
+import hmac
+import json
+import time
+from unittest.mock import patch, MagicMock
+
+import stripe
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from payments.models import Payment, StripeEvent
+from payments.tasks import check_expired_sessions, process_stripe_event
+from payments.tests.utils import TEST_SESSION_ID, PaymentTestMixin
+
+WEBHOOK_URL = reverse("payments:stripe-webhook")
+PAYMENT_SUCCESS_URL = reverse("payments:payment-success")
+TEST_WEBHOOK_SECRET = "whsec_test"
+
+
+def sign_payload(payload: str, secret: str = TEST_WEBHOOK_SECRET) -> str:
+    """Build a `Stripe-Signature` header value for the payload."""
+    timestamp = int(time.time())
+    signature = hmac.new(
+        secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def build_event(
+        event_type: str,
+        event_id: str = "evt_test",
+        payment_status: str = "paid",
+) -> str:
+    return json.dumps(
+        {
+            "id": event_id,
+            "object": "event",
+            "type": event_type,
+            "data": {
+                "object": {
+                    "id": TEST_SESSION_ID,
+                    "object": "checkout.session",
+                    "payment_status": payment_status,
+                }
+            },
+        }
+    )
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=TEST_WEBHOOK_SECRET)
+class TestStripeWebhookView(TestCase):
+    """Test cases for receiving Stripe webhook events."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.patcher = patch("payments.views.process_stripe_event.delay")
+        self.mock_delay = self.patcher.start()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def post_event(self, payload: str, signature: str) -> None:
+        return self.client.generic(
+            "POST",
+            WEBHOOK_URL,
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature,
+        )
+
+    def test_invalid_signature_is_rejected(self) -> None:
+        payload = build_event("checkout.session.completed")
+
+        response = self.post_event(payload, sign_payload(payload, "wrong"))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+        self.mock_delay.assert_not_called()
+
+    def test_event_is_stored_and_enqueued(self) -> None:
+        payload = build_event("checkout.session.completed")
+
+        response = self.post_event(payload, sign_payload(payload))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        event = StripeEvent.objects.get(event_id="evt_test")
+        self.assertEqual(event.type, "checkout.session.completed")
+        self.mock_delay.assert_called_once_with("evt_test")
+
+    def test_processed_event_is_not_enqueued_again(self) -> None:
+        payload = build_event("checkout.session.completed")
+        self.post_event(payload, sign_payload(payload))
+        StripeEvent.objects.update(processed_at="2024-10-10T10:00:00Z")
+
+        response = self.post_event(payload, sign_payload(payload))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.mock_delay.assert_called_once()
+
+    def test_unhandled_event_is_acknowledged(self) -> None:
+        payload = build_event("customer.created")
+
+        response = self.post_event(payload, sign_payload(payload))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(StripeEvent.objects.exists())
+        self.mock_delay.assert_not_called()
+
+
+class TestProcessStripeEvent(PaymentTestMixin, TestCase):
+    """Test cases for applying stored Stripe events to payments."""
+
+    def setUp(self) -> None:
+        self.payment = self.create_payment()
+
+    def store_event(self, event_type: str, **kwargs) -> StripeEvent:
+        return StripeEvent.objects.create(
+            event_id="evt_test",
+            type=event_type,
+            payload=json.loads(build_event(event_type, **kwargs)),
+        )
+
+    @patch("payments.tasks.send_telegram_message")
+    def test_completed_session_marks_payment_paid(
+            self, mock_send_telegram_message: MagicMock
+    ) -> None:
+        event = self.store_event("checkout.session.completed")
+
+        process_stripe_event(event.event_id)
+        process_stripe_event(event.event_id)
+
+        self.payment.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.PAID)
+        self.assertIsNotNone(event.processed_at)
+        mock_send_telegram_message.assert_called_once()
+
+    @patch("payments.tasks.send_telegram_message")
+    def test_unpaid_completed_session_keeps_payment_pending(
+            self, mock_send_telegram_message: MagicMock
+    ) -> None:
+        event = self.store_event(
+            "checkout.session.completed", payment_status="unpaid"
+        )
+
+        process_stripe_event(event.event_id)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.PENDING)
+        mock_send_telegram_message.assert_not_called()
+
+    def test_expired_session_marks_payment_expired(self) -> None:
+        event = self.store_event("checkout.session.expired")
+
+        process_stripe_event(event.event_id)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.EXPIRED)
+
+    @patch("payments.tasks.send_telegram_message")
+    def test_async_payment_succeeded_marks_payment_paid(
+            self, mock_send_telegram_message: MagicMock
+    ) -> None:
+        event = self.store_event("checkout.session.async_payment_succeeded")
+
+        process_stripe_event(event.event_id)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.PAID)
+        mock_send_telegram_message.assert_called_once()
+
+    def test_async_payment_failed_marks_payment_expired(self) -> None:
+        event = self.store_event(
+            "checkout.session.async_payment_failed", payment_status="unpaid"
+        )
+
+        process_stripe_event(event.event_id)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.EXPIRED)
+
+
+@patch("payments.tasks.send_telegram_message")
+@patch("payments.tasks.stripe_gateway.retrieve_checkout_session")
+class TestCheckExpiredSessions(PaymentTestMixin, TestCase):
+    """Test cases for catching up on missed Stripe events."""
+
+    def setUp(self) -> None:
+        self.payment = self.create_payment()
+
+    def check_session(
+            self, mock_retrieve: MagicMock, status: str, payment_status: str
+    ) -> None:
+        mock_retrieve.return_value = stripe.checkout.Session.construct_from(
+            {
+                "id": TEST_SESSION_ID,
+                "status": status,
+                "payment_status": payment_status,
+            },
+            "sk_test",
+        )
+        check_expired_sessions()
+        self.payment.refresh_from_db()
+
+    def test_paid_session_marks_payment_paid(
+            self, mock_retrieve: MagicMock, mock_send: MagicMock
+    ) -> None:
+        self.check_session(mock_retrieve, "complete", "paid")
+
+        self.assertEqual(self.payment.status, Payment.Status.PAID)
+        mock_send.assert_called_once()
+
+    def test_expired_session_marks_payment_expired(
+            self, mock_retrieve: MagicMock, mock_send: MagicMock
+    ) -> None:
+        self.check_session(mock_retrieve, "expired", "unpaid")
+
+        self.assertEqual(self.payment.status, Payment.Status.EXPIRED)
+        mock_send.assert_not_called()
+
+    def test_unpaid_complete_session_stays_pending(
+            self, mock_retrieve: MagicMock, mock_send: MagicMock
+    ) -> None:
+        # A delayed payment which has not settled yet
+        self.check_session(mock_retrieve, "complete", "unpaid")
+
+        self.assertEqual(self.payment.status, Payment.Status.PENDING)
+
+
+class TestPaymentSuccessView(PaymentTestMixin, TestCase):
+    """Test cases for reading the payment status after checkout."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.payment = self.create_payment()
+
+    @patch("stripe.checkout.Session.retrieve")
+    def test_pending_payment_is_being_processed(
+            self, mock_retrieve: MagicMock
+    ) -> None:
+        response = self.client.get(
+            PAYMENT_SUCCESS_URL, {"session_id": TEST_SESSION_ID}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        mock_retrieve.assert_not_called()
+
+    def test_paid_payment_is_successful(self) -> None:
+        self.payment.status = Payment.Status.PAID
+        self.payment.save()
+
+        response = self.client.get(
+            PAYMENT_SUCCESS_URL, {"session_id": TEST_SESSION_ID}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_expired_payment_is_not_completed(self) -> None:
+        self.payment.status = Payment.Status.EXPIRED
+        self.payment.save()
+
+        response = self.client.get(
+            PAYMENT_SUCCESS_URL, {"session_id": TEST_SESSION_ID}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_session_is_not_found(self) -> None:
+        response = self.client.get(
+            PAYMENT_SUCCESS_URL, {"session_id": "cs_unknown"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
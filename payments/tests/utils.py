@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+
+from books.models import Book
+from borrowings.models import Borrowing
+from payments.models import Payment
+
+TEST_SESSION_ID = "cs_test_session"
+
+# Options of a Stripe gateway which retries without waiting
+TEST_OPTIONS = {
+    "POOL_MAXSIZE": 2,
+    "CONNECT_TIMEOUT": 1,
+    "READ_TIMEOUT": 1,
+    "MAX_RETRIES": 2,
+    "RETRY_BACKOFF": 0,
+    "MAX_BACKOFF": 0,
+    "FAILURE_RATE_THRESHOLD": 0.5,
+    "MINIMUM_CALLS": 2,
+    "WINDOW_SECONDS": 30,
+    "RESET_TIMEOUT": 10,
+}
+
+SESSION_PARAMS = {
+    "payment_method_types": ["card"],
+    "line_items": [
+        {
+            "price_data": {
+                "currency": "usd",
+                "product_data": {"name": "Test Book"},
+                "unit_amount": 700,
+            },
+            "quantity": 1,
+        }
+    ],
+    "mode": "payment",
+    "success_url": "http://testserver/success/",
+    "cancel_url": "http://testserver/cancel/",
+}
+
+
+class PaymentTestMixin:
+    def create_payment(self) -> Payment:
+        user = get_user_model().objects.create_user(
+            email="test@example.com",
+            password="1qazcde3",
+            first_name="test_name",
+            last_name="test_surname",
+        )
+        book = Book.objects.create(
+            title="Test Book",
+            author="Author",
+            cover="HARD",
+            inventory=10,
+            daily_fee=1.00,
+        )
+        borrowing = Borrowing.objects.create(
+            user=user,
+            book=book,
+            borrow_date=date(year=2024, month=10, day=10),
+            expected_return_date=date(year=2024, month=10, day=17),
+        )
+        return Payment.objects.create(
+            borrowing=borrowing,
+            type=Payment.Type.PAYMENT,
+            status=Payment.Status.PENDING,
+            session_url="https://test.url",
+            session_id=TEST_SESSION_ID,
+            money_to_pay=7,
+        )
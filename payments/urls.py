@@ -6,6 +6,7 @@ from payments.views import (
     PaymentSuccessView,
     PaymentCancelView,
     RenewPaymentSessionView,
+    StripeWebhookView,
 )
 
 
@@ -15,6 +16,7 @@ router.register("", PaymentViewSet, basename="payment")
 urlpatterns = [
     path("success/", PaymentSuccessView.as_view(), name="payment-success"),
     path("cancel/", PaymentCancelView.as_view(), name="payment-cancel"),
+    path("webhook/", StripeWebhookView.as_view(), name="stripe-webhook"),
     path(
         "<int:pk>/renew/",
         RenewPaymentSessionView.as_view(),
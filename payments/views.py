@@ -1,15 +1,26 @@
 import stripe
-from django.shortcuts import get_object_or_404
+from adrf.views import APIView as AsyncAPIView
+from django.shortcuts import aget_object_or_404
+from django.utils.dateparse import parse_date
+from drf_spectacular.utils import (
+    extend_schema,
+    OpenApiParameter,
+    OpenApiResponse,
+)
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from notifications.tasks import send_telegram_message
-from payments.models import Payment
+from payments.models import Payment, StripeEvent
+from payments.reports import PERIODS, get_payment_report
 from payments.serializers import PaymentUserSerializer, PaymentStaffSerializer
-from payments.stripe_helpers import renew_stripe_session
+from payments.stripe_helpers import arenew_stripe_session
+from payments.tasks import process_stripe_event
+from payments.webhooks import HANDLED_EVENT_TYPES, construct_stripe_event
 
 
 class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
@@ -21,6 +32,7 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
     users can view all payments in the system.
     - Staff users receive more detailed information
     - Regular users receive limited information
+    - Staff users can get an aggregated payments report
     """
 
     permission_classes = [IsAuthenticated]
@@ -37,46 +49,92 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
             return PaymentStaffSerializer
         return PaymentUserSerializer
 
-
-class PaymentSuccessView(APIView):
+    @extend_schema(
+        summary="Payments report",
+        description="Totals of money to pay grouped by status, type, "
+                    "period and book, and outstanding payments. "
+                    "This action is available only to admin users.",
+        parameters=[
+            OpenApiParameter(
+                name="period",
+                description="Group totals by `day` or `month` (default)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description="Include payments created from this date "
+                            "(ex. 2024-10-01)",
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description="Include payments created until this date "
+                            "(ex. 2024-10-31)",
+                required=False,
+                type=str,
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(
+                response=dict,
+                description="Aggregated payments report"
+            ),
+        },
+    )
+    @action(detail=False, methods=["GET"], permission_classes=[IsAdminUser])
+    def report(self, request: Request) -> Response:
+        """Return totals of payments, cached until a payment changes."""
+        period = request.query_params.get("period", "month")
+        if period not in PERIODS:
+            raise ValidationError({"period": "Must be `day` or `month`"})
+
+        dates = {}
+        for param in ("date_from", "date_to"):
+            value = request.query_params.get(param)
+            try:
+                # None for malformed values, ValueError for invalid dates
+                # such as 2024-02-30
+                dates[param] = value and parse_date(value)
+            except ValueError:
+                dates[param] = None
+            if value and dates[param] is None:
+                raise ValidationError({param: "Must be a date (YYYY-MM-DD)"})
+
+        return Response(get_payment_report(period, **dates))
+
+
+class PaymentSuccessView(AsyncAPIView):
     """
     Handle successful Stripe payment confirmations.
 
-    This view retrieves a payment session using the provided session_id
-    and checks the payment status with Stripe. If the payment is successful
-    (status is 'paid'), the corresponding Payment object in the database is
-    updated to reflect the successful status. Otherwise, an error response
-    is returned.
+    This view looks up the payment by the provided session_id and reports
+    its local status. Payment statuses are updated by the Stripe webhook,
+    so no request to Stripe is made here. If the webhook has not been
+    processed yet, the payment is reported as being processed.
     """
 
-    def get(self, request):
+    async def get(self, request):
         session_id = request.query_params.get("session_id")
-        payment = get_object_or_404(
-            Payment.objects.select_related("borrowing__user"),
-            session_id=session_id
+        payment = await aget_object_or_404(
+            Payment.objects.exclude(session_id=""), session_id=session_id
         )
-        session = stripe.checkout.Session.retrieve(session_id)
-
-        if session.payment_status == "paid":
-            payment.status = Payment.Status.PAID
-            payment.save()
-            message = (
-                f"{payment.get_type_display()} for borrowing "
-                f"(ID: {payment.borrowing.id}):\n"
-                f"Amount: $ {payment.money_to_pay}\n"
-                f"User: {payment.borrowing.user.email}"
-            )
-            send_telegram_message(message)
 
+        if payment.status == Payment.Status.PAID:
             return Response(
                 {"message": "Payment successful"},
                 status=status.HTTP_200_OK
             )
-        else:
+        if payment.status == Payment.Status.PENDING:
             return Response(
-                {"message": "Payment not completed"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"message": "Payment is being processed"},
+                status=status.HTTP_202_ACCEPTED
             )
+        return Response(
+            {"message": "Payment not completed"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
 
 class PaymentCancelView(APIView):
@@ -98,7 +156,7 @@ class PaymentCancelView(APIView):
         )
 
 
-class RenewPaymentSessionView(APIView):
+class RenewPaymentSessionView(AsyncAPIView):
     """
     Renew an expired Stripe payment session for a specific payment.
 
@@ -107,18 +165,60 @@ class RenewPaymentSessionView(APIView):
     checks if its status is 'EXPIRED'. If the payment is expired, a new Stripe
     session is created by calling the `renew_stripe_session` function, and
     the user is provided with a message indicating that the session has been
-    successfully renewed.
+    successfully renewed. If Stripe is unavailable, the renewal is queued.
     """
 
-    def post(self, request: Request, pk: int) -> Response:
-        payment = get_object_or_404(
+    # Async, so the worker serves other requests while Stripe answers
+
+    async def post(self, request: Request, pk: int) -> Response:
+        payment = await aget_object_or_404(
             Payment.objects.select_related("borrowing__book"),
             pk=pk,
             status=Payment.Status.EXPIRED,
         )
-        renew_stripe_session(payment, request)
+        if not await arenew_stripe_session(payment, request):
+            return Response(
+                {"message": "Payment session will be renewed shortly"},
+                status=status.HTTP_202_ACCEPTED
+            )
 
         return Response(
             {"message": "Payment session renewed"},
             status=status.HTTP_200_OK
         )
+
+
+class StripeWebhookView(APIView):
+    """
+    Receive Stripe webhook events.
+
+    The request signature is verified with `STRIPE_WEBHOOK_SECRET`, and
+    every handled event is stored by its Stripe id before it is processed
+    asynchronously by the `process_stripe_event` task. Stripe is
+    acknowledged right away; redelivered events are not stored twice.
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = ()
+
+    def post(self, request: Request) -> Response:
+        try:
+            event = construct_stripe_event(
+                request.body, request.headers.get("Stripe-Signature", "")
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return Response(
+                {"message": "Invalid Stripe webhook"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if event.type in HANDLED_EVENT_TYPES:
+            stripe_event, _ = StripeEvent.objects.get_or_create(
+                event_id=event.id,
+                defaults={"type": event.type, "payload": event.to_dict()},
+            )
+            if stripe_event.processed_at is None:
+                process_stripe_event.delay(stripe_event.event_id)
+
+        return Response(status=status.HTTP_200_OK)
@@ -0,0 +1,75 @@
+import stripe
+from django.conf import settings
+
+from payments.models import Payment
+from payments.reports import invalidate_payment_report
+
+CHECKOUT_SESSION_COMPLETED = "checkout.session.completed"
+CHECKOUT_SESSION_EXPIRED = "checkout.session.expired"
+# Delayed payment methods, e.g. bank debits, complete the session unpaid
+# and settle later with one of these
+CHECKOUT_SESSION_ASYNC_PAYMENT_SUCCEEDED = (
+    "checkout.session.async_payment_succeeded"
+)
+CHECKOUT_SESSION_ASYNC_PAYMENT_FAILED = "checkout.session.async_payment_failed"
+
+PAID_EVENT_TYPES = (
+    CHECKOUT_SESSION_COMPLETED,
+    CHECKOUT_SESSION_ASYNC_PAYMENT_SUCCEEDED,
+)
+EXPIRED_EVENT_TYPES = (
+    CHECKOUT_SESSION_EXPIRED,
+    CHECKOUT_SESSION_ASYNC_PAYMENT_FAILED,
+)
+HANDLED_EVENT_TYPES = PAID_EVENT_TYPES + EXPIRED_EVENT_TYPES
+
+
+def construct_stripe_event(payload: bytes, signature: str) -> stripe.Event:
+    """
+    Verify the `Stripe-Signature` header of a webhook request and
+    build a Stripe event from its payload.
+
+    Raises `ValueError` if the payload is not valid JSON and
+    `stripe.error.SignatureVerificationError` if the signature
+    does not match `STRIPE_WEBHOOK_SECRET`.
+    """
+    return stripe.Webhook.construct_event(
+        payload, signature, settings.STRIPE_WEBHOOK_SECRET
+    )
+
+
+def handle_checkout_session_completed(session: dict) -> Payment | None:
+    """
+    Mark the payment of a completed Checkout session as paid.
+
+    Returns the updated payment, or `None` if the session is not paid yet
+    or the payment has already been marked as paid.
+    """
+    if session.get("payment_status") != "paid":
+        return None
+
+    payment = (
+        Payment.objects.select_related("borrowing__user")
+        .filter(session_id=session["id"])
+        .exclude(status=Payment.Status.PAID)
+        .first()
+    )
+    if payment:
+        payment.status = Payment.Status.PAID
+        payment.save()
+    return payment
+
+
+def handle_checkout_session_expired(session: dict) -> bool:
+    """
+    Mark the pending payment of a Checkout session which expired, or
+    whose delayed payment failed, as expired.
+
+    Returns whether the payment was pending.
+    """
+    expired = Payment.objects.filter(
+        session_id=session["id"], status=Payment.Status.PENDING
+    ).update(status=Payment.Status.EXPIRED)
+    if expired:
+        invalidate_payment_report()
+    return bool(expired)
@@ -1,8 +1,19 @@
+import os
+import uuid
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
 from django.utils.translation import gettext as _
 
-from users.models import User
+from users.models import User, UserImport
+from users.tasks import import_users
 
 
 @admin.register(User)
@@ -44,3 +55,107 @@ class UserAdmin(UserAdmin):
     )
     search_fields = ("email", "first_name", "last_name")
     ordering = ("email",)
+
+
+class UserImportForm(forms.ModelForm):
+    file = forms.FileField(
+        help_text="CSV file with email, first_name, last_name and "
+                  "optional password columns."
+    )
+
+    class Meta:
+        model = UserImport
+        fields = ("file",)
+
+
+@admin.register(UserImport)
+class UserImportAdmin(admin.ModelAdmin):
+    """
+    Import users from an uploaded CSV file in a Celery task.
+
+    Progress is shown on the import's page, which links the report with
+    activation links. The report is only served to staff by this admin.
+    """
+
+    list_display = (
+        "source",
+        "started_at",
+        "finished_at",
+        "users_created",
+        "users_updated",
+        "rows_failed",
+        "links_issued",
+    )
+    readonly_fields = (
+        "source",
+        "started_at",
+        "finished_at",
+        "users_created",
+        "users_updated",
+        "rows_failed",
+        "links_issued",
+        "report",
+        "error",
+    )
+
+    def get_form(self, request, obj=None, change=False, **kwargs):
+        if obj is None:
+            kwargs["form"] = UserImportForm
+        return super().get_form(request, obj, change, **kwargs)
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return ("file",)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change) -> None:
+        # Imports can not be changed, so this is always a new one
+        upload_dir = os.path.join(
+            settings.USER_IMPORT["REPORT_DIR"], "uploads"
+        )
+        os.makedirs(upload_dir, exist_ok=True)
+        obj.source = os.path.join(upload_dir, f"{uuid.uuid4()}.csv")
+        with open(obj.source, "wb") as source:
+            for chunk in form.cleaned_data["file"].chunks():
+                source.write(chunk)
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(lambda: import_users.delay(obj.pk))
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/report/",
+                self.admin_site.admin_view(self.report_view),
+                name="users_userimport_report",
+            ),
+            *super().get_urls(),
+        ]
+
+    @admin.display(description="Report")
+    def report(self, obj: UserImport) -> str:
+        if not obj.report_file:
+            return "-"
+        return format_html(
+            '<a href="{}">{}</a>',
+            reverse("admin:users_userimport_report", args=[obj.pk]),
+            os.path.basename(obj.report_file),
+        )
+
+    def report_view(self, request, object_id: str) -> FileResponse:
+        obj = self.get_object(request, object_id)
+        if obj is None or not obj.report_file:
+            raise Http404
+        if not self.has_view_permission(request, obj):
+            raise PermissionDenied
+        try:
+            report = open(obj.report_file, "rb")
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(
+            report,
+            as_attachment=True,
+            filename=os.path.basename(obj.report_file),
+        )
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from users.tokens import VERSION_CLAIM, get_user_version
+
+User = get_user_model()
+
+
+def get_version_key(user_id: int) -> str:
+    return f"users:version:{user_id}"
+
+
+def remember_user_version(user: User) -> None:
+    cache.set(
+        get_version_key(user.pk),
+        get_user_version(user),
+        settings.USER_VERSION_CACHE_TIMEOUT,
+    )
+
+
+def forget_user_version(user_id: int) -> None:
+    cache.delete(get_version_key(user_id))
+
+
+def build_user(validated_token: Token) -> User:
+    """
+    Build the user from the claims of the token without a query.
+
+    Other fields of the user are deferred and loaded on first access.
+    """
+    values = {
+        "id": validated_token[api_settings.USER_ID_CLAIM],
+        "email": validated_token["email"],
+        "is_staff": validated_token["is_staff"],
+        "is_active": True,
+    }
+    # Values are passed in the order of the model fields
+    field_names = [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname in values
+    ]
+    return User.from_db(
+        router.db_for_read(User),
+        field_names,
+        [values[name] for name in field_names],
+    )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication trusting the user claims of up-to-date tokens.
+
+    Tokens issued as `users.tokens.UserRefreshToken` carry a version of
+    the user. While it matches the version cached for the user, the user
+    is built from the claims of the token. Otherwise (a stale token, an
+    expired cache entry or a token without claims) the user is loaded
+    from the database and its version is cached again. Saving a user
+    drops its cached version.
+    """
+
+    def get_user(self, validated_token: Token) -> User:
+        version = validated_token.get(VERSION_CLAIM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if version is not None and user_id is not None:
+            if cache.get(get_version_key(user_id)) == version:
+                return build_user(validated_token)
+
+        user = super().get_user(validated_token)
+        remember_user_version(user)
+        return user
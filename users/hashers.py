@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, make_password
+
+# Hashing is slow on purpose and releases the GIL, so async views hash
+# on these threads instead of the single thread their database calls
+# share, and the event loop keeps serving other requests meanwhile
+hash_executor = ThreadPoolExecutor(thread_name_prefix="password-hash")
+
+ahash_password = sync_to_async(
+    make_password, thread_sensitive=False, executor=hash_executor
+)
+
+
+class ProfileArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Hash passwords with Argon2id at the cost of the configured profile.
+
+    The cost is read from `PASSWORD_HASHING_PROFILES` on every use, so
+    hashes made at another cost (or with another profile) are upgraded
+    by Django the next time their user logs in.
+    """
+
+    algorithm = "argon2"
+
+    @property
+    def profile(self) -> dict:
+        return settings.PASSWORD_HASHING_PROFILES[
+            settings.PASSWORD_HASHING_PROFILE
+        ]
+
+    @property
+    def time_cost(self) -> int:
+        return self.profile["time_cost"]
+
+    @property
+    def memory_cost(self) -> int:
+        return self.profile["memory_cost"]
+
+    @property
+    def parallelism(self) -> int:
+        return self.profile["parallelism"]
@@ -0,0 +1,221 @@
+import csv
+import logging
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import is_password_usable, make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from users.models import UserImport
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+CREATED = "created"
+UPDATED = "updated"
+FAILED = "failed"
+
+REPORT_FIELDS = ["line", "email", "status", "activation_link", "error"]
+
+MIN_PASSWORD_LENGTH = 8
+
+NAME_FIELDS = ("first_name", "last_name")
+
+
+def get_activation_link(user: User) -> str:
+    """Return the link a user follows to set their password."""
+    query = urlencode(
+        {
+            "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+            "token": default_token_generator.make_token(user),
+        }
+    )
+    return f"{settings.USER_IMPORT['ACTIVATION_URL']}?{query}"
+
+
+def parse_row(row: dict) -> dict:
+    """
+    Validate a row of the CSV file and return the fields of its user.
+
+    Raises `ValidationError` if the row can not be imported.
+    """
+    email = User.objects.normalize_email((row.get("email") or "").strip())
+    validate_email(email)
+    password = row.get("password") or ""
+    if password and len(password) < MIN_PASSWORD_LENGTH:
+        raise ValidationError(
+            f"Password must have at least {MIN_PASSWORD_LENGTH} characters"
+        )
+    fields = {"email": email, "password": password}
+    for name in NAME_FIELDS:
+        value = (row.get(name) or "").strip()
+        max_length = User._meta.get_field(name).max_length
+        if len(value) > max_length:
+            raise ValidationError(
+                f"{name} must have at most {max_length} characters"
+            )
+        fields[name] = value
+    return fields
+
+
+class UserImporter:
+    """
+    Create or update users from a CSV file.
+
+    The file is streamed in batches of "BATCH_SIZE" rows, so memory use
+    does not depend on its size. Passwords of a batch are hashed by
+    "HASH_WORKERS" threads, and its users are upserted on `email` with
+    a single `bulk_create`. Users without a password in the file get an
+    unusable one and an activation link in the report instead; existing
+    users keep their password unless the file sets a new one.
+    """
+
+    def __init__(self, options: dict = None) -> None:
+        self.options = options or settings.USER_IMPORT
+        self.batch_size = self.options["BATCH_SIZE"]
+
+    def run(self, run: UserImport) -> UserImport:
+        """Import the users of the CSV file at `run.source`."""
+        try:
+            self.import_file(run)
+        except Exception as error:
+            run.error = repr(error)
+            raise
+        finally:
+            run.finished_at = timezone.now()
+            run.save()
+        logger.info(
+            f"Imported users from {run.source}: {run.users_created} created, "
+            f"{run.users_updated} updated, {run.rows_failed} rows failed"
+        )
+        return run
+
+    def import_file(self, run: UserImport) -> None:
+        os.makedirs(self.options["REPORT_DIR"], exist_ok=True)
+        run.report_file = os.path.join(
+            self.options["REPORT_DIR"], f"import-{run.id}.csv"
+        )
+        run.save()
+
+        with (
+            open(run.source, newline="", encoding="utf-8-sig") as source,
+            open(run.report_file, "w", newline="") as report_file,
+            # Argon2 and PBKDF2 release the GIL, so threads hash in
+            # parallel. They share the configured settings, unlike
+            # processes, which also can not start in Celery workers
+            ThreadPoolExecutor(self.options["HASH_WORKERS"]) as executor,
+        ):
+            report = csv.DictWriter(report_file, REPORT_FIELDS)
+            report.writeheader()
+            rows = enumerate(csv.DictReader(source), start=2)
+            for batch in self.iter_batches(rows):
+                self.import_batch(run, batch, executor, report)
+                run.save()
+
+    def iter_batches(
+            self, rows: Iterable[tuple[int, dict]]
+    ) -> Iterator[list[tuple[int, dict]]]:
+        iterator = iter(rows)
+        while batch := list(islice(iterator, self.batch_size)):
+            yield batch
+
+    def import_batch(
+            self,
+            run: UserImport,
+            rows: list[tuple[int, dict]],
+            executor: Executor,
+            report: csv.DictWriter,
+    ) -> None:
+        parsed = {}
+        for line, row in rows:
+            try:
+                fields = parse_row(row)
+            except ValidationError as error:
+                run.rows_failed += 1
+                report.writerow(
+                    {
+                        "line": line,
+                        "email": row.get("email"),
+                        "status": FAILED,
+                        "error": " ".join(error.messages),
+                    }
+                )
+                continue
+            # The last row of an email wins, an upsert can not
+            # change the same row twice
+            parsed.pop(fields["email"], None)
+            parsed[fields["email"]] = (line, fields)
+
+        existing = dict(
+            User.objects.filter(email__in=parsed).values_list(
+                "email", "password"
+            )
+        )
+        passwords = iter(
+            executor.map(
+                make_password,
+                [
+                    fields["password"]
+                    for _, fields in parsed.values()
+                    if fields["password"]
+                ],
+            )
+        )
+
+        users = []
+        for _, fields in parsed.values():
+            if fields["password"]:
+                password = next(passwords)
+            elif fields["email"] in existing:
+                password = existing[fields["email"]]
+            else:
+                password = make_password(None)
+            users.append(User(**{**fields, "password": password}))
+
+        User.objects.bulk_create(
+            users,
+            update_conflicts=True,
+            unique_fields=["email"],
+            update_fields=["first_name", "last_name", "password"],
+        )
+
+        inactive = {
+            user.email: user
+            for user in User.objects.filter(
+                email__in=[
+                    user.email
+                    for user in users
+                    if not is_password_usable(user.password)
+                ]
+            )
+        }
+        for line, fields in parsed.values():
+            email = fields["email"]
+            status = UPDATED if email in existing else CREATED
+            if status == CREATED:
+                run.users_created += 1
+            else:
+                run.users_updated += 1
+            link = ""
+            if email in inactive:
+                link = get_activation_link(inactive[email])
+                run.links_issued += 1
+            report.writerow(
+                {
+                    "line": line,
+                    "email": email,
+                    "status": status,
+                    "activation_link": link,
+                }
+            )
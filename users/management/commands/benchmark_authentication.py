@@ -0,0 +1,172 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from borrowings.views import BorrowingViewSet
+from payments.views import PaymentViewSet
+from users.authentication import ClaimsJWTAuthentication
+from users.tokens import UserRefreshToken
+
+User = get_user_model()
+
+BENCHMARK_EMAIL_DOMAIN = "auth-benchmark.local"
+
+MODES = {
+    "database": JWTAuthentication,
+    "claims": ClaimsJWTAuthentication,
+}
+
+ENDPOINTS = {
+    "borrowings": "borrowings:borrowings-list",
+    "payments": "payments:payment-list",
+}
+
+
+class UserQueryCounter:
+    """Count queries to the users table made by any thread."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if "users_user" in sql:
+            with self.lock:
+                self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """
+    Command to benchmark authenticated API requests with user loading
+    from the database and with users built from token claims.
+    """
+    help = (
+        "Send authenticated requests to the borrowings and payments "
+        "endpoints with each JWT authentication class and report "
+        "throughput, latency and queries to the users table."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--endpoint", choices=ENDPOINTS, default="borrowings"
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the created users.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        tokens = self.create_tokens(options["users"])
+        url = reverse(ENDPOINTS[options["endpoint"]])
+        try:
+            for mode, authentication_class in MODES.items():
+                with patch.object(
+                    BorrowingViewSet,
+                    "authentication_classes",
+                    [authentication_class],
+                ), patch.object(
+                    PaymentViewSet,
+                    "authentication_classes",
+                    [authentication_class],
+                ):
+                    self.run_benchmark(mode, url, tokens, options)
+        finally:
+            if not options["keep"]:
+                self.cleanup()
+
+    def run_benchmark(
+            self, mode: str, url: str, tokens: list[str], options: dict
+    ) -> None:
+        cache.clear()
+        # Warm up every user, so the claims mode has cached versions
+        for token in tokens:
+            self.request(url, token)
+
+        counter = UserQueryCounter()
+        requests = [
+            tokens[number % len(tokens)]
+            for number in range(options["requests"])
+        ]
+
+        def send(token: str) -> tuple[int, float]:
+            with connection.execute_wrapper(counter):
+                return self.request(url, token)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(executor.map(send, requests))
+        elapsed = time.perf_counter() - started
+
+        self.report(
+            f"Authentication from {mode}",
+            [latency for _, latency in results],
+            elapsed,
+        )
+        failed = sum(status_code != 200 for status_code, _ in results)
+        self.stdout.write(
+            f"  user queries per request: {counter.count / len(results):.2f}"
+            f", failed: {failed}"
+        )
+
+    def create_tokens(self, count: int) -> list[str]:
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(
+                email=f"user{number}@{BENCHMARK_EMAIL_DOMAIN}",
+                first_name="Benchmark",
+                last_name=f"User {number}",
+                password=password,
+                is_staff=number % 10 == 0,
+            )
+            for number in range(count)
+        )
+        return [
+            str(UserRefreshToken.for_user(user).access_token)
+            for user in users
+        ]
+
+    @staticmethod
+    def request(url: str, token: str) -> tuple[int, float]:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        started = time.perf_counter()
+        response = client.get(url)
+        return response.status_code, time.perf_counter() - started
+
+    def report(
+            self, name: str, latencies: list[float], elapsed: float
+    ) -> None:
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {len(latencies)} requests in {elapsed:.2f}s "
+                f"({len(latencies) / elapsed:.1f} req/s)"
+            )
+        )
+        self.stdout.write(
+            f"  p50: {percentiles[49] * 1000:.1f}ms, "
+            f"p95: {percentiles[94] * 1000:.1f}ms, "
+            f"p99: {percentiles[98] * 1000:.1f}ms"
+        )
+
+    def cleanup(self) -> None:
+        User.objects.filter(
+            email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}"
+        ).delete()
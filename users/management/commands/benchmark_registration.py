@@ -0,0 +1,126 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.views import CreateUserView
+
+User = get_user_model()
+
+BENCHMARK_EMAIL_DOMAIN = "registration-benchmark.local"
+
+# Django's default before passwords were hashed with Argon2id
+PBKDF2_HASHER = "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+
+
+class Command(BaseCommand):
+    """
+    Command to benchmark user registration with PBKDF2 and with Argon2id
+    at the cost of every hashing profile.
+    """
+    help = (
+        "Register users through the API with each password hasher and "
+        "report the time of a single hash, throughput and latency. "
+        "Throttling is disabled during the run."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=settings.PASSWORD_HASHING_PROFILES,
+            help="Profiles to benchmark (all of them by default).",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the registered users.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        runs = {
+            "pbkdf2": {"PASSWORD_HASHERS": [PBKDF2_HASHER]},
+            **{
+                f"argon2id ({profile})": {
+                    "PASSWORD_HASHING_PROFILE": profile
+                }
+                for profile in (
+                    options["profile"] or settings.PASSWORD_HASHING_PROFILES
+                )
+            },
+        }
+        try:
+            with patch.object(CreateUserView, "throttle_classes", ()):
+                for name, overrides in runs.items():
+                    with override_settings(**overrides):
+                        self.run_benchmark(name, options)
+        finally:
+            if not options["keep"]:
+                self.cleanup()
+
+    def run_benchmark(self, name: str, options: dict) -> None:
+        self.cleanup()
+        started = time.perf_counter()
+        make_password("1qazcde3")
+        hash_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        numbers = range(options["users"])
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(executor.map(self.register, numbers))
+        elapsed = time.perf_counter() - started
+
+        self.report(
+            f"Registration with {name}",
+            [latency for _, latency in results],
+            elapsed,
+        )
+        failed = sum(status_code != 201 for status_code, _ in results)
+        self.stdout.write(
+            f"  single hash: {hash_time * 1000:.1f}ms, failed: {failed}"
+        )
+
+    @staticmethod
+    def register(number: int) -> tuple[int, float]:
+        started = time.perf_counter()
+        response = APIClient().post(
+            reverse("users:create"),
+            {
+                "email": f"user{number}@{BENCHMARK_EMAIL_DOMAIN}",
+                "password": "1qazcde3",
+                "first_name": "Benchmark",
+                "last_name": f"User {number}",
+            },
+        )
+        return response.status_code, time.perf_counter() - started
+
+    def report(
+            self, name: str, latencies: list[float], elapsed: float
+    ) -> None:
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {len(latencies)} requests in {elapsed:.2f}s "
+                f"({len(latencies) / elapsed:.1f} req/s)"
+            )
+        )
+        self.stdout.write(
+            f"  p50: {percentiles[49] * 1000:.1f}ms, "
+            f"p95: {percentiles[94] * 1000:.1f}ms, "
+            f"p99: {percentiles[98] * 1000:.1f}ms"
+        )
+
+    def cleanup(self) -> None:
+        User.objects.filter(
+            email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}"
+        ).delete()
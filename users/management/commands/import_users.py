@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.imports import UserImporter
+from users.models import UserImport
+
+
+class Command(BaseCommand):
+    """
+    Command to create or update users from a CSV file.
+    """
+    help = (
+        "Import users from a CSV file with email, first_name, last_name "
+        "and optional password columns, upserting them on email. Users "
+        "without a password get an activation link in the import report."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("file", help="Path of the CSV file.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.USER_IMPORT["BATCH_SIZE"],
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.USER_IMPORT["HASH_WORKERS"],
+            help="Threads hashing passwords.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        importer = UserImporter(
+            {
+                **settings.USER_IMPORT,
+                "BATCH_SIZE": options["batch_size"],
+                "HASH_WORKERS": options["workers"],
+            }
+        )
+        run = importer.run(UserImport.objects.create(source=options["file"]))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported users from {run.source}: "
+                f"{run.users_created} created, {run.users_updated} updated"
+            )
+        )
+        self.stdout.write(
+            f"Rows failed: {run.rows_failed}\n"
+            f"Activation links: {run.links_issued}\n"
+            f"Report: {run.report_file}"
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_telegram_chat_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=255)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("users_created", models.PositiveIntegerField(default=0)),
+                ("users_updated", models.PositiveIntegerField(default=0)),
+                ("rows_failed", models.PositiveIntegerField(default=0)),
+                ("links_issued", models.PositiveIntegerField(default=0)),
+                ("report_file", models.CharField(blank=True, max_length=255)),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "ordering": ["-started_at"],
+            },
+        ),
+    ]
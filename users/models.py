@@ -1,3 +1,5 @@
+import os
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext as _
@@ -23,3 +25,29 @@ class User(AbstractUser):
     ]
 
     objects = UserManager()
+
+
+class UserImport(models.Model):
+    """
+    A run of the import of users from a CSV file.
+
+    Every row of the file is written to the report file of the run with
+    its outcome and, for users who have to set their password, an
+    activation link.
+    """
+
+    source = models.CharField(max_length=255)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    users_created = models.PositiveIntegerField(default=0)
+    users_updated = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    links_issued = models.PositiveIntegerField(default=0)
+    report_file = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"Import of {os.path.basename(self.source)}"
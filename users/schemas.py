@@ -1,6 +1,20 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import (
+    SimpleJWTScheme,
+    TokenObtainPairSerializerExtension,
+)
 from drf_spectacular.utils import extend_schema
 
 
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = "users.authentication.ClaimsJWTAuthentication"
+
+
+class UserTokenObtainPairSerializerExtension(
+    TokenObtainPairSerializerExtension
+):
+    target_class = "users.serializers.UserTokenObtainPairSerializer"
+
+
 class UserSchema:
     """Schema definitions for user-related operations."""
 
@@ -9,6 +23,11 @@ class UserSchema:
         description="Create a new user!",
     )
 
+    activate = extend_schema(
+        responses={204: None, 400: "Invalid or expired activation link"},
+        description="Set the password of an imported user.",
+    )
+
     manage_user_schema = extend_schema(
         responses={
             200: "User details received/updated successfully",
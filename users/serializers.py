@@ -1,5 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from users.tokens import UserRefreshToken
 
 User = get_user_model()
 
@@ -30,10 +36,18 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
     def create(self, validated_data: dict) -> User:
-        """Create and return a new user with encrypted password."""
+        """
+        Create and return a new user with encrypted password.
+        The password is hashed here unless its hash is passed to `save`
+        as `password_hash`.
+        """
 
+        password_hash = validated_data.pop("password_hash", None)
         user = User(**validated_data)
-        user.set_password(validated_data["password"])
+        if password_hash:
+            user.password = password_hash
+        else:
+            user.set_password(validated_data["password"])
         user.save()
 
         return user
@@ -44,9 +58,49 @@ class UserSerializer(serializers.ModelSerializer):
         """
 
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+
+        return super().update(instance, validated_data)
+
+
+class ActivateUserSerializer(serializers.Serializer):
+    """
+    Set the first password of an imported user from an activation link.
+    """
 
+    uid = serializers.CharField()
+    token = serializers.CharField()
+    password = serializers.CharField(
+        write_only=True, min_length=8, style={"input_type": "password"}
+    )
+
+    def validate(self, attrs: dict) -> dict:
+        try:
+            user = User.objects.get(
+                pk=force_str(urlsafe_base64_decode(attrs["uid"]))
+            )
+        except (ValueError, User.DoesNotExist):
+            user = None
+        if (
+            user is None
+            or user.has_usable_password()
+            or not default_token_generator.check_token(user, attrs["token"])
+        ):
+            raise serializers.ValidationError(
+                "The activation link is invalid or has expired."
+            )
+        attrs["user"] = user
+        return attrs
+
+    def save(self) -> User:
+        user = self.validated_data["user"]
+        user.set_password(self.validated_data["password"])
+        user.save(update_fields=["password"])
         return user
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issue tokens carrying the claims of the user."""
+
+    token_class = UserRefreshToken
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import forget_user_version
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_version_on_user_change(
+        sender: type, instance: User, **kwargs
+) -> None:
+    forget_user_version(instance.pk)
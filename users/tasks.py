@@ -0,0 +1,21 @@
+import os
+from contextlib import suppress
+
+from celery import shared_task
+
+from users.imports import UserImporter
+from users.models import UserImport
+
+
+@shared_task
+def import_users(import_id: int) -> None:
+    """
+    Run an import of users started in the admin and delete the uploaded
+    file, which may contain passwords.
+    """
+    run = UserImport.objects.get(pk=import_id)
+    try:
+        UserImporter().run(run)
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(run.source)
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import ClaimsJWTAuthentication
+from users.tokens import VERSION_CLAIM, UserRefreshToken, get_user_version
+
+User = get_user_model()
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    """Test suite for authenticating requests from token claims"""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="admin@example.com",
+            password="1qazcde3",
+            first_name="Admin",
+            last_name="User",
+            is_staff=True,
+        )
+        self.token = UserRefreshToken.for_user(self.user).access_token
+        self.authentication = ClaimsJWTAuthentication()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_obtained_token_carries_user_claims(self) -> None:
+        response = APIClient().post(
+            reverse("users:token_obtain_pair"),
+            {"email": "admin@example.com", "password": "1qazcde3"},
+        )
+
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["email"], "admin@example.com")
+        self.assertTrue(token["is_staff"])
+        self.assertEqual(token[VERSION_CLAIM], get_user_version(self.user))
+
+    def test_user_is_built_from_claims_once_version_is_cached(self) -> None:
+        with self.assertNumQueries(1):
+            self.authentication.get_user(self.token)
+
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "admin@example.com")
+        self.assertTrue(user.is_staff)
+        self.assertTrue(user.is_authenticated)
+
+    def test_other_fields_are_loaded_on_access(self) -> None:
+        self.authentication.get_user(self.token)
+        user = self.authentication.get_user(self.token)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, "Admin")
+
+    def test_stale_token_falls_back_to_database(self) -> None:
+        self.authentication.get_user(self.token)
+        self.user.is_staff = False
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            user = self.authentication.get_user(self.token)
+
+        self.assertFalse(user.is_staff)
+
+    def test_requests_do_not_query_users(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        client.get(reverse("payments:payment-list"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("payments:payment-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any("users_user" in query["sql"] for query in queries)
+        )
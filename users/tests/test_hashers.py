@@ -0,0 +1,96 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.hashers import ProfileArgon2PasswordHasher
+
+User = get_user_model()
+
+PROFILES = {
+    "fast": {"time_cost": 1, "memory_cost": 8, "parallelism": 1},
+    "strong": {"time_cost": 2, "memory_cost": 64, "parallelism": 1},
+}
+
+
+@override_settings(
+    PASSWORD_HASHING_PROFILES=PROFILES, PASSWORD_HASHING_PROFILE="fast"
+)
+class ProfileArgon2PasswordHasherTests(TestCase):
+    """Test suite for hashing passwords at the cost of a profile"""
+
+    def test_registered_password_is_hashed_with_argon2id(self) -> None:
+        response = APIClient().post(
+            reverse("users:create"),
+            {
+                "email": "reader@example.com",
+                "password": "1qazcde3",
+                "first_name": "Reader",
+                "last_name": "User",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email="reader@example.com")
+        self.assertTrue(user.password.startswith("argon2$argon2id$"))
+        self.assertIn("m=8,t=1,p=1", user.password)
+
+    def test_registered_password_is_hashed_off_the_event_loop(self) -> None:
+        threads = []
+        encode = ProfileArgon2PasswordHasher.encode
+
+        def record_thread(hasher, *args, **kwargs) -> str:
+            threads.append(threading.current_thread().name)
+            return encode(hasher, *args, **kwargs)
+
+        with patch.object(
+            ProfileArgon2PasswordHasher, "encode", autospec=True,
+            side_effect=record_thread,
+        ):
+            response = APIClient().post(
+                reverse("users:create"),
+                {
+                    "email": "reader@example.com",
+                    "password": "1qazcde3",
+                    "first_name": "Reader",
+                    "last_name": "User",
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("password-hash"))
+        user = User.objects.get(email="reader@example.com")
+        self.assertTrue(user.check_password("1qazcde3"))
+
+    def test_hash_of_another_profile_is_upgraded_on_login(self) -> None:
+        user = User.objects.create_user(
+            email="reader@example.com", password="1qazcde3"
+        )
+
+        with self.settings(PASSWORD_HASHING_PROFILE="strong"):
+            self.assertTrue(get_hasher().must_update(user.password))
+            authenticate(email="reader@example.com", password="1qazcde3")
+
+        user.refresh_from_db()
+        self.assertIn("m=64,t=2,p=1", user.password)
+        self.assertTrue(user.check_password("1qazcde3"))
+
+    def test_pbkdf2_hash_is_upgraded_on_login(self) -> None:
+        user = User.objects.create_user(
+            email="reader@example.com", password="1qazcde3"
+        )
+        user.password = make_password("1qazcde3", hasher="pbkdf2_sha256")
+        user.save()
+
+        self.assertIsNotNone(
+            authenticate(email="reader@example.com", password="1qazcde3")
+        )
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("argon2$argon2id$"))
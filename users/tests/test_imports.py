@@ -0,0 +1,213 @@
+import csv
+import os
+import tempfile
+from urllib.parse import parse_qs, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.imports import CREATED, FAILED, UPDATED, UserImporter
+from users.models import UserImport
+from users.tasks import import_users
+
+User = get_user_model()
+
+FAST_HASHING = {
+    "PASSWORD_HASHING_PROFILES": {
+        "fast": {"time_cost": 1, "memory_cost": 8, "parallelism": 1},
+    },
+    "PASSWORD_HASHING_PROFILE": "fast",
+}
+
+
+@override_settings(**FAST_HASHING)
+class UserImporterTests(TestCase):
+    """Test suite for importing users from CSV files"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.importer = UserImporter(
+            {
+                "REPORT_DIR": self.directory.name,
+                "BATCH_SIZE": 2,
+                "HASH_WORKERS": 2,
+                "ACTIVATION_URL": "https://library.test/activate/",
+            }
+        )
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def run_import(self, rows: list[dict]) -> tuple[UserImport, list[dict]]:
+        source = os.path.join(self.directory.name, "users.csv")
+        with open(source, "w", newline="") as file:
+            writer = csv.DictWriter(
+                file, ["email", "first_name", "last_name", "password"]
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+
+        run = self.importer.run(UserImport.objects.create(source=source))
+        with open(run.report_file, newline="") as report:
+            return run, list(csv.DictReader(report))
+
+    def test_users_are_created_with_hashed_passwords(self) -> None:
+        run, report = self.run_import(
+            [
+                {
+                    "email": f"reader{number}@Example.com",
+                    "first_name": "Reader",
+                    "last_name": str(number),
+                    "password": "1qazcde3",
+                }
+                for number in range(5)
+            ]
+        )
+
+        self.assertEqual(run.users_created, 5)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual([row["status"] for row in report], [CREATED] * 5)
+        user = User.objects.get(email="reader3@example.com")
+        self.assertEqual(user.last_name, "3")
+        self.assertTrue(user.check_password("1qazcde3"))
+
+    def test_existing_users_are_updated_on_email(self) -> None:
+        user = User.objects.create_user(
+            email="reader@example.com",
+            password="1qazcde3",
+            first_name="Old",
+            last_name="Name",
+        )
+
+        run, report = self.run_import(
+            [
+                {
+                    "email": "reader@example.com",
+                    "first_name": "New",
+                    "last_name": "Name",
+                },
+                {"email": "not-an-email", "password": "1qazcde3"},
+                {"email": "short@example.com", "password": "short"},
+            ]
+        )
+
+        self.assertEqual(run.users_updated, 1)
+        self.assertEqual(run.rows_failed, 2)
+        report = {row["line"]: row for row in report}
+        self.assertEqual(report["2"]["status"], UPDATED)
+        self.assertEqual(report["2"]["activation_link"], "")
+        self.assertEqual(report["3"]["status"], FAILED)
+        self.assertEqual(report["4"]["status"], FAILED)
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, "New")
+        self.assertTrue(user.check_password("1qazcde3"))
+
+    def test_last_row_of_an_email_wins(self) -> None:
+        run, _ = self.run_import(
+            [
+                {"email": "reader@example.com", "first_name": "First"},
+                {"email": "reader@example.com", "first_name": "Second"},
+            ]
+        )
+
+        self.assertEqual(
+            User.objects.get(email="reader@example.com").first_name,
+            "Second",
+        )
+
+    def test_activation_link_sets_the_first_password(self) -> None:
+        run, report = self.run_import(
+            [{"email": "reader@example.com", "first_name": "Reader"}]
+        )
+
+        self.assertEqual(run.links_issued, 1)
+        user = User.objects.get(email="reader@example.com")
+        self.assertFalse(user.has_usable_password())
+        query = parse_qs(urlsplit(report[0]["activation_link"]).query)
+        data = {
+            "uid": query["uid"][0],
+            "token": query["token"][0],
+            "password": "1qazcde3",
+        }
+
+        client = APIClient()
+        response = client.post(reverse("users:activate"), data)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        user.refresh_from_db()
+        self.assertTrue(user.check_password("1qazcde3"))
+
+        response = client.post(reverse("users:activate"), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_too_long_names_fail_the_row(self) -> None:
+        run, report = self.run_import(
+            [{"email": "reader@example.com", "last_name": "x" * 64}]
+        )
+
+        self.assertEqual(run.rows_failed, 1)
+        self.assertEqual(report[0]["status"], FAILED)
+        self.assertIn("last_name", report[0]["error"])
+        self.assertFalse(User.objects.filter(email="reader@example.com"))
+
+
+@override_settings(**FAST_HASHING)
+class UserImportAdminTests(TestCase):
+    """Test suite for imports of users uploaded in the admin"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.report_file = os.path.join(self.directory.name, "import-1.csv")
+        with open(self.report_file, "w") as report:
+            report.write("line,email\n")
+        self.run = UserImport.objects.create(
+            source=os.path.join(self.directory.name, "upload.csv"),
+            report_file=self.report_file,
+        )
+        self.url = reverse(
+            "admin:users_userimport_report", args=[self.run.pk]
+        )
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_report_is_served_to_staff(self) -> None:
+        admin = User.objects.create_superuser(
+            email="admin@example.com", password="1qazcde3"
+        )
+        self.client.force_login(admin)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), b"line,email\n")
+        self.assertIn("attachment", response["Content-Disposition"])
+
+    def test_report_is_not_served_to_other_users(self) -> None:
+        user = User.objects.create_user(
+            email="reader@example.com", password="1qazcde3"
+        )
+        self.client.force_login(user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+    def test_uploaded_file_is_deleted_after_the_import(self) -> None:
+        with open(self.run.source, "w", newline="") as source:
+            source.write("email,password\nreader@example.com,1qazcde3\n")
+
+        with override_settings(
+            USER_IMPORT={
+                "REPORT_DIR": self.directory.name,
+                "BATCH_SIZE": 10,
+                "HASH_WORKERS": 1,
+                "ACTIVATION_URL": "https://library.test/activate/",
+            }
+        ):
+            import_users(self.run.pk)
+
+        self.assertFalse(os.path.exists(self.run.source))
+        self.assertTrue(User.objects.filter(email="reader@example.com"))
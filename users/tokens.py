@@ -0,0 +1,36 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+VERSION_CLAIM = "ver"
+
+
+def get_user_version(user: User) -> str:
+    """
+    Return a digest of the user fields tokens carry as claims.
+
+    It changes whenever a claim of the user's tokens goes stale.
+    """
+    fields = f"{user.email}:{user.is_staff}:{user.is_active}"
+    return hashlib.sha256(fields.encode()).hexdigest()[:16]
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the email, `is_staff` and version of the user.
+
+    Access tokens made from it copy these claims, so requests can be
+    authenticated without loading the user
+    (see `users.authentication.ClaimsJWTAuthentication`).
+    """
+
+    @classmethod
+    def for_user(cls, user: User) -> "UserRefreshToken":
+        token = super().for_user(user)
+        token["email"] = user.email
+        token["is_staff"] = user.is_staff
+        token[VERSION_CLAIM] = get_user_version(user)
+        return token
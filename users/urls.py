@@ -5,11 +5,12 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 
-from users.views import CreateUserView, ManageUserView
+from users.views import ActivateUserView, CreateUserView, ManageUserView
 
 
 urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
+    path("activate/", ActivateUserView.as_view(), name="activate"),
     path("me/", ManageUserView.as_view(), name="manage_user"),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
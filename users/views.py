@@ -1,26 +1,61 @@
+from adrf.generics import GenericAPIView as AsyncGenericAPIView
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
-from rest_framework import generics
+from rest_framework import generics, status
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from users.serializers import UserSerializer
+from users.hashers import ahash_password
+from users.serializers import ActivateUserSerializer, UserSerializer
 from django.utils.decorators import method_decorator
 from users.schemas import UserSchema
 
 User = get_user_model()
 
 
-@method_decorator(UserSchema.create, name="post")
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(AsyncGenericAPIView):
     """
     API view for creating a new user.
     Uses the UserSerializer for validation and creation.
     No authentication or permission is required.
+    The password is hashed off the event loop, so a worker keeps
+    serving other requests while registrations are hashed.
     """
 
     serializer_class = UserSerializer
     authentication_classes = ()
     permission_classes = ()
 
+    @UserSchema.create
+    async def post(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        password_hash = await ahash_password(
+            serializer.validated_data["password"]
+        )
+        await sync_to_async(serializer.save)(password_hash=password_hash)
+        data = await sync_to_async(lambda: serializer.data)()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+@method_decorator(UserSchema.activate, name="post")
+class ActivateUserView(generics.GenericAPIView):
+    """
+    API view for setting the first password of an imported user.
+    The uid and token come from the activation link of the import.
+    """
+
+    serializer_class = ActivateUserSerializer
+    authentication_classes = ()
+    permission_classes = ()
+
+    def post(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 @method_decorator(UserSchema.manage_user_schema, name="get")
 @method_decorator(UserSchema.manage_user_schema, name="put")